@@ -11,8 +11,42 @@ class Settings(BaseSettings):
     REDIS_DSN: str = "redis://localhost:6379/0"
     REDIS_PREFIX: str = "tgbot"
     REDIS_TTL_SEC: int = 900
+    REDIS_CODEC: str = "json"
     NEURALNET_URL: str = "http://neuralnet:8000"
     HINT_ENDPOINT: str = f"{NEURALNET_URL}/neuralnet/model"
+    HINT_CONNECT_TIMEOUT_SEC: float = 2.0
+    HINT_READ_TIMEOUT_SEC: float = 20.0
+    HINT_POOL_MAX_CONNECTIONS: int = 20
+    HINT_POOL_MAX_KEEPALIVE: int = 10
+    HINT_MAX_IN_FLIGHT: int = 16
+    HINT_HTTP2: bool = False
+    HINT_CACHE_TTL_SEC: int = 86400
+    HINT_CACHE_LOCAL_SIZE: int = 1024
+    BROADCAST_GLOBAL_RATE: float = 25.0
+    BROADCAST_PER_CHAT_RATE: float = 1.0
+    BROADCAST_PER_CHAT_BURST: int = 3
+    BROADCAST_MAX_RETRIES: int = 3
+    ROOM_LEASE_SEC: float = 30.0
+    ROOM_SCHEDULER_POLL_SEC: float = 0.5
+    ROOM_SCHEDULER_TICK_SEC: float = 0.05
+    ROOM_SCHEDULER_MAX_CONCURRENT: int = 200
+    RUN_MODE: str = "polling"  # polling | webhook
+    WEBHOOK_BASE_URL: str = ""
+    WEBHOOK_PATH: str = "/telegram/webhook"
+    WEBHOOK_SECRET: str = ""
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    WEBHOOK_WORKERS: int = 1
+    WEBHOOK_MAX_CONNECTIONS: int = 40
+    USER_LOCK_LEASE_SEC: float = 30.0
+    USER_LOCK_WAIT_SEC: float = 10.0
+    POLLING_WORKERS: int = 1
+    SHARD_QUEUE_SIZE: int = 1000
+    SHARD_MAX_CONCURRENT: int = 100
+    SHARD_MAX_IN_FLIGHT: int = 1000
+    SHARD_POLL_TIMEOUT_SEC: int = 30
+    IMPORT_WORKERS: int = 2
+    IMPORT_MAX_PENDING: int = 16
 
     model_config = {
         "env_file": "config/.env",
@@ -1,28 +1,36 @@
 import logging
+from functools import partial
 from types import SimpleNamespace
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
 
 from app.handlers import register_handlers
+from app.middlewares.user_lock import UserLockMiddleware
+from app.middlewares.user_state import UserStateMiddleware
+from app.services.broadcast import Broadcaster
+from app.services.codecs import make_codec
 from app.services.db import make_engine_and_session
+from app.services.hints import HintCache, create_hint_client
+from app.services.import_jobs import ImportJobs
+from app.services.online_mode import room_tick
 from app.services.redis_client import create_redis
 from app.services.redis_kv import RedisKV
+from app.services.room_scheduler import RoomScheduler
 
 from .config import settings
 
 log = logging.getLogger(__name__)
 
 
-async def create_app() -> SimpleNamespace:
+async def create_app(manage_webhook: bool = True) -> SimpleNamespace:
     bot = Bot(
         token=settings.BOT_TOKEN,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
 
-    dp = Dispatcher(storage=MemoryStorage())
     engine, async_session_maker = make_engine_and_session(settings.DB_DSN)
 
     redis_client = create_redis(settings.REDIS_DSN)
@@ -30,11 +38,72 @@ async def create_app() -> SimpleNamespace:
         client=redis_client,
         prefix=settings.REDIS_PREFIX,
         ttl_seconds=settings.REDIS_TTL_SEC,
+        codec=make_codec(settings.REDIS_CODEC),
     )
 
-    await bot.delete_webhook(drop_pending_updates=True)
+    dp = Dispatcher(
+        storage=RedisStorage(
+            redis=redis_client,
+            key_builder=DefaultKeyBuilder(prefix=f"{settings.REDIS_PREFIX}:fsm"),
+        )
+    )
+    if settings.RUN_MODE == "webhook":
+        dp.update.outer_middleware(
+            UserLockMiddleware(
+                redis_kv,
+                lease_sec=settings.USER_LOCK_LEASE_SEC,
+                wait_sec=settings.USER_LOCK_WAIT_SEC,
+            )
+        )
+    dp.update.outer_middleware(UserStateMiddleware(redis_kv))
+
+    hint_client = create_hint_client()
+    hint_cache = HintCache(
+        redis_kv=redis_kv,
+        ttl_seconds=settings.HINT_CACHE_TTL_SEC,
+        local_size=settings.HINT_CACHE_LOCAL_SIZE,
+    )
+
+    broadcaster = Broadcaster(
+        global_rate=settings.BROADCAST_GLOBAL_RATE,
+        per_chat_rate=settings.BROADCAST_PER_CHAT_RATE,
+        per_chat_burst=settings.BROADCAST_PER_CHAT_BURST,
+        max_retries=settings.BROADCAST_MAX_RETRIES,
+    )
+
+    import_jobs = ImportJobs(
+        max_workers=settings.IMPORT_WORKERS,
+        max_pending=settings.IMPORT_MAX_PENDING,
+    )
 
-    register_handlers(dp, async_session_maker=async_session_maker, redis_kv=redis_kv)
+    room_scheduler = RoomScheduler(
+        redis_kv,
+        partial(
+            room_tick,
+            async_session_maker=async_session_maker,
+            redis_kv=redis_kv,
+            bot=bot,
+            broadcaster=broadcaster,
+        ),
+        lease_sec=settings.ROOM_LEASE_SEC,
+        poll_interval_sec=settings.ROOM_SCHEDULER_POLL_SEC,
+        tick_sec=settings.ROOM_SCHEDULER_TICK_SEC,
+        max_concurrent=settings.ROOM_SCHEDULER_MAX_CONCURRENT,
+    )
+
+    if manage_webhook and settings.RUN_MODE != "webhook":
+        await bot.delete_webhook(drop_pending_updates=True)
+
+    register_handlers(
+        dp,
+        async_session_maker=async_session_maker,
+        redis_kv=redis_kv,
+        hint_client=hint_client,
+        hint_cache=hint_cache,
+        broadcaster=broadcaster,
+        room_scheduler=room_scheduler,
+        import_jobs=import_jobs,
+    )
 
     ns = SimpleNamespace(
         bot=bot,
@@ -43,5 +112,37 @@ async def create_app() -> SimpleNamespace:
         async_session_maker=async_session_maker,
         redis_client=redis_client,
         redis_kv=redis_kv,
+        hint_client=hint_client,
+        hint_cache=hint_cache,
+        broadcaster=broadcaster,
+        room_scheduler=room_scheduler,
+        import_jobs=import_jobs,
     )
     return ns
+
+
+async def close_app(app: SimpleNamespace) -> None:
+    try:
+        await app.room_scheduler.stop()
+    except Exception as e:
+        print("Room scheduler stop failed: %s", e)
+    try:
+        await app.bot.session.close()
+    except Exception as e:
+        print("Bot close failed: %s", e)
+    try:
+        await app.engine.dispose()
+    except Exception as e:
+        print("Engine close failed: %s", e)
+    try:
+        await app.redis_client.aclose()
+    except Exception as e:
+        print("Redis close failed: %s", e)
+    try:
+        await app.hint_client.aclose()
+    except Exception as e:
+        print("Hint client close failed: %s", e)
+    try:
+        app.import_jobs.shutdown()
+    except Exception as e:
+        print("Import pool shutdown failed: %s", e)
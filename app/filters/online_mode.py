@@ -1,7 +1,6 @@
 from __future__ import annotations
 
-import time
-from typing import Optional
+from typing import Any
 
 from aiogram import types
 from aiogram.filters import BaseFilter
@@ -18,24 +17,24 @@ class OnlineJoinPending(BaseFilter):
     def __init__(self, redis_kv: RedisKV):
         self.redis_kv = redis_kv
 
-    async def __call__(self, message: types.Message) -> bool | dict:
+    async def __call__(self, message: types.Message, **data: Any) -> bool | dict:
         if not message.from_user:
             return False
 
-        data: Optional[dict] = await get_online_join_pending(
-            self.redis_kv, message.from_user.id
+        pending = await get_online_join_pending(
+            self.redis_kv, message.from_user.id, data.get("user_state")
         )
-        if not data:
+        if not pending:
             return False
 
-        return {"online_pending": data}
+        return {"online_pending": pending}
 
 
 class OnlineAnswerPending(BaseFilter):
     def __init__(self, redis_kv: RedisKV):
         self.redis_kv = redis_kv
 
-    async def __call__(self, message: types.Message) -> bool | dict:
+    async def __call__(self, message: types.Message, **data: Any) -> bool | dict:
         if not message.from_user:
             return False
 
@@ -43,15 +42,19 @@ class OnlineAnswerPending(BaseFilter):
         if not text:
             return False
 
-        room = await OnlineRoom.load_by_user(self.redis_kv, message.from_user.id)
+        room = await OnlineRoom.load_by_user(
+            self.redis_kv,
+            message.from_user.id,
+            data.get("user_state"),
+            data.get("reads"),
+        )
         if not room or room.state != "running":
             return False
 
         if message.from_user.id == room.owner_id:
             return False
 
-        now = time.time()
-        if room.question_deadline_ts is None or now > room.question_deadline_ts:
+        if room.phase != "question":
             return False
 
         return {"room": room}
@@ -61,26 +64,28 @@ class OnlineSettingsPending(BaseFilter):
     def __init__(self, redis_kv: RedisKV):
         self.redis_kv = redis_kv
 
-    async def __call__(self, message: types.Message) -> bool | dict:
+    async def __call__(self, message: types.Message, **data: Any) -> bool | dict:
         if not message.from_user:
             return False
 
-        data: Optional[dict] = await get_online_settings_pending(
-            self.redis_kv, message.from_user.id
+        pending = await get_online_settings_pending(
+            self.redis_kv, message.from_user.id, data.get("user_state")
         )
-        if not data:
+        if not pending:
             return False
 
-        room_id = data.get("room_id")
-        field = data.get("field")
+        room_id = pending.get("room_id")
+        field = pending.get("field")
         if not room_id or field not in {"points", "seconds"}:
             return False
 
-        room = await OnlineRoom.load_by_room_id(self.redis_kv, room_id)
+        room = await OnlineRoom.load_by_room_id(
+            self.redis_kv, room_id, data.get("reads")
+        )
         if not room or room.state != "waiting":
             return False
 
         if message.from_user.id != room.owner_id:
             return False
 
-        return {"room": room, "settings_pending": data}
+        return {"room": room, "settings_pending": pending}
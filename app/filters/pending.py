@@ -15,6 +15,15 @@ MAIN_BUTTONS = {
 }
 
 
+async def _pending_state(
+    redis_kv: RedisKV, user_id: int, data: Dict[str, Any]
+) -> Optional[dict]:
+    states = data.get("user_state")
+    if states is not None:
+        return states.get("pending")
+    return await redis_kv.get_state(user_id, "pending")
+
+
 class HasCollectionsPendingAction(BaseFilter):
     def __init__(self, redis_kv: Optional[RedisKV] = None) -> None:
         self._redis_kv = redis_kv
@@ -35,8 +44,7 @@ class HasCollectionsPendingAction(BaseFilter):
         if not redis_kv:
             return False
 
-        key = redis_kv.pending_key(message.from_user.id)
-        pending = await redis_kv.get_json(key)
+        pending = await _pending_state(redis_kv, message.from_user.id, data)
         if not pending:
             return False
 
@@ -62,8 +70,7 @@ class HasProfilePendingAction(BaseFilter):
         if not text or text.startswith("/") or text in MAIN_BUTTONS:
             return False
 
-        key = self.redis_kv.pending_key(message.from_user.id)
-        pending = await self.redis_kv.get_json(key)
+        pending = await _pending_state(self.redis_kv, message.from_user.id, data)
         if not pending or pending.get("type") != "profile:change_name":
             return False
 
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import csv
 import io
+import os
 import re
 
 from aiogram import F, Router, types
@@ -10,6 +11,7 @@ from aiogram.types import BufferedInputFile
 from app.config import settings
 from app.filters.pending import HasCollectionsPendingAction
 from app.keyboards.collections import (
+    PAGE_SIZE_COLLECTIONS,
     collection_cancel_pending_action_kb,
     collection_clear_confirm_kb,
     collection_delete_confirm_kb,
@@ -24,16 +26,63 @@ from app.keyboards.collections import (
 from app.keyboards.user import main_reply_kb
 from app.middlewares.redis_kv import RedisKVMiddleware
 from app.repos.base import with_repos
-from app.services import importers
-from app.services.collections_facade import get_user_and_collections
+from app.services.collections_facade import get_user_collections_page
+from app.services.hints import HintCache
+from app.services.import_jobs import (
+    DOWNLOAD_CHUNK_SIZE,
+    ImportJob,
+    ImportJobs,
+    ImportQueueFull,
+    SpooledUpload,
+)
 from app.services.share_code import make_share_code, parse_share_code
+from app.services.solo_mode import invalidate_solo_deck
+from app.texts.imports import fmt_import_progress
 
 MAX_ITEMS_PER_COLLECTION = 40
 
 
-def get_collections_router(async_session_maker, redis_kv) -> Router:
+def get_collections_router(
+    async_session_maker,
+    redis_kv,
+    hint_cache: HintCache | None = None,
+    import_jobs: ImportJobs | None = None,
+) -> Router:
     router = Router(name="collections")
     router.message.middleware(RedisKVMiddleware(redis_kv))
+    jobs = import_jobs or ImportJobs(max_workers=0)
+
+    async def _run_import(
+        message: types.Message,
+        kind: str,
+        file_name: str,
+        limit: int = MAX_ITEMS_PER_COLLECTION,
+        **options,
+    ):
+        status = await message.answer("📥 Файл получен, обрабатываю…")
+
+        async def on_progress(job: ImportJob) -> None:
+            await status.edit_text(fmt_import_progress(job))
+
+        with SpooledUpload(suffix=os.path.splitext(file_name)[1]) as upload:
+            await message.bot.download(
+                message.document,
+                upload,
+                chunk_size=DOWNLOAD_CHUNK_SIZE,
+                seek=False,
+            )
+            try:
+                return await jobs.run(
+                    kind,
+                    file_name,
+                    upload.source,
+                    progress=on_progress,
+                    limit=limit,
+                    **options,
+                )
+            except ImportQueueFull as e:
+                await status.edit_text(str(e))
+                raise
 
     def _normalize_pair(text: str) -> tuple[str, str] | None:
         parts = re.split(r"\s*\|\|\s*", text, maxsplit=1)
@@ -44,24 +93,30 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
 
     @router.message(F.text == "👀 Мои коллекции")
     async def show_collections(message: types.Message) -> None:
-        uc = await get_user_and_collections(
-            async_session_maker, message.from_user.id, message.from_user.username
+        uc = await get_user_collections_page(
+            async_session_maker,
+            message.from_user.id,
+            message.from_user.username,
+            page=0,
+            per_page=PAGE_SIZE_COLLECTIONS,
         )
-        pairs = [(c.id, c.title) for c in uc.collections]
         await message.answer(
             "Твои коллекции:",
-            reply_markup=collections_root_kb(page=0, collections=pairs),
+            reply_markup=collections_root_kb(uc.page),
         )
 
     @router.callback_query(F.data == "col:list")
     async def collections_list(cb: types.CallbackQuery) -> None:
-        uc = await get_user_and_collections(
-            async_session_maker, cb.from_user.id, cb.from_user.username
+        uc = await get_user_collections_page(
+            async_session_maker,
+            cb.from_user.id,
+            cb.from_user.username,
+            page=0,
+            per_page=PAGE_SIZE_COLLECTIONS,
         )
-        pairs = [(c.id, c.title) for c in uc.collections]
         await cb.message.edit_text(
             "Твои коллекции:",
-            reply_markup=collections_root_kb(page=0, collections=pairs),
+            reply_markup=collections_root_kb(uc.page),
         )
         await cb.answer()
 
@@ -69,13 +124,14 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
     async def page_collections(cb: types.CallbackQuery) -> None:
         page = int(cb.data.split(":")[-1])
 
-        uc = await get_user_and_collections(
-            async_session_maker, cb.from_user.id, cb.from_user.username
-        )
-        pairs = [(c.id, c.title) for c in uc.collections]
-        await cb.message.edit_reply_markup(
-            reply_markup=collections_root_kb(page=page, collections=pairs)
+        uc = await get_user_collections_page(
+            async_session_maker,
+            cb.from_user.id,
+            cb.from_user.username,
+            page=page,
+            per_page=PAGE_SIZE_COLLECTIONS,
         )
+        await cb.message.edit_reply_markup(reply_markup=collections_root_kb(uc.page))
         await cb.answer()
 
     @router.callback_query(F.data == "col:back")
@@ -115,8 +171,9 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
 
     @router.callback_query(F.data == "col:new")
     async def start_new(cb: types.CallbackQuery) -> None:
-        key = redis_kv.pending_key(cb.from_user.id)
-        await redis_kv.set_json(key, {"type": "col:new"}, ex=redis_kv.ttl_seconds)
+        await redis_kv.set_state(
+            cb.from_user.id, "pending", {"type": "col:new"}, ex=redis_kv.ttl_seconds
+        )
         await cb.message.answer(
             "Введи название новой коллекции:",
             reply_markup=collection_cancel_pending_action_kb(),
@@ -140,9 +197,11 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
     @router.callback_query(F.data.startswith("col:rename:"))
     async def rename(cb: types.CallbackQuery) -> None:
         cid = int(cb.data.split(":")[-1])
-        key = redis_kv.pending_key(cb.from_user.id)
-        await redis_kv.set_json(
-            key, {"type": "col:rename", "cid": cid}, ex=redis_kv.ttl_seconds
+        await redis_kv.set_state(
+            cb.from_user.id,
+            "pending",
+            {"type": "col:rename", "cid": cid},
+            ex=redis_kv.ttl_seconds,
         )
         await cb.message.answer(
             "Введи новое название коллекции:",
@@ -158,6 +217,7 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
         async with with_repos(async_session_maker) as (_, users, cols, _):
             u = await users.get_or_create(cb.from_user.id, cb.from_user.username)
             await cols.delete_owned(cid, u.id)
+        await invalidate_solo_deck(redis_kv, cid)
 
         await cb.message.edit_text(
             "🗑 Коллекция удалена.", reply_markup=collection_deleted_kb()
@@ -248,9 +308,11 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
         if cnt >= MAX_ITEMS_PER_COLLECTION:
             await cb.answer("Лимит 40 карточек", show_alert=True)
             return
-        key = redis_kv.pending_key(cb.from_user.id)
-        await redis_kv.set_json(
-            key, {"type": "item:add:q", "cid": cid}, ex=redis_kv.ttl_seconds
+        await redis_kv.set_state(
+            cb.from_user.id,
+            "pending",
+            {"type": "item:add:q", "cid": cid},
+            ex=redis_kv.ttl_seconds,
         )
         await cb.message.answer(
             "📝 Введи *вопрос* для карточки:",
@@ -268,8 +330,9 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
         if not item or not col:
             await cb.answer("Нет доступа или не найдено", show_alert=True)
             return
-        await redis_kv.set_json(
-            redis_kv.pending_key(cb.from_user.id),
+        await redis_kv.set_state(
+            cb.from_user.id,
+            "pending",
             {"type": "item:edit:q", "item_id": item_id},
             ex=redis_kv.ttl_seconds,
         )
@@ -289,8 +352,9 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
         if not item or not col:
             await cb.answer("Нет доступа или не найдено", show_alert=True)
             return
-        await redis_kv.set_json(
-            redis_kv.pending_key(cb.from_user.id),
+        await redis_kv.set_state(
+            cb.from_user.id,
+            "pending",
             {"type": "item:edit:a", "item_id": item_id},
             ex=redis_kv.ttl_seconds,
         )
@@ -310,8 +374,9 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
         if not item or not col:
             await cb.answer("Нет доступа или не найдено", show_alert=True)
             return
-        await redis_kv.set_json(
-            redis_kv.pending_key(cb.from_user.id),
+        await redis_kv.set_state(
+            cb.from_user.id,
+            "pending",
             {"type": "item:edit:qa", "item_id": item_id},
             ex=redis_kv.ttl_seconds,
         )
@@ -332,6 +397,7 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
                 await cb.answer("Нет доступа или не найдено", show_alert=True)
                 return
             await items.delete(item_id)
+        await invalidate_solo_deck(redis_kv, col.id)
         await cb.message.edit_text(
             "🗑 Карточка удалена.", reply_markup=collection_edit_kb(col.id)
         )
@@ -362,6 +428,7 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
                 await cb.answer("Нет доступа/не найдено", show_alert=True)
                 return
             deleted = await items.delete_all_in_collection(cid)
+        await invalidate_solo_deck(redis_kv, cid)
         await cb.message.edit_text(
             f"🧹 Коллекция «{col.title}» очищена. Удалено карточек: {deleted}.",
             reply_markup=collection_menu_kb(cid, page=2),
@@ -386,8 +453,9 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
     @router.callback_query(F.data.startswith("col:import:items:"))
     async def col_import_items_prompt(cb: types.CallbackQuery) -> None:
         cid = int(cb.data.split(":")[-1])
-        await redis_kv.set_json(
-            redis_kv.pending_key(cb.from_user.id),
+        await redis_kv.set_state(
+            cb.from_user.id,
+            "pending",
             {"type": "import:items:await_file", "cid": cid},
             ex=redis_kv.ttl_seconds,
         )
@@ -396,6 +464,8 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
             "Отправьте файл с колонками: *question*, *answer*.\n"
             "Первая строка — заголовки. Пример CSV:\n"
             "```csv\nquestion,answer\nСтолица Франции?,Париж\n2+2=?,4\n```\n"
+            "Также подойдут колода Anki (.apkg) и экспорт Quizlet (.txt, термин и "
+            "определение через Tab).\n"
             "_Максимум 40 карточек в коллекции. Дубликаты по вопросу игнорируются._"
         )
         await cb.message.answer(
@@ -407,8 +477,9 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
 
     @router.callback_query(F.data == "col:import:collections:prompt")
     async def col_import_collections_prompt(cb: types.CallbackQuery) -> None:
-        await redis_kv.set_json(
-            redis_kv.pending_key(cb.from_user.id),
+        await redis_kv.set_state(
+            cb.from_user.id,
+            "pending",
             {"type": "import:collections:await_file"},
             ex=redis_kv.ttl_seconds,
         )
@@ -416,7 +487,9 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
             "📦 Импорт коллекций (CSV/Excel)\n\n"
             "Отправьте файл с колонками: *title*, *question*, *answer*.\n"
             "*title* — название коллекции. Пример CSV:\n"
-            "```csv\ntitle,question,answer\nГеография,Столица Франции?,Париж\nМатематика,2+2=?,4\n```"
+            "```csv\ntitle,question,answer\nГеография,Столица Франции?,Париж\nМатематика,2+2=?,4\n```\n"
+            "Колода Anki (.apkg) станет коллекциями по своим колодам, экспорт Quizlet "
+            "(.txt) — коллекцией с именем файла."
         )
         await cb.message.answer(
             example,
@@ -444,8 +517,9 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
 
     @router.callback_query(F.data == "col:add_by_code")
     async def coll_add_by_code(cb: types.CallbackQuery) -> None:
-        await redis_kv.set_json(
-            redis_kv.pending_key(cb.from_user.id),
+        await redis_kv.set_state(
+            cb.from_user.id,
+            "pending",
             {"type": "share:await_code"},
             ex=redis_kv.ttl_seconds,
         )
@@ -489,8 +563,7 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
 
     @router.callback_query(F.data == "col:cancel_pending")
     async def col_pending_action_cancel(cb: types.CallbackQuery) -> None:
-        key = redis_kv.pending_key(cb.from_user.id)
-        await redis_kv.delete(key)
+        await redis_kv.clear_state(cb.from_user.id, "pending")
 
         await cb.message.answer("Действие отменено.")
         await cb.answer()
@@ -498,7 +571,7 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
     @router.message(HasCollectionsPendingAction(redis_kv))
     async def handle_pending(message: types.Message, pending: dict) -> None:
         typ = pending.get("type")
-        key = redis_kv.pending_key(message.from_user.id)
+        uid = message.from_user.id
 
         async with with_repos(async_session_maker) as (_, users, cols, items):
             u = await users.get_or_create(
@@ -511,7 +584,7 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
                     await message.answer("Не вижу текста. Введи название коллекции:")
                     return
                 col = await cols.create(u.id, title)
-                await redis_kv.delete(key)
+                await redis_kv.clear_state(uid, "pending")
                 await message.answer(
                     f"✅ Коллекция «{col.title}» создана.",
                     reply_markup=collection_edit_kb(col.id),
@@ -521,10 +594,11 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
             if typ == "col:rename":
                 cid = int(pending["cid"])
                 ok = await cols.rename(cid, u.id, (message.text or "").strip())
-                await redis_kv.delete(key)
+                await redis_kv.clear_state(uid, "pending")
                 if not ok:
                     await message.answer("Коллекция не найдена.")
                     return
+                await invalidate_solo_deck(redis_kv, cid)
                 col = await cols.get_owned(cid, u.id)
                 if not col:
                     await message.answer("Коллекция не найдена.")
@@ -538,8 +612,9 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
                 if not q:
                     await message.answer("Не вижу текста. Введи вопрос:")
                     return
-                await redis_kv.set_json(
-                    key,
+                await redis_kv.set_state(
+                    uid,
+                    "pending",
                     {"type": "item:add:a", "cid": int(pending["cid"]), "q": q},
                     ex=redis_kv.ttl_seconds,
                 )
@@ -559,16 +634,17 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
                 q = pending["q"]
                 col = await cols.get_owned(cid, u.id)
                 if not col:
-                    await redis_kv.delete(key)
+                    await redis_kv.clear_state(uid, "pending")
                     await message.answer("Коллекция не найдена.")
                     return
                 if await items.count_in_collection(cid) >= MAX_ITEMS_PER_COLLECTION:
-                    await redis_kv.delete(key)
+                    await redis_kv.clear_state(uid, "pending")
                     await message.answer("❗️ Лимит 40 карточек.")
                     return
                 created = await items.add(cid, q, a)
+                await invalidate_solo_deck(redis_kv, cid)
                 item, col = await items.get_item_owned(created.id, u.id)
-                await redis_kv.delete(key)
+                await redis_kv.clear_state(uid, "pending")
                 text = (
                     "✅ Карточка создана.\n\n"
                     f"Коллекция: «{col.title}»\n\n"
@@ -586,16 +662,20 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
                 item_id = int(pending["item_id"])
                 item, col = await items.get_item_owned(item_id, u.id)
                 if not item or not col:
-                    await redis_kv.delete(key)
+                    await redis_kv.clear_state(uid, "pending")
                     await message.answer("Нет доступа/не найдено.")
                     return
                 new_q = (message.text or "").strip()
                 if not new_q:
                     await message.answer("Не вижу текста. Введи новый вопрос:")
                     return
+                old_q, old_a = item.question, item.answer
                 await items.update_question(item_id, new_q)
+                if hint_cache is not None:
+                    await hint_cache.invalidate(old_q, old_a)
+                await invalidate_solo_deck(redis_kv, col.id)
                 item, col = await items.get_item_owned(item_id, u.id)
-                await redis_kv.delete(key)
+                await redis_kv.clear_state(uid, "pending")
                 text = (
                     "✅ Карточка обновлена.\n\n"
                     f"Коллекция: «{col.title}»\n\n"
@@ -613,16 +693,20 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
                 item_id = int(pending["item_id"])
                 item, col = await items.get_item_owned(item_id, u.id)
                 if not item or not col:
-                    await redis_kv.delete(key)
+                    await redis_kv.clear_state(uid, "pending")
                     await message.answer("Нет доступа/не найдено.")
                     return
                 new_a = (message.text or "").strip()
                 if not new_a:
                     await message.answer("Не вижу текста. Введи новый ответ:")
                     return
+                old_q, old_a = item.question, item.answer
                 await items.update_answer(item_id, new_a)
+                if hint_cache is not None:
+                    await hint_cache.invalidate(old_q, old_a)
+                await invalidate_solo_deck(redis_kv, col.id)
                 item, col = await items.get_item_owned(item_id, u.id)
-                await redis_kv.delete(key)
+                await redis_kv.clear_state(uid, "pending")
                 text = (
                     "✅ Карточка обновлена.\n\n"
                     f"Коллекция: «{col.title}»\n\n"
@@ -648,12 +732,16 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
                 item_id = int(pending["item_id"])
                 item, col = await items.get_item_owned(item_id, u.id)
                 if not item or not col:
-                    await redis_kv.delete(key)
+                    await redis_kv.clear_state(uid, "pending")
                     await message.answer("Нет доступа/не найдено.")
                     return
+                old_q, old_a = item.question, item.answer
                 await items.update_both(item_id, new_q, new_a)
+                if hint_cache is not None:
+                    await hint_cache.invalidate(old_q, old_a)
+                await invalidate_solo_deck(redis_kv, col.id)
                 item, col = await items.get_item_owned(item_id, u.id)
-                await redis_kv.delete(key)
+                await redis_kv.clear_state(uid, "pending")
                 text = (
                     "✅ Карточка обновлена.\n\n"
                     f"Коллекция: «{col.title}»\n\n"
@@ -669,14 +757,23 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
             if typ == "import:items:await_file":
                 cid = int(pending.get("cid", 0))
                 if message.document is None:
-                    await message.answer("Пришлите файл .csv или .xlsx с карточками.")
+                    await message.answer(
+                        "Пришлите файл .csv, .xlsx, .apkg или .txt с карточками."
+                    )
                     return
                 file_name = message.document.file_name or "data.csv"
-                buf = io.BytesIO()
-                await message.bot.download(message.document, buf)
-                data = buf.getvalue()
+                async with with_repos(async_session_maker) as (_, _, _, items):
+                    existing = frozenset(q for _, q in await items.list_pairs(cid))
                 try:
-                    pairs = importers.parse_items_file(file_name, data)
+                    pairs = await _run_import(
+                        message,
+                        "items",
+                        file_name,
+                        limit=max(0, MAX_ITEMS_PER_COLLECTION - len(existing)),
+                        skip=existing,
+                    )
+                except ImportQueueFull:
+                    return
                 except Exception as e:
                     await message.answer(f"Не получилось прочитать файл: {e}")
                     return
@@ -688,20 +785,15 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
                     col = await cols.get_owned(cid, u.id)
                     if not col:
                         await message.answer("Коллекция не найдена.")
-                        await redis_kv.delete(key)
+                        await redis_kv.clear_state(uid, "pending")
                         return
 
-                    existing = set(q for _, q in await items.list_pairs(cid))
-                    added = 0
-                    for q, a in pairs:
-                        if added + len(existing) >= MAX_ITEMS_PER_COLLECTION:
-                            break
-                        if q in existing:
-                            continue
-                        await items.add(cid, q, a)
-                        added += 1
-                        existing.add(q)
-                await redis_kv.delete(key)
+                    added = await items.add_many(
+                        cid, pairs, limit=MAX_ITEMS_PER_COLLECTION
+                    )
+                if added:
+                    await invalidate_solo_deck(redis_kv, cid)
+                await redis_kv.clear_state(uid, "pending")
                 if added == 0:
                     await message.answer(
                         "Ничего не импортировано (возможно, дубликаты или лимит достигнут)."
@@ -717,14 +809,15 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
 
             if typ == "import:collections:await_file":
                 if message.document is None:
-                    await message.answer("Пришлите файл .csv или .xlsx с коллекциями.")
+                    await message.answer(
+                        "Пришлите файл .csv, .xlsx, .apkg или .txt с коллекциями."
+                    )
                     return
                 file_name = message.document.file_name or "collections.csv"
-                buf = io.BytesIO()
-                await message.bot.download(message.document, buf)
-                data = buf.getvalue()
                 try:
-                    grouped = importers.parse_collections_file(file_name, data)
+                    grouped = await _run_import(message, "collections", file_name)
+                except ImportQueueFull:
+                    return
                 except Exception as e:
                     await message.answer(f"Не получилось прочитать файл: {e}")
                     return
@@ -739,21 +832,13 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
                     for title, pairs in grouped.items():
                         col = await cols.create(u.id, title)
                         created += 1
-                        count_in_col = 0
-                        seen_q = set()
-                        for q, a in pairs:
-                            if count_in_col >= MAX_ITEMS_PER_COLLECTION:
-                                skipped += 1
-                                continue
-                            if q in seen_q:
-                                skipped += 1
-                                continue
-                            await items.add(col.id, q, a)
-                            seen_q.add(q)
-                            count_in_col += 1
-                            total_cards += 1
-
-                await redis_kv.delete(key)
+                        added = await items.add_many(
+                            col.id, pairs, limit=MAX_ITEMS_PER_COLLECTION
+                        )
+                        total_cards += added
+                        skipped += len(pairs) - added
+
+                await redis_kv.clear_state(uid, "pending")
                 await message.answer(
                     f"✅ Импорт завершён. Создано коллекций: {created}. Добавлено карточек: {total_cards}. Пропущено: {skipped}."
                 )
@@ -777,19 +862,13 @@ def get_collections_router(async_session_maker, redis_kv) -> Router:
                         message.from_user.id, message.from_user.username
                     )
 
-                    src = await cols.get_by_id(cid)
-                    if not src:
+                    new_col = await cols.clone(cid, u.id)
+                    if not new_col:
                         await message.answer("Исходная коллекция не найдена.")
-                        await redis_kv.delete(key)
+                        await redis_kv.clear_state(uid, "pending")
                         return
 
-                    new_col = await cols.create(u.id, src.title)
-
-                    pairs = await items.list_question_answer_pairs(cid)
-                    for q, a in pairs:
-                        await items.add(new_col.id, q, a)
-
-                await redis_kv.delete(key)
+                await redis_kv.clear_state(uid, "pending")
                 await message.answer(
                     f"✅ Коллекция «{new_col.title}» импортирована по коду.",
                     reply_markup=collection_menu_kb(new_col.id, page=1),
@@ -5,6 +5,7 @@ import io
 import logging
 import time as pytime
 from datetime import datetime, timezone
+from typing import Optional
 
 from aiogram import F, Router, types
 from aiogram.filters import Command
@@ -23,18 +24,27 @@ from app.keyboards.online_mode import (
     online_root_kb,
     online_settings_cancel_kb,
 )
+from app.keyboards.solo_mode import PAGE_SIZE_COLLECTIONS
 from app.middlewares.redis_kv import RedisKVMiddleware
 from app.models.online_room import MAX_PLAYERS_PER_ROOM, OnlineRoom
-from app.services.collections_facade import get_user_and_collections
+from app.services.broadcast import Broadcaster
+from app.services.collections_facade import get_user_collections_page
 from app.services.online_mode import (
     clear_online_join_pending,
     clear_online_settings_pending,
+    drop_room_deck,
+    get_room_deck,
+    resolve_player_names,
     run_room_loop,
     set_online_join_pending,
     set_online_settings_pending,
+    snapshot_room_deck,
     update_owner_room_message,
+    wake_room,
 )
 from app.services.redis_kv import RedisKV
+from app.services.room_scheduler import RoomScheduler
+from app.services.room_state import ANSWER_DUPLICATE, RoomState
 from app.services.solo_mode import SoloData
 from app.texts.online_mode import fmt_online_root, fmt_player_waiting, fmt_room_waiting
 from app.texts.solo_mode import fmt_choose_collection
@@ -50,11 +60,17 @@ except Exception:  # pragma: no cover
     qrcode = None
 
 
-def get_online_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
+def get_online_mode_router(
+    async_session_maker,
+    redis_kv: RedisKV,
+    broadcaster: Optional[Broadcaster] = None,
+    room_scheduler: Optional[RoomScheduler] = None,
+) -> Router:
     router = Router(name="online_mode")
     router.message.middleware(RedisKVMiddleware(redis_kv))
 
     ttl = redis_kv.ttl_seconds
+    broadcaster = broadcaster or Broadcaster()
 
     def _normalize_answer(text: str) -> str:
         return " ".join((text or "").strip().lower().split())
@@ -65,8 +81,7 @@ def get_online_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
     @router.message(F.text == "🤼 Играть онлайн")
     @router.message(Command("online"))
     async def cmd_online_start(message: types.Message) -> None:
-        key = redis_kv.pending_key(message.from_user.id)
-        await redis_kv.delete(key)
+        await redis_kv.clear_state(message.from_user.id, "pending")
 
         await message.answer(fmt_online_root(), reply_markup=online_root_kb())
 
@@ -82,18 +97,21 @@ def get_online_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
             await cb.answer("Сначала выйди из текущей комнаты.", show_alert=True)
             return
 
-        uc = await get_user_and_collections(
-            async_session_maker, cb.from_user.id, cb.from_user.username
+        uc = await get_user_collections_page(
+            async_session_maker,
+            cb.from_user.id,
+            cb.from_user.username,
+            page=0,
+            per_page=PAGE_SIZE_COLLECTIONS,
         )
-        all_cols = uc.collections
 
-        if not all_cols:
+        if not uc.page.total:
             await cb.answer("У тебя пока нет коллекций.", show_alert=True)
             return
 
         await cb.message.edit_text(
             fmt_choose_collection(),
-            reply_markup=online_collections_kb(all_cols, page=0),
+            reply_markup=online_collections_kb(uc.page),
         )
         await cb.answer()
 
@@ -104,14 +122,17 @@ def get_online_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
         except Exception:
             page = 0
 
-        uc = await get_user_and_collections(
-            async_session_maker, cb.from_user.id, cb.from_user.username
+        uc = await get_user_collections_page(
+            async_session_maker,
+            cb.from_user.id,
+            cb.from_user.username,
+            page=page,
+            per_page=PAGE_SIZE_COLLECTIONS,
         )
-        all_cols = uc.collections
 
         await cb.message.edit_text(
             fmt_choose_collection(),
-            reply_markup=online_collections_kb(all_cols, page=page),
+            reply_markup=online_collections_kb(uc.page),
         )
         await cb.answer()
 
@@ -263,6 +284,10 @@ def get_online_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
 
         room.state = "canceled"
         await room.save(redis_kv, ttl=ttl)
+        await drop_room_deck(redis_kv, room)
+        await RoomState(redis_kv, room.room_id).clear(last_index=room.index)
+        if room_scheduler is not None:
+            await room_scheduler.unschedule(room.room_id)
 
         for p in room.players:
             try:
@@ -293,17 +318,22 @@ def get_online_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
         room.state = "running"
         room.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds") + "Z"
         room.index = 0
-        room.answered_user_ids = []
         await room.save(redis_kv, ttl=ttl)
+        await snapshot_room_deck(async_session_maker, redis_kv, room)
 
         await cb.message.edit_text(
             "Игра запущена! После каждого вопроса рейтинг будет обновляться."
         )
         await cb.answer()
 
-        asyncio.create_task(
-            run_room_loop(room.room_id, async_session_maker, redis_kv, cb.bot)
-        )
+        if room_scheduler is not None:
+            await room_scheduler.schedule(room.room_id)
+        else:
+            asyncio.create_task(
+                run_room_loop(
+                    room.room_id, async_session_maker, redis_kv, cb.bot, broadcaster
+                )
+            )
 
     @router.callback_query(F.data.startswith("online:set_points:"))
     async def cb_set_points(cb: types.CallbackQuery) -> None:
@@ -390,6 +420,7 @@ def get_online_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
             return
 
         room.add_player(message.from_user.id, message.from_user.username)
+        await resolve_player_names(async_session_maker, room.players)
         await OnlineRoom.set_user_room(
             redis_kv, message.from_user.id, room.room_id, ttl=ttl
         )
@@ -442,6 +473,7 @@ def get_online_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
             return
 
         room.add_player(user_id, message.from_user.username)
+        await resolve_player_names(async_session_maker, room.players)
         await OnlineRoom.set_user_room(redis_kv, user_id, room.room_id, ttl=ttl)
         await room.save(redis_kv, ttl=ttl)
 
@@ -474,40 +506,37 @@ def get_online_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
         if not text:
             return
 
-        if message.from_user.id in room.answered_user_ids:
-            await message.answer("Ответ уже принят, ждём следующий вопрос.")
-            return
-
         item_id = room.current_item_id()
         if item_id is None:
             return
 
-        gd = SoloData(async_session_maker)
-        qa = await gd.get_item_qa(item_id)
+        deck = await get_room_deck(async_session_maker, redis_kv, room)
+        qa = deck.items.get(item_id)
         if not qa:
             return
 
         _, correct_answer = qa
 
-        now = pytime.time()
-
-        start_ts = room.question_deadline_ts - room.seconds_per_question
-        raw_dt = now - start_ts
-        answer_time = max(0.0, min(raw_dt, float(room.seconds_per_question)))
-
-        for p in room.players:
-            if p.user_id == message.from_user.id:
-                if _is_correct(text, correct_answer):
-                    p.score += room.points_per_correct
-
-                p.total_answer_time += answer_time
-                break
-
-        room.answered_user_ids.append(message.from_user.id)
-        await room.save(redis_kv, ttl=ttl)
+        res = await RoomState(redis_kv, room.room_id).record_answer(
+            message.from_user.id,
+            room.index,
+            _is_correct(text, correct_answer),
+            pytime.time(),
+        )
+        if res.status == ANSWER_DUPLICATE:
+            await message.answer("Ответ уже принят, ждём следующий вопрос.")
+            return
+        if not res.accepted:
+            return
 
         await message.answer("Ответ принят")
 
+        if res.all_answered:
+            if room_scheduler is not None:
+                await room_scheduler.wake(room.room_id)
+            else:
+                wake_room(room.room_id)
+
     @router.message(
         F.text & ~F.text.startswith("/"),
         OnlineSettingsPending(redis_kv),
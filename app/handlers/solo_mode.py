@@ -9,18 +9,21 @@ from aiogram.filters import Command
 from aiogram.types import BufferedInputFile
 
 from app.keyboards.solo_mode import (
+    PAGE_SIZE_COLLECTIONS,
     solo_collections_kb,
     solo_controls_kb,
     solo_finished_kb,
 )
-from app.models.solo_mode import SoloSession
-from app.services.collections_facade import get_user_and_collections
-from app.services.hints import generate_hint_async
+from app.models.solo_mode import MAX_HINTS_PER_ITEM, SoloSession
+from app.services.collections_facade import get_user_collections_page
+from app.services.hints import HintCache, HintClient, generate_hint_async
 from app.services.redis_kv import RedisKV
 from app.services.solo_mode import (
-    SoloData,
+    get_solo_deck,
     load_solo_session,
-    save_solo_session,
+    mark_solo_card,
+    save_solo_hints,
+    set_solo_showing_answer,
     start_new_solo_session,
 )
 from app.texts.solo_mode import (
@@ -33,39 +36,45 @@ from app.texts.solo_mode import (
 log = logging.getLogger(__name__)
 
 
-def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
+def get_solo_mode_router(
+    async_session_maker,
+    redis_kv: RedisKV,
+    hint_client: HintClient | None = None,
+    hint_cache: HintCache | None = None,
+) -> Router:
     router = Router(name="solo_mode")
 
     @router.message(F.text == "🎮 Играть одному")
     @router.message(Command("solo"))
     async def cmd_solo_start(message: types.Message) -> None:
-        key = redis_kv.pending_key(message.from_user.id)
-        await redis_kv.delete(key)
+        await redis_kv.clear_state(message.from_user.id, "pending")
 
-        uc = await get_user_and_collections(
+        uc = await get_user_collections_page(
             async_session_maker,
             message.from_user.id,
             message.from_user.username,
+            page=0,
+            per_page=PAGE_SIZE_COLLECTIONS,
         )
-        all_cols = uc.collections
 
         await message.answer(
             fmt_choose_collection(),
-            reply_markup=solo_collections_kb(all_cols, page=0),
+            reply_markup=solo_collections_kb(uc.page),
         )
 
     @router.callback_query(F.data == "solo:choose")
     async def cb_solo_choose(cb: types.CallbackQuery) -> None:
-        uc = await get_user_and_collections(
+        uc = await get_user_collections_page(
             async_session_maker,
             cb.from_user.id,
             cb.from_user.username,
+            page=0,
+            per_page=PAGE_SIZE_COLLECTIONS,
         )
-        all_cols = uc.collections
 
         await cb.message.edit_text(
             fmt_choose_collection(),
-            reply_markup=solo_collections_kb(all_cols, page=0),
+            reply_markup=solo_collections_kb(uc.page),
         )
         await cb.answer()
 
@@ -85,16 +94,17 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
         except Exception:
             page = 0
 
-        uc = await get_user_and_collections(
+        uc = await get_user_collections_page(
             async_session_maker,
             cb.from_user.id,
             cb.from_user.username,
+            page=page,
+            per_page=PAGE_SIZE_COLLECTIONS,
         )
-        all_cols = uc.collections
 
         await cb.message.edit_text(
             fmt_choose_collection(),
-            reply_markup=solo_collections_kb(all_cols, page=page),
+            reply_markup=solo_collections_kb(uc.page),
         )
         await cb.answer()
 
@@ -107,8 +117,8 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
             await cb.answer("Некорректная коллекция", show_alert=True)
             return
 
-        gd = SoloData(async_session_maker)
-        item_ids = await gd.get_item_ids(collection_id)
+        deck = await get_solo_deck(async_session_maker, redis_kv, collection_id)
+        item_ids = list(deck.items)
         if not item_ids:
             await cb.answer("В коллекции пока нет карточек.", show_alert=True)
             return
@@ -126,15 +136,15 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
 
     @router.callback_query(F.data == "solo:show")
     async def cb_solo_show(cb: types.CallbackQuery) -> None:
-        sess = await load_solo_session(redis_kv, cb.from_user.id)
+        sess = await load_solo_session(redis_kv, cb.from_user.id, full=False)
         if not sess or sess.done:
             await cb.answer("Сессия не найдена. Начни игру заново.", show_alert=True)
             return
 
-        sess.showing_answer = True
-        await save_solo_session(
+        await set_solo_showing_answer(
             redis_kv,
             sess,
+            True,
             ttl=getattr(redis_kv, "ttl_seconds", None),
         )
         await render_current_question(cb.message, sess)
@@ -142,15 +152,15 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
 
     @router.callback_query(F.data == "solo:hide")
     async def cb_solo_hide(cb: types.CallbackQuery) -> None:
-        sess = await load_solo_session(redis_kv, cb.from_user.id)
+        sess = await load_solo_session(redis_kv, cb.from_user.id, full=False)
         if not sess or sess.done:
             await cb.answer("Сессия не найдена. Начни игру заново.", show_alert=True)
             return
 
-        sess.showing_answer = False
-        await save_solo_session(
+        await set_solo_showing_answer(
             redis_kv,
             sess,
+            False,
             ttl=getattr(redis_kv, "ttl_seconds", None),
         )
         await render_current_question(cb.message, sess)
@@ -169,20 +179,21 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
         await _mark_and_go(cb, "skipped")
 
     async def _mark_and_go(cb: types.CallbackQuery, mark: str | None) -> None:
-        sess = await load_solo_session(redis_kv, cb.from_user.id)
+        sess = await load_solo_session(redis_kv, cb.from_user.id, full=False)
         if not sess:
             await cb.answer("Сессия не найдена. Начни игру заново.", show_alert=True)
             return
 
         was_last = sess.index + 1 >= sess.total
-        sess.mark_and_next(mark)
-        await save_solo_session(
+        await mark_solo_card(
             redis_kv,
             sess,
+            mark,
             ttl=getattr(redis_kv, "ttl_seconds", None),
         )
 
         if sess.done:
+            sess = await load_solo_session(redis_kv, cb.from_user.id) or sess
             await render_finished(cb.message, sess)
         else:
             await render_current_question(cb.message, sess)
@@ -191,13 +202,13 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
 
     @router.callback_query(F.data == "solo:repeat:all")
     async def cb_solo_repeat_all(cb: types.CallbackQuery) -> None:
-        sess = await load_solo_session(redis_kv, cb.from_user.id)
+        sess = await load_solo_session(redis_kv, cb.from_user.id, full=False)
         if not sess:
             await cb.answer("Сессия не найдена", show_alert=True)
             return
 
-        gd = SoloData(async_session_maker)
-        item_ids = await gd.get_item_ids(sess.collection_id)
+        deck = await get_solo_deck(async_session_maker, redis_kv, sess.collection_id)
+        item_ids = list(deck.items)
 
         new_sess = await start_new_solo_session(
             redis_kv,
@@ -222,6 +233,8 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
             await cb.answer("Нет ошибочных карточек в этой сессии.", show_alert=True)
             return
 
+        await get_solo_deck(async_session_maker, redis_kv, sess.collection_id)
+
         new_sess = await start_new_solo_session(
             redis_kv,
             cb.from_user.id,
@@ -239,9 +252,9 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
             await cb.answer("Сессия не найдена", show_alert=True)
             return
 
-        gd = SoloData(async_session_maker)
-        title = await gd.get_collection_title_by_id(sess.collection_id) or "Коллекция"
-        items_map = await gd.get_items_bulk(sess.order)
+        deck = await get_solo_deck(async_session_maker, redis_kv, sess.collection_id)
+        title = deck.title
+        items_map = deck.items
 
         buf = io.StringIO()
         writer = csv.writer(buf)
@@ -259,7 +272,7 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
 
     @router.callback_query(F.data == "solo:hint")
     async def cb_solo_hint(cb: types.CallbackQuery) -> None:
-        sess = await load_solo_session(redis_kv, cb.from_user.id)
+        sess = await load_solo_session(redis_kv, cb.from_user.id, full=False)
         if not sess or sess.done:
             await cb.answer("Сессия не найдена. Начни игру заново.", show_alert=True)
             return
@@ -271,12 +284,14 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
 
         key = str(item_id)
         hints = list(sess.hints.get(key, []))
-        if len(hints) >= 3:
-            await cb.answer("Лимит 3 подсказки для карточки", show_alert=True)
+        if len(hints) >= MAX_HINTS_PER_ITEM:
+            await cb.answer(
+                f"Лимит {MAX_HINTS_PER_ITEM} подсказки для карточки", show_alert=True
+            )
             return
 
-        gd = SoloData(async_session_maker)
-        qa = await gd.get_item_qa(item_id)
+        deck = await get_solo_deck(async_session_maker, redis_kv, sess.collection_id)
+        qa = deck.items.get(item_id)
         if not qa:
             await cb.answer("Вопрос не найден", show_alert=True)
             return
@@ -285,7 +300,9 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
 
         try:
             await cb.answer("Генерирую подсказку…")
-            new_hint = await generate_hint_async(q, a, hints)
+            new_hint = await generate_hint_async(
+                q, a, hints, hint_client=hint_client, hint_cache=hint_cache
+            )
         except Exception as e:
             log.exception("hint generation failed: %s", e)
             await cb.answer("Не удалось создать подсказку 😔", show_alert=True)
@@ -297,7 +314,7 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
 
         hints.append(str(new_hint).strip())
         sess.hints[key] = hints
-        await save_solo_session(
+        await save_solo_hints(
             redis_kv,
             sess,
             ttl=getattr(redis_kv, "ttl_seconds", None),
@@ -306,17 +323,16 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
         await render_current_question(cb.message, sess)
 
     async def render_current_question(msg: types.Message, sess: SoloSession) -> None:
-        gd = SoloData(async_session_maker)
-
         item_id = sess.current_item_id()
         if item_id is None:
             await render_finished(msg, sess)
             return
 
-        qa = await gd.get_item_qa(item_id)
-        title = await gd.get_collection_title_by_item(item_id)
+        deck = await get_solo_deck(async_session_maker, redis_kv, sess.collection_id)
+        qa = deck.items.get(item_id)
+        title = deck.title
 
-        if not qa or title is None:
+        if not qa:
             from app.keyboards.solo_mode import solo_finished_kb
 
             counts = sess.counts()
@@ -343,8 +359,8 @@ def get_solo_mode_router(async_session_maker, redis_kv: RedisKV) -> Router:
         )
 
     async def render_finished(msg: types.Message, sess: SoloSession) -> None:
-        gd = SoloData(async_session_maker)
-        title = await gd.get_collection_title_by_id(sess.collection_id) or "Коллекция"
+        deck = await get_solo_deck(async_session_maker, redis_kv, sess.collection_id)
+        title = deck.title
         counts = sess.counts()
         text = fmt_finished_summary(title, sess.total, counts, sess.total_sec)
 
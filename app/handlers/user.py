@@ -53,9 +53,9 @@ def get_user_router(async_session_maker, redis_kv: RedisKV) -> Router:
             await cb.answer()
             return
 
-        key = redis_kv.pending_key(tg.id)
-        await redis_kv.set_json(
-            key,
+        await redis_kv.set_state(
+            tg.id,
+            "pending",
             {"type": "profile:change_name"},
             ex=redis_kv.ttl_seconds,
         )
@@ -78,8 +78,7 @@ def get_user_router(async_session_maker, redis_kv: RedisKV) -> Router:
             await cb.answer()
             return
 
-        key = redis_kv.pending_key(tg.id)
-        await redis_kv.delete(key)
+        await redis_kv.clear_state(tg.id, "pending")
 
         try:
             await cb.message.edit_text("Изменение имени отменено.")
@@ -99,8 +98,6 @@ def get_user_router(async_session_maker, redis_kv: RedisKV) -> Router:
             await message.answer("Не вижу текста. Введи новое имя:")
             return
 
-        key = redis_kv.pending_key(tg.id)
-
         profile = await update_name_and_get_profile(
             async_session_maker,
             tg.id,
@@ -108,7 +105,7 @@ def get_user_router(async_session_maker, redis_kv: RedisKV) -> Router:
             new_name,
         )
 
-        await redis_kv.delete(key)
+        await redis_kv.clear_state(tg.id, "pending")
 
         text = make_profile_text(
             tg=tg,
@@ -127,8 +124,7 @@ def get_user_router(async_session_maker, redis_kv: RedisKV) -> Router:
         if not tg:
             return
 
-        key = redis_kv.pending_key(tg.id)
-        await redis_kv.delete(key)
+        await redis_kv.clear_state(tg.id, "pending")
 
         text = "Состояния успешно сброшены.\n\n"
         await message.answer(text, reply_markup=main_reply_kb)
@@ -5,6 +5,8 @@ from typing import List, Sequence
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from app.models.collection import CollectionsPage
+
 PAGE_SIZE_COLLECTIONS = 4
 PAGE_SIZE_ITEMS = 6
 
@@ -18,30 +20,8 @@ def _paginate(total: int, per_page: int, page_index: int) -> tuple[int, int, int
     return page_index, total_pages, start
 
 
-def collections_root_kb(*args, **kwargs) -> InlineKeyboardMarkup:
-    collections = kwargs.get("collections")
-    page = kwargs.get("page", 0)
-
-    if collections is None and args:
-        collections = args[0]
-        if len(args) > 1 and isinstance(args[1], int):
-            page = args[1]
-        else:
-            page = kwargs.get("page", 0)
-
-    pairs: List[tuple[int, str]] = []
-    if collections:
-        for rec in collections:
-            if isinstance(rec, tuple) and len(rec) >= 2 and isinstance(rec[0], int):
-                pairs.append((int(rec[0]), str(rec[1])))
-            else:
-                cid = int(getattr(rec, "id"))
-                title = str(getattr(rec, "title"))
-                pairs.append((cid, title))
-
-    total = len(pairs)
-    page0, total_pages, start = _paginate(total, PAGE_SIZE_COLLECTIONS, int(page or 0))
-    chunk = pairs[start : start + PAGE_SIZE_COLLECTIONS]
+def collections_root_kb(collections: CollectionsPage) -> InlineKeyboardMarkup:
+    page0, total_pages = collections.page, collections.total_pages
 
     kb = InlineKeyboardBuilder()
 
@@ -55,9 +35,9 @@ def collections_root_kb(*args, **kwargs) -> InlineKeyboardMarkup:
         ),
     )
 
-    for cid, title in chunk:
+    for col in collections.items:
         kb.row(
-            InlineKeyboardButton(text=f"📚 {title}", callback_data=f"col:open:{cid}")
+            InlineKeyboardButton(text=f"📚 {col.title}", callback_data=f"col:open:{col.id}")
         )
 
     nav: List[InlineKeyboardButton] = []
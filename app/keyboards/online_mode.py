@@ -1,11 +1,9 @@
 from __future__ import annotations
 
-from typing import Sequence
-
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from app.keyboards.solo_mode import PAGE_SIZE_COLLECTIONS
+from app.models.collection import CollectionsPage
 
 
 def online_root_kb() -> InlineKeyboardMarkup:
@@ -16,20 +14,15 @@ def online_root_kb() -> InlineKeyboardMarkup:
     return b.as_markup()
 
 
-def online_collections_kb(collections: Sequence, page: int = 0) -> InlineKeyboardMarkup:
+def online_collections_kb(collections: CollectionsPage) -> InlineKeyboardMarkup:
     b = InlineKeyboardBuilder()
-    start = page * PAGE_SIZE_COLLECTIONS
-    chunk = collections[start : start + PAGE_SIZE_COLLECTIONS]
-
-    for col in chunk:
-        title = getattr(col, "title", None) or "Без названия"
-        cid = getattr(col, "id", None) or getattr(col, "collection_id", None)
-        if cid is None:
-            continue
-        b.button(text=f"🧩 {title[:60]}", callback_data=f"online:col:{cid}")
-
-    total = len(collections)
-    pages = (total + PAGE_SIZE_COLLECTIONS - 1) // PAGE_SIZE_COLLECTIONS
+    page = collections.page
+
+    for col in collections.items:
+        title = col.title or "Без названия"
+        b.button(text=f"🧩 {title[:60]}", callback_data=f"online:col:{col.id}")
+
+    pages = collections.total_pages
     if pages > 1:
         nav = InlineKeyboardBuilder()
         if page > 0:
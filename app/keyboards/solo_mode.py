@@ -1,27 +1,23 @@
 from __future__ import annotations
 
-from typing import Sequence
-
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from app.models.collection import CollectionsPage
+from app.models.solo_mode import MAX_HINTS_PER_ITEM
+
 PAGE_SIZE_COLLECTIONS = 4
 
 
-def solo_collections_kb(collections: Sequence, page: int = 0) -> InlineKeyboardMarkup:
+def solo_collections_kb(collections: CollectionsPage) -> InlineKeyboardMarkup:
     b = InlineKeyboardBuilder()
-    start = page * PAGE_SIZE_COLLECTIONS
-    chunk = collections[start : start + PAGE_SIZE_COLLECTIONS]
-
-    for col in chunk:
-        title = getattr(col, "title", None) or "Без названия"
-        cid = getattr(col, "id", None) or getattr(col, "collection_id", None)
-        if cid is None:
-            continue
-        b.button(text=f"🧩 {title[:60]}", callback_data=f"solo:begin:{cid}")
-
-    total = len(collections)
-    pages = (total + PAGE_SIZE_COLLECTIONS - 1) // PAGE_SIZE_COLLECTIONS
+    page = collections.page
+
+    for col in collections.items:
+        title = col.title or "Без названия"
+        b.button(text=f"🧩 {title[:60]}", callback_data=f"solo:begin:{col.id}")
+
+    pages = collections.total_pages
     if pages > 1:
         nav = InlineKeyboardBuilder()
         if page > 0:
@@ -47,8 +43,11 @@ def solo_controls_kb(
     else:
         b.button(text="👁 Показать ответ", callback_data="solo:show")
 
-    if hints_used < 3:
-        b.button(text=f"💡 Подсказка ({hints_used}/3)", callback_data="solo:hint")
+    if hints_used < MAX_HINTS_PER_ITEM:
+        b.button(
+            text=f"💡 Подсказка ({hints_used}/{MAX_HINTS_PER_ITEM})",
+            callback_data="solo:hint",
+        )
 
     b.button(text="✅ Знаю", callback_data="solo:known")
     b.button(text="❌ Не знаю", callback_data="solo:unknown")
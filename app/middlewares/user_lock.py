@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import secrets
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from aiogram import BaseMiddleware, types
+
+from app.services.redis_kv import RedisKV
+from app.services.room_scheduler import RELEASE_LEASE_LUA, RENEW_LEASE_LUA
+
+log = logging.getLogger(__name__)
+
+WAITER_STALE_MS = 2000
+
+ACQUIRE_USER_LOCK_LUA = """
+local lock, queue, seen = KEYS[1], KEYS[2], KEYS[3]
+local token, me = ARGV[1], ARGV[2]
+local lease_ms = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local stale_ms = tonumber(ARGV[5])
+
+redis.call('ZADD', queue, me, me)
+redis.call('HSET', seen, me, now)
+redis.call('PEXPIRE', queue, lease_ms + stale_ms)
+redis.call('PEXPIRE', seen, lease_ms + stale_ms)
+
+while true do
+    local head = redis.call('ZRANGE', queue, 0, 0)[1]
+    if head == me then
+        break
+    end
+    local at = tonumber(redis.call('HGET', seen, head) or '0')
+    if at + stale_ms >= now then
+        return 0
+    end
+    redis.call('ZREM', queue, head)
+    redis.call('HDEL', seen, head)
+end
+
+if not redis.call('SET', lock, token, 'NX', 'PX', lease_ms) then
+    return 0
+end
+redis.call('ZREM', queue, me)
+redis.call('HDEL', seen, me)
+return 1
+"""
+
+LEAVE_QUEUE_LUA = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+return 1
+"""
+
+
+class UserLockTimeout(RuntimeError):
+    pass
+
+
+class UserLockMiddleware(BaseMiddleware):
+    def __init__(
+        self,
+        redis_kv: RedisKV,
+        lease_sec: float = 30.0,
+        wait_sec: float = 10.0,
+        poll_sec: float = 0.02,
+    ) -> None:
+        super().__init__()
+        self.redis_kv = redis_kv
+        self.lease_ms = int(lease_sec * 1000)
+        self.wait_sec = wait_sec
+        self.poll_sec = poll_sec
+        self._acquire_script = redis_kv.client.register_script(ACQUIRE_USER_LOCK_LUA)
+        self._leave_script = redis_kv.client.register_script(LEAVE_QUEUE_LUA)
+        self._release_script = redis_kv.client.register_script(RELEASE_LEASE_LUA)
+        self._renew_script = redis_kv.client.register_script(RENEW_LEASE_LUA)
+
+    def lock_key(self, user_id: int) -> str:
+        return self.redis_kv._key("lock", "user", user_id)
+
+    def queue_keys(self, user_id: int) -> List[str]:
+        return [
+            self.redis_kv._key("lock", "user", user_id, "queue"),
+            self.redis_kv._key("lock", "user", user_id, "seen"),
+        ]
+
+    async def _acquire(self, user_id: int, update_id: int, token: str) -> bool:
+        keys = [self.lock_key(user_id), *self.queue_keys(user_id)]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_sec
+        delay = self.poll_sec
+        while True:
+            ok = await self._acquire_script(
+                keys=keys,
+                args=[
+                    token,
+                    update_id,
+                    self.lease_ms,
+                    int(time.time() * 1000),
+                    WAITER_STALE_MS,
+                ],
+            )
+            if int(ok):
+                return True
+            if loop.time() >= deadline:
+                await self._leave_script(
+                    keys=self.queue_keys(user_id), args=[update_id]
+                )
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def _release(self, key: str, token: str) -> None:
+        await self._release_script(keys=[key], args=[token])
+
+    async def _keep_lease(self, key: str, token: str) -> None:
+        interval = self.lease_ms / 3000
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                ok = await self._renew_script(keys=[key], args=[token, self.lease_ms])
+            except Exception as e:
+                log.warning("user lock: renewal of %s failed: %s", key, e)
+                continue
+            if not int(ok):
+                log.warning("user lock: lost %s while handler was running", key)
+                return
+
+    async def _handle(
+        self,
+        handler: Callable[[types.TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: types.TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            update_id = getattr(event, "update_id", None)
+            log.exception("user lock: update %s failed: %s", update_id, e)
+            return None
+
+    async def __call__(
+        self,
+        handler: Callable[[types.TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: types.TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            return await self._handle(handler, event, data)
+
+        key = self.lock_key(user.id)
+        token = secrets.token_hex(8)
+        update_id = int(getattr(event, "update_id", 0) or 0)
+        if not await self._acquire(user.id, update_id, token):
+            raise UserLockTimeout(
+                f"{key} busy for {self.wait_sec:.1f}s, update {update_id} rejected"
+            )
+        keeper = asyncio.create_task(self._keep_lease(key, token))
+        try:
+            return await self._handle(handler, event, data)
+        finally:
+            keeper.cancel()
+            await self._release(key, token)
@@ -0,0 +1,39 @@
+from typing import Any, Awaitable, Callable, Dict, List
+
+from aiogram import BaseMiddleware, types
+
+from app.models.online_room import OnlineRoom
+from app.services.read_cache import ReadCache
+from app.services.redis_kv import RedisKV
+
+ROOM_SLOTS = ("room", "online_settings")
+
+
+def room_keys(redis_kv: RedisKV, states: Dict[str, dict]) -> List[str]:
+    keys = []
+    for slot in ROOM_SLOTS:
+        room_id = (states.get(slot) or {}).get("room_id")
+        if room_id:
+            keys.append(OnlineRoom._room_key(redis_kv, str(room_id)))
+    return keys
+
+
+class UserStateMiddleware(BaseMiddleware):
+    def __init__(self, redis_kv: RedisKV) -> None:
+        super().__init__()
+        self.redis_kv = redis_kv
+
+    async def __call__(
+        self,
+        handler: Callable[[types.TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: types.TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        reads = ReadCache(self.redis_kv)
+        data["reads"] = reads
+        user = data.get("event_from_user")
+        if user is not None:
+            states = await self.redis_kv.load_states(user.id)
+            data["user_state"] = states
+            await reads.prefetch(room_keys(self.redis_kv, states))
+        return await handler(event, data)
@@ -1,5 +1,19 @@
 from .base import Base
-from .collection import Collection, CollectionItem
+from .collection import (
+    Collection,
+    CollectionItem,
+    CollectionsPage,
+    CollectionsStats,
+    CollectionSummary,
+)
 from .user import User
 
-__all__ = ["Base", "User", "Collection", "CollectionItem"]
+__all__ = [
+    "Base",
+    "User",
+    "Collection",
+    "CollectionItem",
+    "CollectionSummary",
+    "CollectionsPage",
+    "CollectionsStats",
+]
@@ -1,3 +1,7 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List
+
 from sqlalchemy import (
     Column,
     DateTime,
@@ -110,3 +114,38 @@ class CollectionItem(Base):
 
     def __repr__(self):
         return f"<CollectionItem id={self.id} col={self.collection_id} pos={self.position}>"
+
+
+@dataclass(slots=True, frozen=True)
+class CollectionSummary:
+    id: int
+    title: str
+    items_count: int = 0
+    updated_at: datetime | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class CollectionsStats:
+    collections_count: int = 0
+    total_cards: int = 0
+    last_updated_at: datetime | None = None
+
+
+@dataclass(slots=True)
+class CollectionsPage:
+    items: List[CollectionSummary] = field(default_factory=list)
+    page: int = 0
+    per_page: int = 1
+    total: int = 0
+
+    @property
+    def total_pages(self) -> int:
+        return max(1, (self.total + self.per_page - 1) // self.per_page)
+
+    @property
+    def has_prev(self) -> bool:
+        return self.page > 0
+
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.total_pages - 1
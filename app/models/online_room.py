@@ -5,11 +5,13 @@ import secrets
 import time
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
+from app.services.read_cache import ReadCache
 from app.services.redis_kv import RedisKV
 
 MAX_PLAYERS_PER_ROOM = 30
+ROOM_PAYLOAD_VERSION = 1
 
 
 @dataclass(slots=True)
@@ -18,6 +20,30 @@ class RoomPlayer:
     username: str | None = None
     score: int = 0
     total_answer_time: float = 0.0
+    display_name: str | None = None
+
+    @property
+    def name(self) -> str:
+        return self.display_name or self.username or f"id{self.user_id}"
+
+
+@dataclass(slots=True)
+class RoomDeck:
+    title: str
+    items: Dict[int, Tuple[str, str]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "title": self.title,
+            "items": [[item_id, q, a] for item_id, (q, a) in self.items.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RoomDeck":
+        return cls(
+            title=str(data.get("title") or "Коллекция"),
+            items={int(i): (str(q), str(a)) for i, q, a in data.get("items", [])},
+        )
 
 
 @dataclass(slots=True)
@@ -31,18 +57,20 @@ class OnlineRoom:
 
     index: int = 0
     state: str = "waiting"  # waiting | running | finished | canceled
+    phase: str = "idle"  # idle | question | reveal
 
     created_at: str = ""
     started_at: str | None = None
     finished_at: str | None = None
 
     deep_link: str | None = None
+    game_id: str = ""
 
     players: List[RoomPlayer] = field(default_factory=list)
-    answered_user_ids: List[int] = field(default_factory=list)
 
     question_deadline_ts: float | None = None
     last_q_msg_ids: Dict[str, int] = field(default_factory=dict)
+    delivered_at: Dict[str, float] = field(default_factory=dict)
 
     owner_wait_chat_id: int | None = None
     owner_wait_message_id: int | None = None
@@ -59,28 +87,41 @@ class OnlineRoom:
     def has_player(self, user_id: int) -> bool:
         return any(p.user_id == user_id for p in self.players)
 
-    def add_player(self, user_id: int, username: str | None = None) -> bool:
+    def add_player(
+        self,
+        user_id: int,
+        username: str | None = None,
+        display_name: str | None = None,
+    ) -> bool:
         if self.has_player(user_id):
             return True
         if len(self.players) >= MAX_PLAYERS_PER_ROOM:
             return False
         self.players.append(
-            RoomPlayer(user_id=user_id, username=username or None, score=0)
+            RoomPlayer(
+                user_id=user_id,
+                username=username or None,
+                score=0,
+                display_name=display_name,
+            )
         )
         return True
 
     def remove_player(self, user_id: int) -> None:
         self.players = [p for p in self.players if p.user_id != user_id]
-        self.answered_user_ids = [
-            uid for uid in self.answered_user_ids if uid != user_id
-        ]
         self.last_q_msg_ids.pop(str(user_id), None)
+        self.delivered_at.pop(str(user_id), None)
 
     def current_item_id(self) -> Optional[int]:
         if self.done:
             return None
         return self.order[self.index]
 
+    def apply_scores(self, scores: Dict[int, Tuple[int, float]]) -> None:
+        for p in self.players:
+            if p.user_id in scores:
+                p.score, p.total_answer_time = scores[p.user_id]
+
     def sorted_players(self) -> List[RoomPlayer]:
         return sorted(
             self.players,
@@ -92,6 +133,7 @@ class OnlineRoom:
 
     def to_dict(self) -> dict:
         return {
+            "_v": ROOM_PAYLOAD_VERSION,
             "room_id": self.room_id,
             "owner_id": self.owner_id,
             "collection_id": self.collection_id,
@@ -100,27 +142,42 @@ class OnlineRoom:
             "order": self.order,
             "index": self.index,
             "state": self.state,
+            "phase": self.phase,
             "created_at": self.created_at,
             "started_at": self.started_at,
             "finished_at": self.finished_at,
             "deep_link": self.deep_link,
+            "game_id": self.game_id,
             "players": [
                 {
                     "user_id": p.user_id,
                     "username": p.username,
                     "score": p.score,
                     "total_answer_time": p.total_answer_time,
+                    "display_name": p.display_name,
                 }
                 for p in self.players
             ],
-            "answered_user_ids": self.answered_user_ids,
             "question_deadline_ts": self.question_deadline_ts,
             "last_q_msg_ids": self.last_q_msg_ids,
+            "delivered_at": self.delivered_at,
             "owner_wait_chat_id": self.owner_wait_chat_id,
             "owner_wait_message_id": self.owner_wait_message_id,
             "owner_score_message_id": self.owner_score_message_id,
         }
 
+    @classmethod
+    def from_payload(cls, data: dict) -> "OnlineRoom":
+        if data.get("_v") == ROOM_PAYLOAD_VERSION:
+            fields = dict(data)
+            del fields["_v"]
+            try:
+                fields["players"] = [RoomPlayer(**p) for p in fields["players"]]
+                return cls(**fields)
+            except (KeyError, TypeError):
+                pass
+        return cls.from_dict(data)
+
     @classmethod
     def from_dict(cls, data: dict) -> "OnlineRoom":
         players = [
@@ -129,6 +186,7 @@ class OnlineRoom:
                 username=p.get("username"),
                 score=int(p.get("score") or 0),
                 total_answer_time=float(p.get("total_answer_time") or 0.0),
+                display_name=p.get("display_name"),
             )
             for p in data.get("players", [])
         ]
@@ -141,16 +199,20 @@ class OnlineRoom:
             order=[int(x) for x in data.get("order", [])],
             index=int(data.get("index", 0)),
             state=str(data.get("state", "waiting")),
+            phase=str(data.get("phase") or "idle"),
             created_at=str(data.get("created_at") or ""),
             started_at=data.get("started_at"),
             finished_at=data.get("finished_at"),
             deep_link=data.get("deep_link"),
+            game_id=str(data.get("game_id") or ""),
             players=players,
-            answered_user_ids=[int(x) for x in data.get("answered_user_ids", [])],
             question_deadline_ts=(float(data.get("question_deadline_ts") or 0) or None),
             last_q_msg_ids={
                 str(k): int(v) for k, v in (data.get("last_q_msg_ids") or {}).items()
             },
+            delivered_at={
+                str(k): float(v) for k, v in (data.get("delivered_at") or {}).items()
+            },
             owner_wait_chat_id=(
                 int(data["owner_wait_chat_id"])
                 if data.get("owner_wait_chat_id") is not None
@@ -173,29 +235,37 @@ class OnlineRoom:
         return redis_kv._key("online", "room", room_id)
 
     @staticmethod
-    def _user_room_key(redis_kv: RedisKV, user_id: int) -> str:
-        return redis_kv._key("online", "user_room", user_id)
+    def _deck_key(redis_kv: RedisKV, room_id: str, game_id: str = "") -> str:
+        return redis_kv._key("online", "room", room_id, "deck", game_id)
 
     @classmethod
     async def load_by_room_id(
-        cls, redis_kv: RedisKV, room_id: str
+        cls, redis_kv: RedisKV, room_id: str, reads: Optional[ReadCache] = None
     ) -> Optional["OnlineRoom"]:
-        raw = await redis_kv.get_json(cls._room_key(redis_kv, room_id))
+        key = cls._room_key(redis_kv, room_id)
+        raw = await (reads.get_json(key) if reads else redis_kv.get_json(key))
         if not raw:
             return None
-        return cls.from_dict(raw)
+        return cls.from_payload(raw)
 
     @classmethod
     async def load_by_user(
-        cls, redis_kv: RedisKV, user_id: int
+        cls,
+        redis_kv: RedisKV,
+        user_id: int,
+        states: Optional[Dict[str, dict]] = None,
+        reads: Optional[ReadCache] = None,
     ) -> Optional["OnlineRoom"]:
-        mapping = await redis_kv.get_json(cls._user_room_key(redis_kv, user_id))
+        if states is not None:
+            mapping = states.get("room")
+        else:
+            mapping = await redis_kv.get_state(user_id, "room")
         if not mapping:
             return None
         room_id = str(mapping.get("room_id") or "")
         if not room_id:
             return None
-        return await cls.load_by_room_id(redis_kv, room_id)
+        return await cls.load_by_room_id(redis_kv, room_id, reads)
 
     async def save(self, redis_kv: RedisKV, ttl: int | None = None) -> None:
         await redis_kv.set_json(
@@ -208,15 +278,11 @@ class OnlineRoom:
     async def set_user_room(
         cls, redis_kv: RedisKV, user_id: int, room_id: str, ttl: int | None = None
     ) -> None:
-        await redis_kv.set_json(
-            cls._user_room_key(redis_kv, user_id),
-            {"room_id": room_id},
-            ex=ttl,
-        )
+        await redis_kv.set_state(user_id, "room", {"room_id": room_id}, ex=ttl)
 
     @classmethod
     async def clear_user_room(cls, redis_kv: RedisKV, user_id: int) -> None:
-        await redis_kv.delete(cls._user_room_key(redis_kv, user_id))
+        await redis_kv.clear_state(user_id, "room")
 
     @classmethod
     async def create(
@@ -244,6 +310,7 @@ class OnlineRoom:
             seconds_per_question=seconds_per_question,
             points_per_correct=points_per_correct,
             deep_link=deep_link,
+            game_id=secrets.token_hex(6),
             order=order,
             index=0,
             state="waiting",
@@ -5,6 +5,8 @@ import time
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
+MAX_HINTS_PER_ITEM = 3
+
 
 @dataclass(slots=True)
 class SoloSession:
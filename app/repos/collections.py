@@ -2,13 +2,47 @@ from __future__ import annotations
 
 from typing import Optional
 
-from sqlalchemy import delete, select
+from sqlalchemy import Select, delete, func, insert, literal, select
 
-from app.models.collection import Collection
+from app.models.collection import (
+    Collection,
+    CollectionItem,
+    CollectionsPage,
+    CollectionsStats,
+    CollectionSummary,
+)
 
 from .base import Repo
 
 
+def summaries_select(owner_id: int) -> Select:
+    items_count = (
+        select(func.count(CollectionItem.id))
+        .where(CollectionItem.collection_id == Collection.id)
+        .correlate(Collection)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            Collection.id,
+            Collection.title,
+            items_count.label("items_count"),
+            Collection.updated_at,
+        )
+        .where(Collection.owner_id == owner_id)
+        .order_by(Collection.created_at.asc(), Collection.id.asc())
+    )
+
+
+def row_to_summary(row) -> CollectionSummary:
+    return CollectionSummary(
+        id=int(row.id),
+        title=row.title or "Без названия",
+        items_count=int(row.items_count or 0),
+        updated_at=row.updated_at,
+    )
+
+
 class CollectionsRepo(Repo):
     async def list_by_user(self, user_id: int) -> list[Collection]:
         return (
@@ -23,6 +57,67 @@ class CollectionsRepo(Repo):
             .all()
         )
 
+    async def count_by_user(self, user_id: int) -> int:
+        res = await self.session.execute(
+            select(func.count(Collection.id)).where(Collection.owner_id == user_id)
+        )
+        return int(res.scalar() or 0)
+
+    async def stats_by_user(self, user_id: int) -> CollectionsStats:
+        res = await self.session.execute(
+            select(
+                func.count(func.distinct(Collection.id)),
+                func.count(CollectionItem.id),
+                func.max(Collection.updated_at),
+                func.max(CollectionItem.created_at),
+            )
+            .select_from(Collection)
+            .outerjoin(CollectionItem, CollectionItem.collection_id == Collection.id)
+            .where(Collection.owner_id == user_id)
+        )
+        row = res.one()
+        touched = [ts for ts in (row[2], row[3]) if ts is not None]
+        return CollectionsStats(
+            collections_count=int(row[0] or 0),
+            total_cards=int(row[1] or 0),
+            last_updated_at=max(touched) if touched else None,
+        )
+
+    async def list_page_by_user(
+        self, user_id: int, page: int, per_page: int
+    ) -> CollectionsPage:
+        per_page = max(1, int(per_page))
+        page = max(0, int(page))
+
+        stmt = summaries_select(user_id).add_columns(
+            func.count(Collection.id).over().label("total")
+        )
+        rows = (
+            await self.session.execute(stmt.limit(per_page).offset(page * per_page))
+        ).all()
+
+        if rows:
+            total = int(rows[0].total)
+        else:
+            total = await self.count_by_user(user_id) if page > 0 else 0
+            last_page = max(0, (total - 1) // per_page)
+            if total and page > last_page:
+                page = last_page
+                rows = (
+                    await self.session.execute(
+                        stmt.limit(per_page).offset(page * per_page)
+                    )
+                ).all()
+            else:
+                page = 0
+
+        return CollectionsPage(
+            items=[row_to_summary(r) for r in rows],
+            page=page,
+            per_page=per_page,
+            total=total,
+        )
+
     async def get_owned(self, collection_id: int, user_id: int) -> Optional[Collection]:
         return (
             await self.session.execute(
@@ -39,6 +134,35 @@ class CollectionsRepo(Repo):
         await self.session.refresh(c)
         return c
 
+    async def clone(
+        self, src_collection_id: int, user_id: int, title: Optional[str] = None
+    ) -> Optional[Collection]:
+        res = await self.session.execute(
+            select(Collection.title).where(Collection.id == src_collection_id)
+        )
+        src = res.first()
+        if not src:
+            return None
+
+        c = Collection(owner_id=user_id, title=title or src[0] or "Без названия")
+        self.session.add(c)
+        await self.session.flush()
+
+        await self.session.execute(
+            insert(CollectionItem).from_select(
+                ["collection_id", "question", "answer", "position", "extra"],
+                select(
+                    literal(c.id),
+                    CollectionItem.question,
+                    CollectionItem.answer,
+                    CollectionItem.position,
+                    CollectionItem.extra,
+                ).where(CollectionItem.collection_id == src_collection_id),
+            )
+        )
+        await self.session.commit()
+        return c
+
     async def rename(self, collection_id: int, user_id: int, new_title: str) -> bool:
         col = await self.get_owned(collection_id, user_id)
         if not col:
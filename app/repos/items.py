@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from typing import List, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple
 
-from sqlalchemy import delete, func, select, update
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.collection import Collection, CollectionItem
@@ -78,6 +80,65 @@ class ItemsRepo:
         await self.session.commit()
         return item
 
+    def _insert_skipping_duplicates(self, rows: List[dict]):
+        dialect = self.session.bind.dialect.name
+        if dialect == "postgresql":
+            return (
+                pg_insert(CollectionItem)
+                .values(rows)
+                .on_conflict_do_nothing(constraint="uq_collection_item_question")
+            )
+        if dialect == "sqlite":
+            return (
+                sqlite_insert(CollectionItem)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["collection_id", "question"])
+            )
+        return insert(CollectionItem).values(rows)
+
+    async def add_many(
+        self,
+        collection_id: int,
+        pairs: Iterable[Tuple[str, str]],
+        limit: Optional[int] = None,
+    ) -> int:
+        res = await self.session.execute(
+            select(CollectionItem.question, CollectionItem.position).where(
+                CollectionItem.collection_id == collection_id
+            )
+        )
+        existing = res.all()
+        seen = {row[0] for row in existing}
+        pos = max((row[1] for row in existing), default=0)
+
+        room = None if limit is None else max(0, limit - len(existing))
+        rows: List[dict] = []
+        for q, a in pairs:
+            if room is not None and len(rows) >= room:
+                break
+            if q in seen:
+                continue
+            seen.add(q)
+            pos += 1
+            rows.append(
+                {
+                    "collection_id": collection_id,
+                    "question": q,
+                    "answer": a,
+                    "position": pos,
+                }
+            )
+
+        if not rows:
+            return 0
+
+        res = await self.session.execute(
+            self._insert_skipping_duplicates(rows).returning(CollectionItem.id)
+        )
+        added = len(res.all())
+        await self.session.commit()
+        return added
+
     async def update_question(self, item_id: int, new_q: str) -> None:
         await self.session.execute(
             update(CollectionItem)
@@ -4,19 +4,30 @@ from typing import Dict, Iterable, List, Optional, Tuple
 
 from sqlalchemy import select
 
-from app.models.collection import Collection, CollectionItem
+from app.models.collection import (
+    Collection,
+    CollectionItem,
+    CollectionsPage,
+    CollectionSummary,
+)
 
 from .base import Repo
+from .collections import CollectionsRepo, row_to_summary, summaries_select
 
 
 class SoloModeRepo(Repo):
-    async def list_user_collections(self, user_owner_id: int) -> list[Collection]:
-        res = await self.session.execute(
-            select(Collection)
-            .where(Collection.owner_id == user_owner_id)
-            .order_by(Collection.created_at)
+    async def list_user_collections(
+        self, user_owner_id: int
+    ) -> list[CollectionSummary]:
+        res = await self.session.execute(summaries_select(user_owner_id))
+        return [row_to_summary(row) for row in res.all()]
+
+    async def list_user_collections_page(
+        self, user_owner_id: int, page: int, per_page: int
+    ) -> CollectionsPage:
+        return await CollectionsRepo(self.session).list_page_by_user(
+            user_owner_id, page, per_page
         )
-        return list(res.scalars().all())
 
     async def get_collection_title_by_id(self, collection_id: int) -> Optional[str]:
         res = await self.session.execute(
@@ -68,3 +79,26 @@ class SoloModeRepo(Repo):
         for row in res.all():
             out[int(row[0])] = (row[1], row[2])
         return out
+
+    async def get_collection_deck(
+        self, collection_id: int
+    ) -> Optional[Tuple[str, Dict[int, Tuple[str, str]]]]:
+        res = await self.session.execute(
+            select(
+                Collection.title,
+                CollectionItem.id,
+                CollectionItem.question,
+                CollectionItem.answer,
+            )
+            .select_from(Collection)
+            .outerjoin(CollectionItem, CollectionItem.collection_id == Collection.id)
+            .where(Collection.id == collection_id)
+        )
+        rows = res.all()
+        if not rows:
+            return None
+        items: Dict[int, Tuple[str, str]] = {}
+        for row in rows:
+            if row[1] is not None:
+                items[int(row[1])] = (row[2], row[3])
+        return (rows[0][0] or "Без названия"), items
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Dict, Iterable, Mapping, Optional
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import lazyload
 
 from app.models.user import User
 
@@ -12,7 +15,9 @@ from .base import Repo
 class UsersRepo(Repo):
     async def get_by_tg_id(self, tg_id: int) -> Optional[User]:
         return (
-            await self.session.execute(select(User).where(User.tg_id == tg_id))
+            await self.session.execute(
+                select(User).where(User.tg_id == tg_id).options(lazyload("*"))
+            )
         ).scalar_one_or_none()
 
     async def get_or_create(self, tg_id: int, username: str | None) -> User:
@@ -23,3 +28,44 @@ class UsersRepo(Repo):
         self.session.add(u)
         await self.session.commit()
         return u
+
+    async def get_many_by_tg_ids(self, tg_ids: Iterable[int]) -> Dict[int, User]:
+        ids = list({int(x) for x in tg_ids})
+        if not ids:
+            return {}
+        res = await self.session.execute(
+            select(User).where(User.tg_id.in_(ids)).options(lazyload("*"))
+        )
+        return {int(u.tg_id): u for u in res.scalars().all()}
+
+    def _insert_skipping_existing(self, rows: list[dict]):
+        dialect = self.session.bind.dialect.name
+        if dialect == "postgresql":
+            return (
+                pg_insert(User)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["tg_id"])
+            )
+        if dialect == "sqlite":
+            return (
+                sqlite_insert(User)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["tg_id"])
+            )
+        return insert(User).values(rows)
+
+    async def get_or_create_many(
+        self, users: Mapping[int, str | None]
+    ) -> Dict[int, User]:
+        found = await self.get_many_by_tg_ids(users.keys())
+        missing = [
+            {"tg_id": int(tg_id), "username": username}
+            for tg_id, username in users.items()
+            if int(tg_id) not in found
+        ]
+        if not missing:
+            return found
+
+        await self.session.execute(self._insert_skipping_existing(missing))
+        await self.session.commit()
+        return await self.get_many_by_tg_ids(users.keys())
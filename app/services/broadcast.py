@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from aiogram.exceptions import TelegramRetryAfter
+
+log = logging.getLogger(__name__)
+
+TELEGRAM_GLOBAL_RATE = 25.0
+TELEGRAM_PER_CHAT_RATE = 1.0
+TELEGRAM_PER_CHAT_BURST = 3
+
+
+@dataclass(slots=True)
+class TokenBucket:
+    rate: float
+    capacity: float
+    tokens: float = -1.0
+    updated_at: float = 0.0
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.tokens < 0:
+            self.tokens = float(self.capacity)
+        if not self.updated_at:
+            self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(float(self.capacity), self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def penalize(self, seconds: float) -> None:
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+
+@dataclass(slots=True)
+class Delivery:
+    chat_id: int
+    result: Any = None
+    delivered_at: Optional[float] = None
+    attempts: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def message_id(self) -> Optional[int]:
+        return getattr(self.result, "message_id", None)
+
+
+@dataclass(slots=True)
+class Broadcaster:
+    global_rate: float = TELEGRAM_GLOBAL_RATE
+    per_chat_rate: float = TELEGRAM_PER_CHAT_RATE
+    per_chat_burst: int = TELEGRAM_PER_CHAT_BURST
+    max_retries: int = 3
+    max_retry_after: float = 30.0
+    _global: TokenBucket = field(init=False, repr=False)
+    _chats: Dict[int, TokenBucket] = field(default_factory=dict, init=False)
+
+    def __post_init__(self) -> None:
+        self._global = TokenBucket(
+            rate=self.global_rate, capacity=max(1.0, self.global_rate)
+        )
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 10_000:
+                self._prune()
+            bucket = TokenBucket(rate=self.per_chat_rate, capacity=self.per_chat_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _prune(self) -> None:
+        idle = time.monotonic() - self.per_chat_burst / max(self.per_chat_rate, 1e-6)
+        for chat_id in [c for c, b in self._chats.items() if b.updated_at < idle]:
+            self._chats.pop(chat_id, None)
+
+    async def deliver(
+        self, chat_id: int, call: Callable[[], Awaitable[Any]]
+    ) -> Delivery:
+        delivery = Delivery(chat_id=chat_id)
+        bucket = self._chat_bucket(chat_id)
+
+        while True:
+            await bucket.acquire()
+            await self._global.acquire()
+            delivery.attempts += 1
+            try:
+                delivery.result = await call()
+            except TelegramRetryAfter as e:
+                wait = min(float(e.retry_after), self.max_retry_after)
+                if delivery.attempts > self.max_retries:
+                    delivery.error = f"retry after {e.retry_after}s"
+                    return delivery
+                log.info("broadcast: chat %s flood wait %.1fs", chat_id, wait)
+                bucket.penalize(wait)
+                await asyncio.sleep(wait)
+                continue
+            except Exception as e:
+                log.debug("broadcast: chat %s failed: %s", chat_id, e)
+                delivery.error = str(e) or e.__class__.__name__
+                return delivery
+
+            delivery.delivered_at = time.time()
+            return delivery
+
+    async def broadcast(
+        self, calls: Mapping[int, Callable[[], Awaitable[Any]]]
+    ) -> Dict[int, Delivery]:
+        chat_ids = list(calls)
+        results = await asyncio.gather(
+            *(self.deliver(chat_id, calls[chat_id]) for chat_id in chat_ids)
+        )
+        return dict(zip(chat_ids, results))
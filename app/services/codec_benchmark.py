@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+from app.models.online_room import OnlineRoom, RoomPlayer
+from app.models.solo_mode import SoloSession
+from app.services.codecs import CODECS, make_codec
+from app.services.solo_mode import SOLO_PAYLOAD_VERSION, session_from_payload
+
+
+def make_session(cards: int) -> dict:
+    order = list(range(1000, 1000 + cards))
+    marks = ("known", "unknown", "skipped", "neutral")
+    sess = SoloSession(
+        user_id=123456789,
+        collection_id=42,
+        order=order,
+        index=cards // 2,
+        started_at="2025-01-01T00:00:00+00:00",
+        seed=987654321,
+        stats={str(i): marks[i % 4] for i in order[: cards // 2]},
+        per_item_sec={str(i): i % 17 for i in order[: cards // 2]},
+        hints={str(i): ["Начинается на «П»"] for i in order[:3]},
+        total_sec=321,
+        last_ts=1735689600.25,
+    )
+    return {
+        "_v": SOLO_PAYLOAD_VERSION,
+        "user_id": sess.user_id,
+        "collection_id": sess.collection_id,
+        "order": sess.order,
+        "index": sess.index,
+        "showing_answer": sess.showing_answer,
+        "started_at": sess.started_at,
+        "seed": sess.seed,
+        "stats": sess.stats,
+        "per_item_sec": sess.per_item_sec,
+        "hints": sess.hints,
+        "total_sec": sess.total_sec,
+        "last_ts": sess.last_ts,
+    }
+
+
+def make_room(players: int, cards: int = 40) -> dict:
+    room = OnlineRoom(
+        room_id="123456",
+        owner_id=1,
+        collection_id=42,
+        seconds_per_question=30,
+        points_per_correct=5,
+        order=list(range(1000, 1000 + cards)),
+        index=cards // 2,
+        state="running",
+        phase="question",
+        created_at="2025-01-01T00:00:00+00:00",
+        started_at="2025-01-01T00:01:00+00:00",
+        question_deadline_ts=1735689630.5,
+    )
+    for i in range(players):
+        uid = 500000000 + i
+        room.players.append(
+            RoomPlayer(
+                user_id=uid,
+                username=f"player{i}",
+                score=5 * (i % 7),
+                total_answer_time=1.25 * i,
+                display_name=f"Игрок {i}",
+            )
+        )
+        room.last_q_msg_ids[str(uid)] = 1000 + i
+        room.delivered_at[str(uid)] = 1735689600.0 + i / 10
+    return room.to_dict()
+
+
+def timeit(fn: Callable[[], object], runs: int) -> float:
+    samples: List[float] = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return 1e6 * statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Redis blob codec benchmark")
+    parser.add_argument(
+        "--codecs",
+        default=",".join(CODECS),
+        help=f"comma separated, any of: {', '.join(CODECS)}",
+    )
+    parser.add_argument("--cards", type=int, default=40)
+    parser.add_argument("--players", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    blobs = {
+        f"session/{args.cards}": (
+            make_session(args.cards),
+            lambda data: session_from_payload(data, 0),
+        ),
+        f"room/{args.players}": (make_room(args.players), OnlineRoom.from_payload),
+    }
+    print(
+        f"{'codec':<8} {'blob':<12} {'bytes':>6} {'enc,us':>8} {'dec,us':>8} "
+        f"{'load,us':>8}"
+    )
+    for name in [c.strip() for c in args.codecs.split(",") if c.strip()]:
+        codec = make_codec(name)
+        for label, (payload, loader) in blobs.items():
+            raw = codec.encode(payload)
+            enc = timeit(lambda: codec.encode(payload), args.runs)
+            dec = timeit(lambda: codec.decode(raw), args.runs)
+            load = timeit(lambda: loader(codec.decode(raw)), args.runs)
+            print(
+                f"{name:<8} {label:<12} {len(raw):>6} {enc:>8.1f} {dec:>8.1f} "
+                f"{load:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Protocol
+
+try:
+    import msgpack
+except Exception:
+    msgpack = None
+
+MSGPACK_V1 = b"\x01"
+
+
+class Codec(Protocol):
+    name: str
+
+    def encode(self, value: Any) -> bytes: ...
+
+    def decode(self, raw: bytes) -> Any: ...
+
+
+def decode_any(raw: bytes | str) -> Any:
+    if isinstance(raw, str):
+        return json.loads(raw)
+    if raw[:1] == MSGPACK_V1:
+        if msgpack is None:
+            raise RuntimeError("msgpack payload found but msgpack is not installed")
+        return msgpack.unpackb(raw[1:], raw=False, strict_map_key=False)
+    return json.loads(raw.decode("utf-8"))
+
+
+class JsonCodec:
+    name = "json"
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
+
+    def decode(self, raw: bytes | str) -> Any:
+        return decode_any(raw)
+
+
+class MsgpackCodec:
+    name = "msgpack"
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        self._packer = msgpack.Packer(use_bin_type=True)
+
+    def encode(self, value: Any) -> bytes:
+        return MSGPACK_V1 + self._packer.pack(value)
+
+    def decode(self, raw: bytes | str) -> Any:
+        return decode_any(raw)
+
+
+CODECS: Dict[str, type] = {"json": JsonCodec, "msgpack": MsgpackCodec}
+
+
+def make_codec(name: str) -> Codec:
+    try:
+        cls = CODECS[name]
+    except KeyError:
+        raise ValueError(f"unknown codec {name!r}, expected one of {sorted(CODECS)}")
+    return cls()
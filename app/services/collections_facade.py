@@ -1,26 +1,28 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Optional
 
-from app.models.collection import Collection
+from app.models.collection import CollectionsPage
 from app.models.user import User
 from app.repos.base import with_repos
 
 
 @dataclass
-class UserCollections:
+class UserCollectionsPage:
     user: User
-    collections: List[Collection]
+    page: CollectionsPage
 
 
-async def get_user_and_collections(
+async def get_user_collections_page(
     async_session_maker,
     tg_user_id: int,
     tg_username: Optional[str],
-) -> UserCollections:
+    page: int,
+    per_page: int,
+) -> UserCollectionsPage:
     async with with_repos(async_session_maker) as (_, users, cols, _items):
         user = await users.get_or_create(tg_user_id, tg_username)
-        collections = await cols.list_by_user(user.id)
+        collections_page = await cols.list_page_by_user(user.id, page, per_page)
 
-    return UserCollections(user=user, collections=collections)
+    return UserCollectionsPage(user=user, page=collections_page)
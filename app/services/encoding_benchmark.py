@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import argparse
+import io
+import random
+import statistics
+import time
+from typing import Callable, List
+
+from app.services.encoding_detect import detect_encoding, read_sample
+from app.services.importers import parse_items_file
+
+WORDS = (
+    "столица государство река гора город море остров язык война мир "
+    "учёный писатель химия физика формула закон число площадь год век "
+    "Россия Москва Волга Пушкин Толстой Менделеев Евгений Онегин"
+).split()
+
+LEGACY_ENCODINGS = (
+    "utf-8-sig",
+    "utf-8",
+    "cp1251",
+    "windows-1251",
+    "iso-8859-5",
+    "koi8-r",
+    "latin-1",
+)
+
+
+def make_csv(size_mb: float, seed: int = 7) -> str:
+    rnd = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    lines = ["question,answer"]
+    size = 0
+    i = 0
+    while size < target:
+        q = " ".join(rnd.choices(WORDS, k=8))
+        a = " ".join(rnd.choices(WORDS, k=4))
+        line = f'"Вопрос {i}: {q}?","{a}"'
+        lines.append(line)
+        size += len(line) * 2
+        i += 1
+    return "\n".join(lines) + "\n"
+
+
+def legacy_decode(data: bytes) -> tuple[str, str]:
+    for enc in LEGACY_ENCODINGS:
+        try:
+            return enc, data.decode(enc)
+        except Exception:
+            continue
+    return "utf-8", data.decode("utf-8", errors="replace")
+
+
+def timeit(fn: Callable[[], object], runs: int) -> float:
+    samples: List[float] = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return 1e3 * statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import encoding detection benchmark")
+    parser.add_argument(
+        "--encodings",
+        default="utf-8,cp1251,koi8-r,iso-8859-5",
+        help="comma separated code pages to encode the sample CSV with",
+    )
+    parser.add_argument("--size-mb", type=float, default=8.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    text = make_csv(args.size_mb)
+    print(
+        f"{'encoding':<11} {'MB':>6} {'detected':<11} {'legacy':<11} {'detect,ms':>9} "
+        f"{'legacy,ms/MB':>12} {'decode,ms/MB':>12} {'parse,ms/MB':>11}"
+    )
+    for enc in [e.strip() for e in args.encodings.split(",") if e.strip()]:
+        data = text.encode(enc)
+        mb = len(data) / (1024 * 1024)
+        detected = detect_encoding(read_sample(io.BytesIO(data)))
+        legacy_enc, _ = legacy_decode(data)
+        detect = timeit(
+            lambda: detect_encoding(read_sample(io.BytesIO(data))), args.runs
+        )
+        legacy = timeit(lambda: legacy_decode(data), args.runs)
+        decode = timeit(lambda: data.decode(detected), args.runs)
+        parse = timeit(lambda: parse_items_file("bench.csv", data), args.runs)
+        print(
+            f"{enc:<11} {mb:>6.1f} {detected:<11} {legacy_enc:<11} {detect:>9.2f} "
+            f"{legacy / mb:>12.2f} {decode / mb:>12.2f} {parse / mb:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
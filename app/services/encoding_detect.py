@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import codecs
+from collections import Counter
+from functools import lru_cache
+from typing import BinaryIO, Optional, Tuple
+
+SAMPLE_BYTES = 64 * 1024
+MAX_SAMPLE_BYTES = 1024 * 1024
+SCORE_BYTES = 8 * 1024
+
+CYRILLIC_CODEPAGES = ("cp1251", "koi8-r", "iso-8859-5")
+FALLBACK_ENCODING = "latin-1"
+
+_RU_FREQ = {
+    "о": 0.110,
+    "е": 0.085,
+    "а": 0.080,
+    "и": 0.074,
+    "н": 0.067,
+    "т": 0.063,
+    "с": 0.055,
+    "р": 0.047,
+    "в": 0.045,
+    "л": 0.044,
+    "к": 0.035,
+    "м": 0.032,
+    "д": 0.030,
+    "п": 0.028,
+    "у": 0.026,
+    "я": 0.020,
+    "ы": 0.019,
+    "ь": 0.017,
+    "г": 0.017,
+    "з": 0.016,
+    "б": 0.016,
+    "ч": 0.015,
+    "й": 0.012,
+    "х": 0.010,
+    "ж": 0.009,
+    "ш": 0.007,
+    "ю": 0.006,
+    "ц": 0.005,
+    "щ": 0.004,
+    "э": 0.003,
+    "ф": 0.003,
+    "ё": 0.001,
+    "ъ": 0.001,
+}
+_NEUTRAL = set("«»“”„‘’–—№…\xa0")
+_PENALTY = -0.05
+
+_ASCII = bytes(range(0x80))
+_CONTINUATION = bytes(range(0x80, 0xC0))
+
+
+@lru_cache(maxsize=None)
+def _weights(encoding: str) -> Tuple[Optional[float], ...]:
+    table: list[Optional[float]] = []
+    for b in range(0x80, 0x100):
+        try:
+            ch = bytes([b]).decode(encoding)
+        except UnicodeDecodeError:
+            table.append(None)
+            continue
+        freq = _RU_FREQ.get(ch.lower())
+        if freq is not None:
+            table.append(freq)
+        elif ch in _NEUTRAL:
+            table.append(0.0)
+        else:
+            table.append(_PENALTY)
+    return tuple(table)
+
+
+def _is_utf8(sample: bytes) -> bool:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        decoder.decode(sample, final=False)
+    except UnicodeDecodeError:
+        return False
+    pending, _ = decoder.getstate()
+    return not pending or len(sample) >= SAMPLE_BYTES
+
+
+def _score_codepage(encoding: str, high: Counter) -> Optional[float]:
+    weights = _weights(encoding)
+    score = 0.0
+    for b, n in high.items():
+        w = weights[b - 0x80]
+        if w is None:
+            return None
+        score += w * n
+    return score
+
+
+def detect_encoding(sample: bytes) -> str:
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    high_bytes = sample.translate(None, _ASCII)
+    if not high_bytes or _is_utf8(sample):
+        return "utf-8-sig"
+
+    high = Counter(high_bytes[:SCORE_BYTES])
+    best, best_score = FALLBACK_ENCODING, None
+    for enc in CYRILLIC_CODEPAGES:
+        score = _score_codepage(enc, high)
+        if score is not None and (best_score is None or score > best_score):
+            best, best_score = enc, score
+    if best_score is None or best_score <= 0:
+        return FALLBACK_ENCODING
+    return best
+
+
+def read_sample(fh: BinaryIO) -> bytes:
+    sample = fh.read(SAMPLE_BYTES)
+    read = len(sample)
+    while sample.isascii() and read < MAX_SAMPLE_BYTES:
+        chunk = fh.read(SAMPLE_BYTES)
+        if not chunk:
+            break
+        read += len(chunk)
+        sample = chunk.lstrip(_CONTINUATION)
+    return sample
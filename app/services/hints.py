@@ -1,16 +1,147 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
-from typing import List
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
 
 import httpx
 
 from app.config import settings
+from app.models.solo_mode import MAX_HINTS_PER_ITEM
+from app.services.redis_kv import RedisKV
+
+try:
+    import h2  # type: ignore
+except Exception:  # pragma: no cover
+    h2 = None
 
 log = logging.getLogger(__name__)
 
 
-async def _request_hint(question: str, answer: str, prev_hints: List[str]) -> str:
+@dataclass(slots=True)
+class HintClient:
+    client: httpx.AsyncClient
+    endpoint: str
+    semaphore: asyncio.Semaphore
+
+    async def post(self, payload: dict) -> dict:
+        async with self.semaphore:
+            resp = await self.client.post(self.endpoint, json=payload)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=settings.HINT_CONNECT_TIMEOUT_SEC,
+        read=settings.HINT_READ_TIMEOUT_SEC,
+        write=settings.HINT_CONNECT_TIMEOUT_SEC,
+        pool=settings.HINT_READ_TIMEOUT_SEC,
+    )
+
+
+def create_hint_client(
+    endpoint: str = settings.HINT_ENDPOINT,
+    max_connections: int = settings.HINT_POOL_MAX_CONNECTIONS,
+    max_keepalive: int = settings.HINT_POOL_MAX_KEEPALIVE,
+    max_in_flight: int = settings.HINT_MAX_IN_FLIGHT,
+    http2: bool = settings.HINT_HTTP2,
+) -> HintClient:
+    if http2 and h2 is None:
+        log.warning("HINT_HTTP2 is set but 'h2' is not installed, using HTTP/1.1")
+        http2 = False
+
+    client = httpx.AsyncClient(
+        timeout=_timeout(),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+        ),
+        http2=http2,
+    )
+    return HintClient(
+        client=client,
+        endpoint=endpoint,
+        semaphore=asyncio.Semaphore(max(1, max_in_flight)),
+    )
+
+
+@dataclass(slots=True)
+class HintCache:
+    redis_kv: RedisKV
+    ttl_seconds: int = settings.HINT_CACHE_TTL_SEC
+    local_size: int = settings.HINT_CACHE_LOCAL_SIZE
+    _local: "OrderedDict[str, Tuple[float, str]]" = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+
+    def _key(self, question: str, answer: str, index: int) -> str:
+        digest = hashlib.sha256(f"{question}\x1f{answer}".encode("utf-8")).hexdigest()
+        return self.redis_kv._key("hint", digest[:32], index)
+
+    def _local_get(self, key: str) -> Optional[str]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, hint = entry
+        if expires_at < time.monotonic():
+            self._local.pop(key, None)
+            return None
+        self._local.move_to_end(key)
+        return hint
+
+    def _local_set(self, key: str, hint: str) -> None:
+        self._local[key] = (time.monotonic() + self.ttl_seconds, hint)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    async def get(self, question: str, answer: str, index: int) -> Optional[str]:
+        key = self._key(question, answer, index)
+        hint = self._local_get(key)
+        if hint is not None:
+            return hint
+        try:
+            raw = await self.redis_kv.get_json(key)
+        except Exception as e:
+            log.debug("hint cache read failed: %s", e)
+            return None
+        hint = (raw or {}).get("hint") or None
+        if hint:
+            self._local_set(key, hint)
+        return hint
+
+    async def set(self, question: str, answer: str, index: int, hint: str) -> None:
+        key = self._key(question, answer, index)
+        self._local_set(key, hint)
+        try:
+            await self.redis_kv.set_json(key, {"hint": hint}, ex=self.ttl_seconds)
+        except Exception as e:
+            log.debug("hint cache write failed: %s", e)
+
+    async def invalidate(self, question: str, answer: str) -> None:
+        for index in range(MAX_HINTS_PER_ITEM):
+            key = self._key(question, answer, index)
+            self._local.pop(key, None)
+            try:
+                await self.redis_kv.delete(key)
+            except Exception as e:
+                log.debug("hint cache delete failed: %s", e)
+
+
+async def _request_hint(
+    question: str,
+    answer: str,
+    prev_hints: List[str],
+    hint_client: HintClient | None = None,
+) -> str:
     payload = {
         "question": question,
         "answer": answer,
@@ -18,18 +149,37 @@ async def _request_hint(question: str, answer: str, prev_hints: List[str]) -> st
     }
 
     try:
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            resp = await client.post(settings.HINT_ENDPOINT, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
-            hint = (data.get("hint") or "").strip()
-            return hint
+        if hint_client is not None:
+            data = await hint_client.post(payload)
+        else:
+            async with httpx.AsyncClient(timeout=_timeout()) as client:
+                resp = await client.post(settings.HINT_ENDPOINT, json=payload)
+                resp.raise_for_status()
+                data = resp.json()
+        hint = (data.get("hint") or "").strip()
+        return hint
     except Exception as e:
         log.exception("neuralnet request error: %s", e)
         return ""
 
 
 async def generate_hint_async(
-    question: str, answer: str, prev_hints: List[str] | None = None
+    question: str,
+    answer: str,
+    prev_hints: List[str] | None = None,
+    hint_client: HintClient | None = None,
+    hint_cache: HintCache | None = None,
 ) -> str:
-    return await _request_hint(question, answer, prev_hints or [])
+    prev_hints = prev_hints or []
+    if hint_cache is None:
+        return await _request_hint(question, answer, prev_hints, hint_client)
+
+    index = len(prev_hints)
+    cached = await hint_cache.get(question, answer, index)
+    if cached:
+        return cached
+
+    hint = await _request_hint(question, answer, prev_hints, hint_client)
+    if hint:
+        await hint_cache.set(question, answer, index, hint)
+    return hint
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.services import importers
+from app.services.importers import ImportSource
+
+log = logging.getLogger(__name__)
+
+PARSERS: Dict[str, Callable[..., Any]] = {
+    "items": importers.parse_items_file,
+    "collections": importers.parse_collections_file,
+}
+
+
+@dataclass(slots=True)
+class ImportJob:
+    job_id: int
+    kind: str
+    file_name: str
+    size: int
+    state: str = "queued"  # queued | running | done | failed
+    ahead: int = 0
+    queued_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+
+ProgressCallback = Callable[[ImportJob], Awaitable[None]]
+
+SPOOL_MAX_BYTES = 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class SpooledUpload:
+    def __init__(self, suffix: str = "", max_memory: int = SPOOL_MAX_BYTES) -> None:
+        self.suffix = suffix
+        self.max_memory = max_memory
+        self.size = 0
+        self._buf = bytearray()
+        self._file: Any = None
+
+    @property
+    def rolled(self) -> bool:
+        return self._file is not None
+
+    def write(self, chunk: bytes) -> int:
+        self.size += len(chunk)
+        if self._file is None and len(self._buf) + len(chunk) > self.max_memory:
+            self._file = tempfile.NamedTemporaryFile(
+                prefix="import-", suffix=self.suffix, delete=False
+            )
+            self._file.write(self._buf)
+            self._buf = bytearray()
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buf += chunk
+        return len(chunk)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    @property
+    def source(self) -> ImportSource:
+        if self._file is None:
+            return bytes(self._buf)
+        self._file.flush()
+        return self._file.name
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.unlink(self._file.name)
+            except OSError:
+                pass
+            self._file = None
+        self._buf = bytearray()
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class ImportQueueFull(Exception):
+    pass
+
+
+class ImportJobs:
+    def __init__(self, max_workers: int = 2, max_pending: int = 16) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(max(1, max_workers))
+        self._ids = itertools.count(1)
+        self._waiting = 0
+        self._running = 0
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            if self.max_workers > 0:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor
+
+    def _discard_pool(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _report(self, job: ImportJob, progress: Optional[ProgressCallback]):
+        if progress is None:
+            return
+        try:
+            await progress(job)
+        except Exception as e:
+            log.warning("import job %d: progress callback failed: %s", job.job_id, e)
+
+    async def run(
+        self,
+        kind: str,
+        file_name: str,
+        source: ImportSource,
+        progress: Optional[ProgressCallback] = None,
+        limit: Optional[int] = None,
+        **options: Any,
+    ) -> Any:
+        parser = PARSERS[kind]
+        if self._waiting >= self.max_pending:
+            raise ImportQueueFull("Слишком много импортов в очереди, попробуйте позже.")
+
+        job = ImportJob(
+            job_id=next(self._ids),
+            kind=kind,
+            file_name=file_name,
+            size=(
+                len(source)
+                if isinstance(source, (bytes, bytearray))
+                else os.path.getsize(source)
+            ),
+            ahead=self._waiting,
+            queued_at=time.monotonic(),
+        )
+        self._waiting += 1
+        waiting = True
+        try:
+            if self._slots.locked():
+                await self._report(job, progress)
+            async with self._slots:
+                self._waiting -= 1
+                waiting = False
+                self._running += 1
+                try:
+                    job.state = "running"
+                    job.started_at = time.monotonic()
+                    await self._report(job, progress)
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(
+                        self._pool(),
+                        partial(parser, file_name, source, None, limit, **options),
+                    )
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        log.warning("import job %d: worker pool broke", job.job_id)
+                        self._discard_pool()
+                    job.state = "failed"
+                    job.error = str(e)
+                    raise
+                else:
+                    job.state = "done"
+                    return result
+                finally:
+                    self._running -= 1
+                    job.finished_at = time.monotonic()
+                    log.info(
+                        "import job %d: %s %s (%d bytes) %s in %.2fs",
+                        job.job_id,
+                        kind,
+                        file_name,
+                        job.size,
+                        job.state,
+                        job.elapsed,
+                    )
+                    await self._report(job, progress)
+        finally:
+            if waiting:
+                self._waiting -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
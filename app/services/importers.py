@@ -1,55 +1,90 @@
 from __future__ import annotations
 
 import csv
+import html
 import io
+import itertools
+import json
+import os
+import pathlib
+import re
+import sqlite3
+import tempfile
+import zipfile
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import (
+    AbstractSet,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from app.services.encoding_detect import detect_encoding, read_sample
 
 try:
     from openpyxl import load_workbook  # type: ignore
 except Exception:
     load_workbook = None  # type: ignore
 
+try:
+    import zstandard  # type: ignore
+except Exception:
+    zstandard = None  # type: ignore
+
+
+ImportSource = Union[bytes, str, "os.PathLike[str]"]
+
+CANONICAL_HEADERS = ["title", "question", "answer"]
+
+ANKI_MEMBERS = ("collection.anki21", "collection.anki21b", "collection.anki2")
+ANKI_COPY_CHUNK = 1024 * 1024
+ANKI_MMAP_BYTES = 256 * 1024 * 1024
+ANKI_MAX_DB_BYTES = 256 * 1024 * 1024
+
 
 def parse_items_file(
     file_name: str,
-    file_bytes: bytes,
+    source: ImportSource,
     mime_type: Optional[str] = None,
+    limit: Optional[int] = None,
+    skip: Optional[AbstractSet[str]] = None,
 ) -> List[Tuple[str, str]]:
-    kind = _detect_kind(file_name, mime_type, file_bytes)
+    seen: set[str] = set()
+    pairs: List[Tuple[str, str]] = []
 
-    if kind == "xlsx":
-        rows = _read_xlsx(file_bytes)
-    else:
-        rows = _read_csv(file_bytes)
+    with _open_rows(file_name, source, mime_type) as rows:
+        header_map = _build_header_map(rows.headers)
 
-    header_map = _build_header_map(rows.headers)
+        q_key = header_map.get("question")
+        a_key = header_map.get("answer")
 
-    q_key = header_map.get("question")
-    a_key = header_map.get("answer")
+        if not q_key or not a_key:
+            raise ValueError(
+                "Ожидались колонки 'question' и 'answer' (или их синонимы). Найдены: "
+                + ", ".join(rows.headers)
+            )
 
-    if not q_key or not a_key:
-        raise ValueError(
-            "Ожидались колонки 'question' и 'answer' (или их синонимы). Найдены: "
-            + ", ".join(rows.headers)
-        )
+        for q, a in rows.iter_records((q_key, a_key)):
+            dedup_key = _dedup_key(q)
+            if dedup_key in seen:
+                continue
+            seen.add(dedup_key)
+            if skip is not None and q in skip:
+                continue
+            if limit is not None and len(pairs) >= limit:
+                break
+            pairs.append((q, a))
 
-    seen: set[str] = set()
-    pairs: List[Tuple[str, str]] = []
-    for row in rows.iter_dicts():
-        q_raw = (row.get(q_key) or "").strip()
-        a_raw = (row.get(a_key) or "").strip()
-        if not q_raw or not a_raw:
-            continue
-        q = _normalize_text(q_raw)
-        a = _normalize_text(a_raw)
-        dedup_key = _dedup_key(q)
-        if dedup_key in seen:
-            continue
-        seen.add(dedup_key)
-        pairs.append((q, a))
-
-    if not pairs:
+    if not seen:
         raise ValueError("Файл прочитан, но валидных пар 'вопрос-ответ' не найдено.")
 
     return pairs
@@ -57,47 +92,37 @@ def parse_items_file(
 
 def parse_collections_file(
     file_name: str,
-    file_bytes: bytes,
+    source: ImportSource,
     mime_type: Optional[str] = None,
+    limit: Optional[int] = None,
 ) -> Dict[str, List[Tuple[str, str]]]:
-    kind = _detect_kind(file_name, mime_type, file_bytes)
-
-    if kind == "xlsx":
-        rows = _read_xlsx(file_bytes)
-    else:
-        rows = _read_csv(file_bytes)
-
-    header_map = _build_header_map(rows.headers)
-
-    t_key = header_map.get("title")
-    q_key = header_map.get("question")
-    a_key = header_map.get("answer")
-    if not t_key or not q_key or not a_key:
-        raise ValueError(
-            "Ожидались колонки 'title', 'question', 'answer' (или их синонимы). Найдены: "
-            + ", ".join(rows.headers)
-        )
-
     grouped: Dict[str, List[Tuple[str, str]]] = {}
     seen_per_title: Dict[str, set[str]] = {}
 
-    for row in rows.iter_dicts():
-        t_raw = (row.get(t_key) or "").strip()
-        q_raw = (row.get(q_key) or "").strip()
-        a_raw = (row.get(a_key) or "").strip()
-        if not t_raw or not q_raw or not a_raw:
-            continue
-        title = _normalize_text(t_raw)
-        q = _normalize_text(q_raw)
-        a = _normalize_text(a_raw)
-
-        dd = _dedup_key(q)
-        seen = seen_per_title.setdefault(title, set())
-        if dd in seen:
-            continue
-        seen.add(dd)
-        grouped.setdefault(title, []).append((q, a))
+    with _open_rows(file_name, source, mime_type) as rows:
+        header_map = _build_header_map(rows.headers)
+
+        t_key = header_map.get("title")
+        q_key = header_map.get("question")
+        a_key = header_map.get("answer")
+        if not t_key or not q_key or not a_key:
+            raise ValueError(
+                "Ожидались колонки 'title', 'question', 'answer' (или их синонимы). Найдены: "
+                + ", ".join(rows.headers)
+            )
 
+        for title, q, a in rows.iter_records((t_key, q_key, a_key)):
+            pairs = grouped.setdefault(title, [])
+            if limit is not None and len(pairs) >= limit:
+                continue
+            dd = _dedup_key(q)
+            seen = seen_per_title.setdefault(title, set())
+            if dd in seen:
+                continue
+            seen.add(dd)
+            pairs.append((q, a))
+
+    grouped = {title: pairs for title, pairs in grouped.items() if pairs}
     if not grouped:
         raise ValueError("Файл прочитан, но коллекции не обнаружены.")
 
@@ -105,18 +130,50 @@ def parse_collections_file(
 
 
 @dataclass(slots=True)
-class _RowSet:
+class _RowStream:
     headers: List[str]
-    rows: List[List[str]]
+    rows: Iterator[List[str]]
+    closer: Optional[Callable[[], None]] = None
 
-    def iter_dicts(self) -> Iterable[Dict[str, str]]:
-        idx = {i: h for i, h in enumerate(self.headers)}
+    def iter_records(self, keys: Sequence[str]) -> Iterator[Tuple[str, ...]]:
+        pos = {h: i for i, h in enumerate(self.headers)}
+        idx = [pos[k] for k in keys]
         for r in self.rows:
-            d: Dict[str, str] = {}
-            for i, v in enumerate(r[: len(self.headers)]):
+            values = tuple(_normalize_text(r[i]) if i < len(r) else "" for i in idx)
+            if all(values):
+                yield values
+
+    def close(self) -> None:
+        if self.closer is not None:
+            self.closer()
+
+
+@contextmanager
+def _open_rows(
+    file_name: str, source: ImportSource, mime_type: Optional[str]
+) -> Iterator[_RowStream]:
+    with _open_source(source) as fh:
+        sample = read_sample(fh)
+        fh.seek(0)
+        encoding = detect_encoding(sample)
+        kind = _detect_kind(file_name, mime_type, sample, encoding)
+        title = _title_from_name(file_name)
+        if kind == "xlsx":
+            rows = _read_xlsx(fh)
+        elif kind == "apkg":
+            rows = _read_apkg(fh, title)
+        else:
+            rows = _read_csv(fh, encoding, title, _is_text_export(file_name))
+        try:
+            yield rows
+        finally:
+            rows.close()
+
 
-                d[idx[i]] = v if isinstance(v, str) else ("" if v is None else str(v))
-            yield d
+def _open_source(source: ImportSource) -> BinaryIO:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return open(source, "rb")
 
 
 def _build_header_map(headers: Iterable[str]) -> Dict[str, str]:
@@ -143,8 +200,15 @@ def _dedup_key(s: str) -> str:
     return _normalize_text(s).lower()
 
 
-def _detect_kind(file_name: str, mime_type: Optional[str], file_bytes: bytes) -> str:
+def _detect_kind(
+    file_name: str,
+    mime_type: Optional[str],
+    head: bytes,
+    encoding: Optional[str] = None,
+) -> str:
     name = (file_name or "").lower()
+    if name.endswith((".apkg", ".colpkg")):
+        return "apkg"
     if name.endswith(".xlsx") or (
         mime_type
         and mime_type
@@ -156,7 +220,7 @@ def _detect_kind(file_name: str, mime_type: Optional[str], file_bytes: bytes) ->
             )
         return "xlsx"
 
-    txt = _safe_peek_text(file_bytes, limit=2048)
+    txt = _safe_peek_text(head, limit=2048, encoding=encoding)
     if "," in txt or ";" in txt or "\t" in txt or "question" in txt.lower():
         return "csv"
     if name.endswith(".csv"):
@@ -165,18 +229,15 @@ def _detect_kind(file_name: str, mime_type: Optional[str], file_bytes: bytes) ->
     return "csv"
 
 
-def _safe_peek_text(data: bytes, limit: int = 1024) -> str:
-    return _decode_bytes(data[:limit])
-
+def _safe_peek_text(
+    data: bytes, limit: int = 1024, encoding: Optional[str] = None
+) -> str:
+    return _decode_bytes(data[:limit], encoding)
 
-def _read_csv(file_bytes: bytes) -> _RowSet:
-    text = _decode_bytes(file_bytes)
 
+def _sniff_dialect(sample: str) -> Type[csv.Dialect] | csv.Dialect:
     try:
-        sniffer = csv.Sniffer()
-        dialect = sniffer.sniff(
-            text.splitlines()[0] if text.splitlines() else text, delimiters=",;\t"
-        )
+        return csv.Sniffer().sniff(sample, delimiters=",;\t")
     except Exception:
 
         class _D(csv.Dialect):
@@ -187,61 +248,197 @@ def _read_csv(file_bytes: bytes) -> _RowSet:
             lineterminator = "\n"
             quoting = csv.QUOTE_MINIMAL
 
-        dialect = _D()
-    reader = csv.reader(io.StringIO(text), dialect)
-    rows: List[List[str]] = [
-        list(r) for r in reader if any((c or "").strip() for c in r)
-    ]
-    if not rows:
-        return _RowSet(headers=[], rows=[])
-    headers = [h.strip() for h in rows[0]]
-    data = rows[1:]
-
-    norm_rows: List[List[str]] = []
-    for r in data:
-        if len(r) < len(headers):
-            r = r + ["" for _ in range(len(headers) - len(r))]
-        norm_rows.append(r[: len(headers)])
-    return _RowSet(headers=headers, rows=norm_rows)
-
-
-def _read_xlsx(file_bytes: bytes) -> _RowSet:
+        return _D()
+
+
+def _title_from_name(file_name: str) -> str:
+    stem = os.path.splitext(os.path.basename(file_name or ""))[0]
+    return _normalize_text(stem) or "Импорт"
+
+
+def _is_text_export(file_name: str) -> bool:
+    return (file_name or "").lower().endswith(".txt")
+
+
+def _is_quizlet_line(line: str) -> bool:
+    if "\t" not in line:
+        return False
+    header_map = _build_header_map(line.rstrip("\r\n").split("\t"))
+    return "question" not in header_map or "answer" not in header_map
+
+
+def _read_csv(
+    fh: BinaryIO, encoding: str, title: str, allow_quizlet: bool = False
+) -> _RowStream:
+    text = io.TextIOWrapper(fh, encoding=encoding, errors="replace", newline="")
+    first = text.readline()
+    while first and not first.strip():
+        first = text.readline()
+    if allow_quizlet and _is_quizlet_line(first):
+        return _read_quizlet(text, first, title)
+
+    reader = csv.reader(itertools.chain([first], text), _sniff_dialect(first))
+
+    headers: List[str] = []
+    for r in reader:
+        if any((c or "").strip() for c in r):
+            headers = [h.strip() for h in r]
+            break
+
+    rows = (r for r in reader if any((c or "").strip() for c in r))
+    return _RowStream(headers=headers, rows=rows, closer=text.detach)
+
+
+def _read_quizlet(text: io.TextIOWrapper, first: str, title: str) -> _RowStream:
+    def rows() -> Iterator[List[str]]:
+        for line in itertools.chain([first], text):
+            term, sep, definition = line.rstrip("\r\n").partition("\t")
+            if sep:
+                yield [title, term, definition]
+
+    return _RowStream(headers=list(CANONICAL_HEADERS), rows=rows(), closer=text.detach)
+
+
+def _read_apkg(fh: BinaryIO, title: str) -> _RowStream:
+    try:
+        archive = zipfile.ZipFile(fh)
+    except zipfile.BadZipFile:
+        raise ValueError("Файл .apkg повреждён или не является колодой Anki.")
+
+    names = set(archive.namelist())
+    member = next((m for m in ANKI_MEMBERS if m in names), None)
+    if member is None:
+        raise ValueError("В архиве нет базы карточек Anki (collection.anki2).")
+    compressed = member.endswith("b")
+    if archive.getinfo(member).file_size > ANKI_MAX_DB_BYTES:
+        raise ValueError(_anki_too_large())
+    if compressed and zstandard is None:
+        raise ValueError(
+            "Колода сохранена в новом формате Anki. Экспортируйте её с опцией "
+            "«Поддержка старых версий Anki» или установите 'zstandard'."
+        )
+
+    tmp = tempfile.NamedTemporaryFile(prefix="anki-", suffix=".db", delete=False)
+    conn: Optional[sqlite3.Connection] = None
+
+    def close() -> None:
+        if conn is not None:
+            conn.close()
+        try:
+            os.unlink(tmp.name)
+        except OSError:
+            pass
+
+    try:
+        with tmp, archive.open(member) as src:
+            reader = (
+                zstandard.ZstdDecompressor().stream_reader(src) if compressed else src
+            )
+            _copy_capped(reader, tmp, ANKI_MAX_DB_BYTES)
+        uri = pathlib.Path(tmp.name).as_uri() + "?mode=ro&immutable=1"
+        conn = sqlite3.connect(uri, uri=True)
+        conn.execute(f"PRAGMA mmap_size={ANKI_MMAP_BYTES}")
+        decks = _anki_decks(conn)
+        cur = conn.execute(
+            "SELECT n.flds, c.did FROM notes n LEFT JOIN "
+            "(SELECT nid, MIN(did) AS did FROM cards GROUP BY nid) c ON c.nid = n.id "
+            "ORDER BY n.id"
+        )
+    except sqlite3.DatabaseError as e:
+        close()
+        raise ValueError(f"Не удалось прочитать базу Anki: {e}")
+    except Exception:
+        close()
+        raise
+
+    def rows() -> Iterator[List[str]]:
+        for flds, did in cur:
+            fields = (flds or "").split("\x1f")
+            if len(fields) < 2:
+                continue
+            yield [
+                decks.get(did) or title,
+                _strip_anki_markup(fields[0]),
+                _strip_anki_markup(fields[1]),
+            ]
+
+    return _RowStream(headers=list(CANONICAL_HEADERS), rows=rows(), closer=close)
+
+
+def _anki_too_large() -> str:
+    return (
+        f"База колоды Anki больше {ANKI_MAX_DB_BYTES // (1024 * 1024)} МБ "
+        "после распаковки."
+    )
+
+
+def _copy_capped(src: BinaryIO, dst: BinaryIO, max_bytes: int) -> None:
+    written = 0
+    while True:
+        chunk = src.read(min(ANKI_COPY_CHUNK, max_bytes - written + 1))
+        if not chunk:
+            return
+        written += len(chunk)
+        if written > max_bytes:
+            raise ValueError(_anki_too_large())
+        dst.write(chunk)
+
+
+def _anki_decks(conn: sqlite3.Connection) -> Dict[int, str]:
+    try:
+        row = conn.execute("SELECT decks FROM col").fetchone()
+        data = json.loads(row[0]) if row and row[0] else {}
+        names = {int(k): str(v.get("name") or "") for k, v in data.items()}
+        if names:
+            return names
+    except (sqlite3.Error, ValueError, AttributeError):
+        pass
+    try:
+        return {
+            int(i): str(name).replace("\x1f", "::")
+            for i, name in conn.execute("SELECT id, name FROM decks")
+        }
+    except sqlite3.Error:
+        return {}
+
+
+_ANKI_SOUND = re.compile(r"\[sound:[^\]]*\]")
+_ANKI_CLOZE = re.compile(r"\{\{c\d+::(.*?)(?:::[^}]*)?\}\}")
+_HTML_BREAK = re.compile(r"<\s*(?:br|/div|/p|/li)\b[^>]*>", re.IGNORECASE)
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+
+def _strip_anki_markup(s: str) -> str:
+    if "[" in s:
+        s = _ANKI_SOUND.sub(" ", s)
+    if "{" in s:
+        s = _ANKI_CLOZE.sub(r"\1", s)
+    if "<" in s:
+        s = _HTML_TAG.sub("", _HTML_BREAK.sub(" ", s))
+    return html.unescape(s) if "&" in s else s
+
+
+def _read_xlsx(fh: BinaryIO) -> _RowStream:
     if load_workbook is None:
         raise ValueError(
             "Поддержка .xlsx не установлена (нет openpyxl). Установите 'openpyxl' или пришлите CSV."
         )
-    wb = load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
-    ws = wb.active
-    rows: List[List[str]] = []
-    headers: List[str] = []
-    first = True
-    for row in ws.iter_rows(values_only=True):
-        vals = [
-            (v if isinstance(v, str) else ("" if v is None else str(v))).strip()
-            for v in row
-        ]
-        if first:
-            headers = [v for v in vals]
-            first = False
-            continue
-        if any(v.strip() for v in vals):
-            rows.append(vals[: len(headers)])
-    wb.close()
-    return _RowSet(headers=headers, rows=rows)
-
-
-def _decode_bytes(b: bytes) -> str:
-    for enc in (
-        "utf-8-sig",
-        "utf-8",
-        "cp1251",
-        "windows-1251",
-        "iso-8859-5",
-        "koi8-r",
-        "latin-1",
-    ):
-        try:
-            return b.decode(enc)
-        except Exception:
-            continue
-    return b.decode("utf-8", errors="replace")
+    wb = load_workbook(fh, read_only=True, data_only=True)
+    it = wb.active.iter_rows(values_only=True)
+    headers = [_cell_text(v) for v in next(it, ())]
+
+    def rows() -> Iterator[List[str]]:
+        for row in it:
+            vals = [_cell_text(v) for v in row]
+            if any(vals):
+                yield vals[: len(headers)]
+
+    return _RowStream(headers=headers, rows=rows(), closer=wb.close)
+
+
+def _cell_text(v: object) -> str:
+    return (v if isinstance(v, str) else ("" if v is None else str(v))).strip()
+
+
+def _decode_bytes(b: bytes, encoding: Optional[str] = None) -> str:
+    return b.decode(encoding or detect_encoding(b), errors="replace")
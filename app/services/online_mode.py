@@ -3,13 +3,17 @@ from __future__ import annotations
 import asyncio
 import logging
 import time
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from app.keyboards.online_mode import online_room_owner_kb
-from app.models.online_room import OnlineRoom
+from app.models.online_room import OnlineRoom, RoomDeck, RoomPlayer
 from app.repos.base import with_repos
+from app.services.broadcast import Broadcaster
 from app.services.redis_kv import RedisKV
+from app.services.room_state import RoomState
 from app.services.solo_mode import SoloData
 from app.texts.online_mode import (
     fmt_online_answer,
@@ -26,40 +30,35 @@ ONLINE_JOIN_PENDING_VERSION = 1
 ONLINE_SETTINGS_PENDING_VERSION = 1
 
 
-def online_join_pending_key(redis_kv: RedisKV, user_id: int) -> str:
-    return redis_kv._key("online", "join_pending", user_id)
-
-
 async def set_online_join_pending(redis_kv: RedisKV, user_id: int) -> None:
-    key = online_join_pending_key(redis_kv, user_id)
     payload = {
         "version": ONLINE_JOIN_PENDING_VERSION,
         "kind": "online_join",
         "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
     }
-    await redis_kv.set_json(key, payload, ex=redis_kv.ttl_seconds)
+    await redis_kv.set_state(user_id, "online_join", payload, ex=redis_kv.ttl_seconds)
 
 
-async def get_online_join_pending(redis_kv: RedisKV, user_id: int) -> Optional[dict]:
-    key = online_join_pending_key(redis_kv, user_id)
-    data = await redis_kv.get_json(key)
+async def get_online_join_pending(
+    redis_kv: RedisKV, user_id: int, states: Optional[Dict[str, dict]] = None
+) -> Optional[dict]:
+    if states is not None:
+        data = states.get("online_join")
+    else:
+        data = await redis_kv.get_state(user_id, "online_join")
     if not data:
         return None
     if (
         data.get("kind") != "online_join"
         or data.get("version") != ONLINE_JOIN_PENDING_VERSION
     ):
-        await redis_kv.delete(key)
+        await redis_kv.clear_state(user_id, "online_join")
         return None
     return data
 
 
 async def clear_online_join_pending(redis_kv: RedisKV, user_id: int) -> None:
-    await redis_kv.delete(online_join_pending_key(redis_kv, user_id))
-
-
-def online_settings_pending_key(redis_kv: RedisKV, user_id: int) -> str:
-    return redis_kv._key("online", "settings_pending", user_id)
+    await redis_kv.clear_state(user_id, "online_join")
 
 
 async def set_online_settings_pending(
@@ -68,7 +67,6 @@ async def set_online_settings_pending(
     room_id: str,
     field: str,  # "points" | "seconds"
 ) -> None:
-    key = online_settings_pending_key(redis_kv, user_id)
     payload = {
         "version": ONLINE_SETTINGS_PENDING_VERSION,
         "kind": "online_settings",
@@ -76,27 +74,110 @@ async def set_online_settings_pending(
         "field": field,
         "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
     }
-    await redis_kv.set_json(key, payload, ex=redis_kv.ttl_seconds)
+    await redis_kv.set_state(
+        user_id, "online_settings", payload, ex=redis_kv.ttl_seconds
+    )
 
 
 async def get_online_settings_pending(
-    redis_kv: RedisKV, user_id: int
+    redis_kv: RedisKV, user_id: int, states: Optional[Dict[str, dict]] = None
 ) -> Optional[dict]:
-    key = online_settings_pending_key(redis_kv, user_id)
-    data = await redis_kv.get_json(key)
+    if states is not None:
+        data = states.get("online_settings")
+    else:
+        data = await redis_kv.get_state(user_id, "online_settings")
     if not data:
         return None
     if (
         data.get("kind") != "online_settings"
         or data.get("version") != ONLINE_SETTINGS_PENDING_VERSION
     ):
-        await redis_kv.delete(key)
+        await redis_kv.clear_state(user_id, "online_settings")
         return None
     return data
 
 
 async def clear_online_settings_pending(redis_kv: RedisKV, user_id: int) -> None:
-    await redis_kv.delete(online_settings_pending_key(redis_kv, user_id))
+    await redis_kv.clear_state(user_id, "online_settings")
+
+
+ROOM_DECK_LOCAL_SIZE = 256
+
+_room_decks: "OrderedDict[Tuple[str, str], RoomDeck]" = OrderedDict()
+
+
+def _room_deck_id(room: OnlineRoom) -> Tuple[str, str]:
+    return room.room_id, room.game_id
+
+
+def _remember_deck(deck_id: Tuple[str, str], deck: RoomDeck) -> None:
+    _room_decks[deck_id] = deck
+    _room_decks.move_to_end(deck_id)
+    while len(_room_decks) > ROOM_DECK_LOCAL_SIZE:
+        _room_decks.popitem(last=False)
+
+
+async def snapshot_room_deck(
+    async_session_maker, redis_kv: RedisKV, room: OnlineRoom
+) -> RoomDeck:
+    gd = SoloData(async_session_maker)
+    found = await gd.get_collection_deck(room.collection_id)
+    title, items = found or ("Коллекция", {})
+    wanted = set(room.order)
+    deck = RoomDeck(
+        title=title,
+        items={i: qa for i, qa in items.items() if i in wanted},
+    )
+    await redis_kv.set_json(
+        OnlineRoom._deck_key(redis_kv, room.room_id, room.game_id),
+        deck.to_dict(),
+        ex=redis_kv.ttl_seconds,
+    )
+    _remember_deck(_room_deck_id(room), deck)
+    return deck
+
+
+async def get_room_deck(
+    async_session_maker, redis_kv: RedisKV, room: OnlineRoom
+) -> RoomDeck:
+    deck_id = _room_deck_id(room)
+    deck = _room_decks.get(deck_id)
+    if deck is not None:
+        _room_decks.move_to_end(deck_id)
+        return deck
+
+    raw = await redis_kv.get_json(
+        OnlineRoom._deck_key(redis_kv, room.room_id, room.game_id)
+    )
+    if raw:
+        deck = RoomDeck.from_dict(raw)
+        _remember_deck(deck_id, deck)
+        return deck
+
+    return await snapshot_room_deck(async_session_maker, redis_kv, room)
+
+
+async def drop_room_deck(redis_kv: RedisKV, room: OnlineRoom) -> None:
+    _room_decks.pop(_room_deck_id(room), None)
+    await redis_kv.delete(OnlineRoom._deck_key(redis_kv, room.room_id, room.game_id))
+
+
+async def resolve_player_names(
+    async_session_maker, players: Iterable[RoomPlayer]
+) -> None:
+    missing = [p for p in players if not p.display_name]
+    if not missing:
+        return
+
+    async with with_repos(async_session_maker) as (_, users, _, _):
+        found = await users.get_or_create_many({p.user_id: p.username for p in missing})
+    for p in missing:
+        u = found.get(p.user_id)
+        p.display_name = (u.username if u else None) or p.username or f"id{p.user_id}"
+
+
+def scoreboard_lines(players: Iterable[RoomPlayer]) -> List[str]:
+    return [f"{i}. {p.name} — {p.score} очков" for i, p in enumerate(players, start=1)]
 
 
 async def update_owner_room_message(
@@ -135,101 +216,173 @@ async def update_owner_room_message(
         log.debug("failed to update owner room message: %s", e)
 
 
+REVEAL_PAUSE_SEC = 1.0
+
+_room_wakeups: Dict[str, asyncio.Event] = {}
+
+
+def wake_room(room_id: str) -> None:
+    event = _room_wakeups.get(room_id)
+    if event is not None:
+        event.set()
+
+
 async def run_room_loop(
     room_id: str,
     async_session_maker,
     redis_kv: RedisKV,
     bot,
+    broadcaster: Optional[Broadcaster] = None,
 ) -> None:
-    gd = SoloData(async_session_maker)
-    ttl = redis_kv.ttl_seconds
+    broadcaster = broadcaster or Broadcaster()
+    event = _room_wakeups.setdefault(room_id, asyncio.Event())
+    try:
+        while True:
+            event.clear()
+            due = await room_tick(
+                room_id, async_session_maker, redis_kv, bot, broadcaster
+            )
+            if due is None:
+                return
+            try:
+                await asyncio.wait_for(event.wait(), max(0.0, due - time.time()))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        _room_wakeups.pop(room_id, None)
 
-    while True:
-        room = await OnlineRoom.load_by_room_id(redis_kv, room_id)
-        if not room or room.state != "running":
-            return
 
-        players = [p for p in room.players if p.user_id != room.owner_id]
+async def room_tick(
+    room_id: str,
+    async_session_maker,
+    redis_kv: RedisKV,
+    bot,
+    broadcaster: Optional[Broadcaster] = None,
+) -> Optional[float]:
+    broadcaster = broadcaster or Broadcaster()
 
-        item_id = room.current_item_id()
-        if item_id is None or not players:
-            await _finish_room(async_session_maker, gd, redis_kv, bot, room)
-            return
+    room = await OnlineRoom.load_by_room_id(redis_kv, room_id)
+    if not room or room.state != "running":
+        return None
 
-        qa = await gd.get_item_qa(item_id)
-        if not qa:
-            room.index += 1
-            room.question_deadline_ts = None
-            room.answered_user_ids = []
-            await room.save(redis_kv, ttl=ttl)
-            continue
+    if room.phase == "question":
+        await _reveal_question(async_session_maker, redis_kv, bot, broadcaster, room)
+        return time.time() + REVEAL_PAUSE_SEC
 
-        question, answer = qa
-        title = await gd.get_collection_title_by_item(item_id) or "Коллекция"
+    return await _open_question(async_session_maker, redis_kv, bot, broadcaster, room)
 
-        q_index = room.index + 1
-        total = room.total_questions
 
-        last_ids: Dict[str, int] = {}
-        now = time.time()
-        room.question_deadline_ts = now + room.seconds_per_question
-        room.answered_user_ids = []
-        await room.save(redis_kv, ttl=ttl)
+async def _open_question(
+    async_session_maker,
+    redis_kv: RedisKV,
+    bot,
+    broadcaster: Broadcaster,
+    room: OnlineRoom,
+) -> Optional[float]:
+    ttl = redis_kv.ttl_seconds
+    state = RoomState(redis_kv, room.room_id)
+    players = [p for p in room.players if p.user_id != room.owner_id]
 
-        for p in players:
-            try:
-                msg = await bot.send_message(
-                    p.user_id,
-                    fmt_online_question(
-                        title=title,
-                        q=question,
-                        idx=q_index,
-                        total=total,
-                        seconds_per_question=room.seconds_per_question,
-                    ),
-                )
-                last_ids[str(p.user_id)] = msg.message_id
-            except Exception:
-                continue
+    item_id = room.current_item_id()
+    if item_id is None or not players:
+        await _finish_room(async_session_maker, redis_kv, bot, room, broadcaster)
+        return None
 
-        room.last_q_msg_ids = last_ids
+    deck = await get_room_deck(async_session_maker, redis_kv, room)
+    qa = deck.items.get(item_id)
+    if not qa:
+        room.index += 1
+        room.question_deadline_ts = None
         await room.save(redis_kv, ttl=ttl)
+        return time.time()
+
+    question_text = fmt_online_question(
+        title=deck.title,
+        q=qa[0],
+        idx=room.index + 1,
+        total=room.total_questions,
+        seconds_per_question=room.seconds_per_question,
+    )
 
-        await asyncio.sleep(room.seconds_per_question)
+    room.phase = "question"
+    room.question_deadline_ts = time.time() + room.seconds_per_question
+    room.last_q_msg_ids = {}
+    room.delivered_at = {}
+    await room.save(redis_kv, ttl=ttl)
+    await state.open_question(
+        room.index,
+        room.question_deadline_ts,
+        room.seconds_per_question,
+        room.points_per_correct,
+    )
 
-        room = await OnlineRoom.load_by_room_id(redis_kv, room_id)
-        if not room or room.state != "running":
-            return
+    sent = await broadcaster.broadcast(
+        {
+            p.user_id: partial(bot.send_message, p.user_id, question_text)
+            for p in players
+        }
+    )
 
-        players = [p for p in room.players if p.user_id != room.owner_id]
+    room = await OnlineRoom.load_by_room_id(redis_kv, room.room_id)
+    if not room or room.state != "running":
+        return None
 
-        for p in players:
-            mid = room.last_q_msg_ids.get(str(p.user_id))
-            if not mid:
-                continue
-            try:
-                await bot.edit_message_text(
-                    fmt_online_answer(
-                        title=title,
-                        q=question,
-                        a=answer,
-                        idx=q_index,
-                        total=total,
-                    ),
+    for uid, d in sent.items():
+        if d.ok and d.message_id is not None:
+            room.last_q_msg_ids[str(uid)] = d.message_id
+            room.delivered_at[str(uid)] = d.delivered_at
+    if room.delivered_at:
+        room.question_deadline_ts = (
+            max(room.delivered_at.values()) + room.seconds_per_question
+        )
+    await room.save(redis_kv, ttl=ttl)
+    if await state.set_delivered(
+        room.index, room.delivered_at, room.question_deadline_ts
+    ):
+        return time.time()
+    return room.question_deadline_ts
+
+
+async def _reveal_question(
+    async_session_maker,
+    redis_kv: RedisKV,
+    bot,
+    broadcaster: Broadcaster,
+    room: OnlineRoom,
+) -> None:
+    await RoomState(redis_kv, room.room_id).close_question()
+
+    item_id = room.current_item_id()
+    deck = await get_room_deck(async_session_maker, redis_kv, room)
+    qa = deck.items.get(item_id) if item_id is not None else None
+    if qa:
+        answer_text = fmt_online_answer(
+            title=deck.title,
+            q=qa[0],
+            a=qa[1],
+            idx=room.index + 1,
+            total=room.total_questions,
+        )
+        await broadcaster.broadcast(
+            {
+                p.user_id: partial(
+                    bot.edit_message_text,
+                    answer_text,
                     chat_id=p.user_id,
-                    message_id=mid,
+                    message_id=room.last_q_msg_ids[str(p.user_id)],
                 )
-            except Exception:
-                continue
-
-        room.index += 1
-        room.question_deadline_ts = None
-        room.answered_user_ids = []
-        await room.save(redis_kv, ttl=ttl)
+                for p in room.players
+                if p.user_id != room.owner_id and str(p.user_id) in room.last_q_msg_ids
+            }
+        )
 
-        await _send_live_scoreboard_to_owner(async_session_maker, redis_kv, bot, room)
+    room = await OnlineRoom.load_by_room_id(redis_kv, room.room_id) or room
+    room.phase = "reveal"
+    room.index += 1
+    room.question_deadline_ts = None
+    await room.save(redis_kv, ttl=redis_kv.ttl_seconds)
 
-        await asyncio.sleep(1)
+    await _send_live_scoreboard_to_owner(async_session_maker, redis_kv, bot, room)
 
 
 async def _send_live_scoreboard_to_owner(
@@ -241,22 +394,15 @@ async def _send_live_scoreboard_to_owner(
     players = [p for p in room.players if p.user_id != room.owner_id]
     if not players:
         return
+    room.apply_scores(await RoomState(redis_kv, room.room_id).scores())
 
-    async with with_repos(async_session_maker) as (_, users, _, _):
-        name_map: dict[int, str] = {}
-        for p in players:
-            u = await users.get_or_create(p.user_id, p.username)
-            name_map[p.user_id] = u.username or p.username or f"id{p.user_id}"
+    await resolve_player_names(async_session_maker, players)
 
     players_sorted = sorted(
         players,
         key=lambda p: (-p.score, p.total_answer_time),
     )
-
-    lines: List[str] = []
-    for i, p in enumerate(players_sorted, start=1):
-        name = name_map.get(p.user_id, p.username or f"id{p.user_id}")
-        lines.append(f"{i}. {name} — {p.score} очков")
+    lines = scoreboard_lines(players_sorted)
 
     text = "📊 Текущий рейтинг игроков:\n\n" + "\n".join(lines)
 
@@ -282,16 +428,19 @@ async def _send_live_scoreboard_to_owner(
 
 async def _finish_room(
     async_session_maker,
-    gd: SoloData,
     redis_kv: RedisKV,
     bot,
     room: OnlineRoom,
+    broadcaster: Optional[Broadcaster] = None,
 ) -> None:
+    broadcaster = broadcaster or Broadcaster()
+    state = RoomState(redis_kv, room.room_id)
+    room.apply_scores(await state.scores())
     room.state = "finished"
     room.finished_at = datetime.now(timezone.utc).isoformat(timespec="seconds") + "Z"
     await room.save(redis_kv, ttl=redis_kv.ttl_seconds)
 
-    title = await gd.get_collection_title_by_id(room.collection_id) or "Коллекция"
+    title = (await get_room_deck(async_session_maker, redis_kv, room)).title
 
     players = [p for p in room.players if p.user_id != room.owner_id]
     sorted_players = sorted(
@@ -300,22 +449,10 @@ async def _finish_room(
     )
     top3 = sorted_players[:3]
 
-    async with with_repos(async_session_maker) as (_, users, _, _):
-        name_map: dict[int, str] = {}
-        for p in players:
-            u = await users.get_or_create(p.user_id, p.username)
-            name_map[p.user_id] = u.username or p.username or f"id{p.user_id}"
-
-    top_lines_data: List[tuple[str, int, float]] = []
-    for p in top3:
-        name = name_map.get(p.user_id, p.username or f"id{p.user_id}")
-        top_lines_data.append((name, p.score, p.total_answer_time))
-    top_lines = format_top_lines(top_lines_data)
-
-    owner_lines: List[str] = []
-    for i, p in enumerate(sorted_players, start=1):
-        name = name_map.get(p.user_id, p.username or f"id{p.user_id}")
-        owner_lines.append(f"{i}. {name} — {p.score} очков")
+    await resolve_player_names(async_session_maker, players)
+
+    top_lines = format_top_lines([(p.name, p.score, p.total_answer_time) for p in top3])
+    owner_lines = scoreboard_lines(sorted_players)
 
     owner_text = fmt_owner_scoreboard(title, owner_lines)
     try:
@@ -323,22 +460,22 @@ async def _finish_room(
     except Exception:
         pass
 
-    for p in sorted_players:
-        place = next(
-            (i + 1 for i, sp in enumerate(sorted_players) if sp.user_id == p.user_id),
-            None,
-        )
-        text = fmt_player_scoreboard(
+    texts = {}
+    for place, p in enumerate(sorted_players, start=1):
+        texts[p.user_id] = fmt_player_scoreboard(
             title=title,
             place=place,
             score=p.score,
             total_answer_time=p.total_answer_time,
             top_lines=top_lines,
         )
-        try:
-            await bot.send_message(p.user_id, text)
-        except Exception:
-            continue
-        await OnlineRoom.clear_user_room(redis_kv, p.user_id)
+    sent = await broadcaster.broadcast(
+        {uid: partial(bot.send_message, uid, text) for uid, text in texts.items()}
+    )
+    for uid, d in sent.items():
+        if d.ok:
+            await OnlineRoom.clear_user_room(redis_kv, uid)
 
+    await state.clear(last_index=room.index)
+    await drop_room_deck(redis_kv, room)
     await redis_kv.delete(OnlineRoom._room_key(redis_kv, room.room_id))
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional
+
+from app.services.redis_kv import RedisKV
+
+
+class ReadCache:
+    def __init__(self, redis_kv: RedisKV) -> None:
+        self.redis_kv = redis_kv
+        self._values: Dict[str, Optional[dict]] = {}
+        self.round_trips = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._values
+
+    async def prefetch(self, keys: Iterable[str]) -> None:
+        missing = [k for k in dict.fromkeys(keys) if k not in self._values]
+        if not missing:
+            return
+        values = await self.redis_kv.mget_json(missing)
+        self.round_trips += 1
+        self._values.update(zip(missing, values))
+
+    async def get_json(self, key: str) -> Optional[dict]:
+        if key not in self._values:
+            await self.prefetch([key])
+        return self._values[key]
+
+    def forget(self, key: str) -> None:
+        self._values.pop(key, None)
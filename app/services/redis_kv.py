@@ -1,32 +1,82 @@
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass
-from typing import Any
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence
 
 from redis.asyncio import Redis
 
+from app.services.codecs import Codec, JsonCodec
+
 
 @dataclass(slots=True)
 class RedisKV:
     client: Redis
     prefix: str
     ttl_seconds: int
+    codec: Codec = field(default_factory=JsonCodec)
+    _scripts: Dict[str, Any] = field(default_factory=dict, init=False, repr=False)
 
     def _key(self, *parts: Any) -> str:
         return ":".join([self.prefix, *map(lambda x: str(x), parts)])
 
+    def script(self, source: str) -> Any:
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = self.client.register_script(source)
+        return script
+
     async def set_json(self, key: str, value: dict, ex: int | None = None) -> None:
-        await self.client.set(
-            key, json.dumps(value, ensure_ascii=False).encode("utf-8"), ex=ex
-        )
+        await self.client.set(key, self.codec.encode(value), ex=ex)
 
     async def get_json(self, key: str) -> dict | None:
         raw = await self.client.get(key)
-        return None if raw is None else json.loads(raw.decode("utf-8"))
+        return None if raw is None else self.codec.decode(raw)
+
+    async def mget_json(self, keys: Sequence[str]) -> List[dict | None]:
+        if not keys:
+            return []
+        raws = await self.client.mget(list(keys))
+        return [None if raw is None else self.codec.decode(raw) for raw in raws]
 
     async def delete(self, key: str) -> None:
         await self.client.delete(key)
 
-    def pending_key(self, user_id: int) -> str:
-        return self._key("pending", user_id)
+    def user_state_key(self, user_id: int) -> str:
+        return self._key("user_state", user_id)
+
+    def _unwrap_state(self, raw: bytes | str | None, now: float) -> dict | None:
+        if raw is None:
+            return None
+        data = self.codec.decode(raw)
+        exp = data.get("exp")
+        if exp is not None and exp <= now:
+            return None
+        return data.get("v")
+
+    async def get_state(self, user_id: int, slot: str) -> dict | None:
+        raw = await self.client.hget(self.user_state_key(user_id), slot)
+        return self._unwrap_state(raw, time.time())
+
+    async def load_states(self, user_id: int) -> Dict[str, dict]:
+        raw = await self.client.hgetall(self.user_state_key(user_id))
+        now = time.time()
+        states: Dict[str, dict] = {}
+        for slot, value in (raw or {}).items():
+            if isinstance(slot, bytes):
+                slot = slot.decode("utf-8")
+            state = self._unwrap_state(value, now)
+            if state is not None:
+                states[slot] = state
+        return states
+
+    async def set_state(
+        self, user_id: int, slot: str, value: dict, ex: int | None = None
+    ) -> None:
+        key = self.user_state_key(user_id)
+        payload = {"v": value, "exp": time.time() + ex if ex else None}
+        await self.client.hset(key, slot, self.codec.encode(payload))
+        await self.client.expire(key, max(int(ex or 0), self.ttl_seconds))
+
+    async def clear_state(self, user_id: int, slot: str) -> None:
+        await self.client.hdel(self.user_state_key(user_id), slot)
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import secrets
+import socket
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.services.redis_kv import RedisKV
+from app.services.timer_wheel import TimerWheel
+
+log = logging.getLogger(__name__)
+
+RoomHandler = Callable[[str], Awaitable[Optional[float]]]
+
+RELEASE_LEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+RENEW_LEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RESCHEDULE_LUA = """
+local due = tonumber(ARGV[2])
+if redis.call('DEL', KEYS[2]) == 1 then
+    due = math.min(due, tonumber(ARGV[3]))
+end
+redis.call('ZADD', KEYS[1], due, ARGV[1])
+return tostring(due)
+"""
+
+
+def _decode(v) -> str:
+    return v.decode("utf-8") if isinstance(v, bytes) else str(v)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(3)}"
+
+
+class RoomScheduler:
+    def __init__(
+        self,
+        redis_kv: RedisKV,
+        handler: RoomHandler,
+        worker_id: Optional[str] = None,
+        lease_sec: float = 30.0,
+        poll_interval_sec: float = 0.5,
+        batch_size: int = 100,
+        max_concurrent: int = 200,
+        retry_delay_sec: float = 2.0,
+        tick_sec: float = 0.05,
+        wheel: Optional[TimerWheel] = None,
+    ) -> None:
+        self.redis_kv = redis_kv
+        self.handler = handler
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_ms = int(lease_sec * 1000)
+        self.poll_interval_sec = poll_interval_sec
+        self.batch_size = batch_size
+        self.retry_delay_sec = retry_delay_sec
+        self.tick_sec = tick_sec
+        self.wheel = wheel or TimerWheel(tick_sec=tick_sec)
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._running: Dict[str, asyncio.Task] = {}
+        self._loop_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._release_script = redis_kv.client.register_script(RELEASE_LEASE_LUA)
+        self._renew_script = redis_kv.client.register_script(RENEW_LEASE_LUA)
+        self._reschedule_script = redis_kv.client.register_script(RESCHEDULE_LUA)
+
+    @property
+    def schedule_key(self) -> str:
+        return self.redis_kv._key("online", "schedule")
+
+    def lease_key(self, room_id: str) -> str:
+        return self.redis_kv._key("online", "lease", room_id)
+
+    def wake_key(self, room_id: str) -> str:
+        return self.redis_kv._key("online", "wake", room_id)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._running)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending_timers": self.wheel.pending,
+            "in_flight": self.in_flight,
+            **self.wheel.pending_by_level(),
+        }
+
+    async def schedule(self, room_id: str, due_ts: Optional[float] = None) -> None:
+        due = time.time() if due_ts is None else due_ts
+        await self.redis_kv.client.zadd(self.schedule_key, {room_id: due})
+        self.wheel.schedule(room_id, due)
+
+    async def wake(self, room_id: str) -> None:
+        now = time.time()
+        await self.redis_kv.client.zadd(
+            self.schedule_key, {room_id: now}, xx=True, lt=True
+        )
+        await self.redis_kv.client.set(self.wake_key(room_id), 1, px=self.lease_ms)
+        if room_id not in self._running:
+            self.wheel.schedule(room_id, now)
+
+    async def _reschedule(self, room_id: str, next_due: float) -> None:
+        due = await self._reschedule_script(
+            keys=[self.schedule_key, self.wake_key(room_id)],
+            args=[room_id, next_due, time.time()],
+        )
+        self.wheel.schedule(room_id, float(_decode(due)))
+
+    async def unschedule(self, room_id: str) -> None:
+        await self.redis_kv.client.zrem(self.schedule_key, room_id)
+        await self.redis_kv.client.delete(self.wake_key(room_id))
+        self.wheel.cancel(room_id)
+
+    async def upcoming_rooms(self, until: float) -> List[Tuple[str, float]]:
+        raw = await self.redis_kv.client.zrangebyscore(
+            self.schedule_key,
+            "-inf",
+            until,
+            start=0,
+            num=self.batch_size,
+            withscores=True,
+        )
+        return [(_decode(member), float(score)) for member, score in raw]
+
+    async def _claim(self, room_id: str) -> bool:
+        ok = await self.redis_kv.client.set(
+            self.lease_key(room_id), self.worker_id, nx=True, px=self.lease_ms
+        )
+        return bool(ok)
+
+    async def _release(self, room_id: str) -> None:
+        await self._release_script(
+            keys=[self.lease_key(room_id)], args=[self.worker_id]
+        )
+
+    async def _renew(self, room_id: str) -> bool:
+        ok = await self._renew_script(
+            keys=[self.lease_key(room_id)], args=[self.worker_id, self.lease_ms]
+        )
+        return bool(int(ok))
+
+    async def _keep_lease(self, room_id: str, task: asyncio.Task) -> bool:
+        interval = self.lease_ms / 3000
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await self._renew(room_id):
+                    continue
+            except Exception as e:
+                log.warning("scheduler: lease renewal for %s failed: %s", room_id, e)
+                continue
+            log.warning("scheduler: lost lease on room %s, aborting tick", room_id)
+            task.cancel()
+            return True
+
+    async def run_room(self, room_id: str) -> None:
+        keeper = asyncio.create_task(self._keep_lease(room_id, asyncio.current_task()))
+        try:
+            async with self._semaphore:
+                await self.redis_kv.client.delete(self.wake_key(room_id))
+                try:
+                    next_due = await self.handler(room_id)
+                except Exception as e:
+                    log.exception("scheduler: room %s tick failed: %s", room_id, e)
+                    next_due = time.time() + self.retry_delay_sec
+
+                if next_due is None:
+                    await self.unschedule(room_id)
+                else:
+                    await self._reschedule(room_id, next_due)
+        except asyncio.CancelledError:
+            if keeper.done() and not keeper.cancelled() and keeper.result():
+                return
+            raise
+        finally:
+            keeper.cancel()
+            await self._release(room_id)
+
+    async def sync(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        loaded = 0
+        for room_id, due in await self.upcoming_rooms(now + 2 * self.poll_interval_sec):
+            if room_id in self._running or self.wheel.due_of(room_id) == due:
+                continue
+            self.wheel.schedule(room_id, due)
+            loaded += 1
+        return loaded
+
+    async def fire(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        started = 0
+        for room_id in self.wheel.advance(now):
+            if room_id in self._running:
+                continue
+            due = await self.redis_kv.client.zscore(self.schedule_key, room_id)
+            if due is None:
+                continue
+            if due > now:
+                self.wheel.schedule(room_id, due)
+                continue
+            if not await self._claim(room_id):
+                continue
+            task = asyncio.create_task(self.run_room(room_id))
+            self._running[room_id] = task
+            task.add_done_callback(lambda _t, rid=room_id: self._running.pop(rid, None))
+            started += 1
+        return started
+
+    async def poll_once(self, now: Optional[float] = None) -> int:
+        await self.sync(now)
+        return await self.fire(now)
+
+    async def _loop(self) -> None:
+        next_sync = 0.0
+        while not self._stopping:
+            now = time.time()
+            try:
+                if now >= next_sync:
+                    await self.sync(now)
+                    next_sync = now + self.poll_interval_sec
+                await self.fire(now)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception("scheduler: tick failed: %s", e)
+            await asyncio.sleep(self.tick_sec)
+
+    def start(self) -> None:
+        if self._loop_task is not None:
+            return
+        self._stopping = False
+        self._loop_task = asyncio.create_task(self._loop())
+        log.info("scheduler: worker %s started", self.worker_id)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
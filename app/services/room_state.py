@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Set, Tuple
+
+from app.services.redis_kv import RedisKV
+
+ANSWER_ACCEPTED = 1
+ANSWER_DUPLICATE = 0
+ANSWER_LATE = -1
+ANSWER_STALE = -2
+
+RECORD_ANSWER_LUA = """
+local q = KEYS[1]
+local uid = ARGV[1]
+local now = tonumber(ARGV[3])
+
+if redis.call('HGET', q, 'index') ~= ARGV[2] then
+    return {-2, '0', 0}
+end
+
+local deadline = tonumber(redis.call('HGET', q, 'deadline'))
+if not deadline or now > deadline then
+    return {-1, '0', 0}
+end
+
+if redis.call('SADD', KEYS[2], uid) == 0 then
+    return {0, '0', 0}
+end
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[5]))
+
+local seconds = tonumber(redis.call('HGET', q, 'seconds')) or 0
+local delivered = redis.call('HGET', q, 'd:' .. uid)
+local started = tonumber(delivered) or (deadline - seconds)
+local dt = now - started
+if dt < 0 then dt = 0 end
+if dt > seconds then dt = seconds end
+
+if ARGV[4] == '1' then
+    local points = tonumber(redis.call('HGET', q, 'points')) or 0
+    redis.call('ZINCRBY', KEYS[3], points, uid)
+else
+    redis.call('ZINCRBY', KEYS[3], 0, uid)
+end
+redis.call('HINCRBYFLOAT', KEYS[4], uid, dt)
+redis.call('EXPIRE', KEYS[3], tonumber(ARGV[5]))
+redis.call('EXPIRE', KEYS[4], tonumber(ARGV[5]))
+
+local all = 0
+if delivered then
+    local answered = redis.call('HINCRBY', q, 'answered_delivered', 1)
+    local expected = tonumber(redis.call('HGET', q, 'expected')) or 0
+    if expected > 0 and answered >= expected then
+        all = 1
+    end
+end
+
+return {1, tostring(dt), all}
+"""
+
+SET_DELIVERED_LUA = """
+local q = KEYS[1]
+redis.call('HSET', q, 'deadline', ARGV[1])
+local expected = 0
+for i = 2, #ARGV, 2 do
+    redis.call('HSET', q, 'd:' .. ARGV[i], ARGV[i + 1])
+    expected = expected + 1
+end
+redis.call('HSET', q, 'expected', expected)
+
+local answered = 0
+for _, uid in ipairs(redis.call('SMEMBERS', KEYS[2])) do
+    if redis.call('HEXISTS', q, 'd:' .. uid) == 1 then
+        answered = answered + 1
+    end
+end
+redis.call('HSET', q, 'answered_delivered', answered)
+
+if expected > 0 and answered >= expected then
+    return 1
+end
+return 0
+"""
+
+
+def _decode(v) -> str:
+    return v.decode("utf-8") if isinstance(v, bytes) else str(v)
+
+
+@dataclass(slots=True)
+class AnswerResult:
+    status: int
+    answer_time: float = 0.0
+    all_answered: bool = False
+
+    @property
+    def accepted(self) -> bool:
+        return self.status == ANSWER_ACCEPTED
+
+
+@dataclass(slots=True)
+class RoomState:
+    redis_kv: RedisKV
+    room_id: str
+
+    @property
+    def question_key(self) -> str:
+        return self.redis_kv._key("online", "room", self.room_id, "question")
+
+    @property
+    def scores_key(self) -> str:
+        return self.redis_kv._key("online", "room", self.room_id, "scores")
+
+    @property
+    def times_key(self) -> str:
+        return self.redis_kv._key("online", "room", self.room_id, "times")
+
+    def answered_key(self, index: int) -> str:
+        return self.redis_kv._key("online", "room", self.room_id, "answered", index)
+
+    @property
+    def _ttl(self) -> int:
+        return self.redis_kv.ttl_seconds
+
+    async def open_question(
+        self,
+        index: int,
+        deadline_ts: float,
+        seconds_per_question: int,
+        points_per_correct: int,
+    ) -> None:
+        client = self.redis_kv.client
+        await client.delete(self.question_key)
+        await client.hset(
+            self.question_key,
+            mapping={
+                "index": index,
+                "deadline": repr(float(deadline_ts)),
+                "seconds": seconds_per_question,
+                "points": points_per_correct,
+            },
+        )
+        await client.expire(self.question_key, self._ttl)
+
+    async def set_delivered(
+        self, index: int, delivered_at: Mapping[str, float], deadline_ts: float
+    ) -> bool:
+        args: list = [repr(float(deadline_ts))]
+        for uid, ts in delivered_at.items():
+            args.extend((uid, repr(float(ts))))
+        all_answered = await self.redis_kv.script(SET_DELIVERED_LUA)(
+            keys=[self.question_key, self.answered_key(index)], args=args
+        )
+        return bool(int(all_answered))
+
+    async def close_question(self) -> None:
+        await self.redis_kv.client.hset(self.question_key, "deadline", "0")
+
+    async def record_answer(
+        self, user_id: int, index: int, correct: bool, now: float
+    ) -> AnswerResult:
+        status, dt, all_answered = await self.redis_kv.script(RECORD_ANSWER_LUA)(
+            keys=[
+                self.question_key,
+                self.answered_key(index),
+                self.scores_key,
+                self.times_key,
+            ],
+            args=[user_id, index, repr(float(now)), int(bool(correct)), self._ttl],
+        )
+        return AnswerResult(
+            status=int(status),
+            answer_time=float(_decode(dt)),
+            all_answered=bool(int(all_answered)),
+        )
+
+    async def answered(self, index: int) -> Set[int]:
+        members = await self.redis_kv.client.smembers(self.answered_key(index))
+        return {int(_decode(m)) for m in members}
+
+    async def scores(self) -> Dict[int, Tuple[int, float]]:
+        client = self.redis_kv.client
+        points = await client.zrange(self.scores_key, 0, -1, withscores=True)
+        times = await client.hgetall(self.times_key)
+        result: Dict[int, Tuple[int, float]] = {}
+        for member, score in points:
+            result[int(_decode(member))] = (int(score), 0.0)
+        for member, value in times.items():
+            uid = int(_decode(member))
+            result[uid] = (result.get(uid, (0, 0.0))[0], float(_decode(value)))
+        return result
+
+    async def clear(self, last_index: Optional[int] = None) -> None:
+        client = self.redis_kv.client
+        keys = [self.question_key, self.scores_key, self.times_key]
+        if last_index is not None:
+            keys.extend(self.answered_key(i) for i in range(last_index + 1))
+        for key in keys:
+            await client.delete(key)
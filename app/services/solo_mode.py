@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import secrets
 import time
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from typing import Dict, Iterable, List, Optional, Tuple
 
-from app.models.collection import Collection
+from app.models.collection import CollectionsPage, CollectionSummary
+from app.models.online_room import RoomDeck
 from app.models.solo_mode import SoloSession
 from app.repos.solo_mode import SoloModeRepo
 from app.services.db import get_session
@@ -22,11 +24,20 @@ class SoloData:
         async with get_session(self._sm) as session:
             yield session
 
-    async def list_user_collections(self, user_owner_id: int) -> list[Collection]:
+    async def list_user_collections(
+        self, user_owner_id: int
+    ) -> list[CollectionSummary]:
         async with self._session() as session:
             repo = SoloModeRepo(session)
             return await repo.list_user_collections(user_owner_id)
 
+    async def list_user_collections_page(
+        self, user_owner_id: int, page: int, per_page: int
+    ) -> CollectionsPage:
+        async with self._session() as session:
+            repo = SoloModeRepo(session)
+            return await repo.list_user_collections_page(user_owner_id, page, per_page)
+
     async def get_collection_title_by_id(self, collection_id: int) -> Optional[str]:
         async with self._session() as session:
             repo = SoloModeRepo(session)
@@ -54,21 +65,91 @@ class SoloData:
             repo = SoloModeRepo(session)
             return await repo.get_items_bulk(item_ids)
 
+    async def get_collection_deck(
+        self, collection_id: int
+    ) -> Optional[Tuple[str, Dict[int, Tuple[str, str]]]]:
+        async with self._session() as session:
+            repo = SoloModeRepo(session)
+            return await repo.get_collection_deck(collection_id)
+
+
+SOLO_PAYLOAD_VERSION = 1
+SOLO_HEAD_FIELDS = ("meta", "index", "showing_answer", "total_sec", "last_ts", "hints")
+
 
 def _session_key(redis_kv: RedisKV, user_id: int) -> str:
-    try:
-        return redis_kv._key("solo", user_id)
-    except AttributeError:
-        return f"solo:{user_id}"
+    return redis_kv._key("solo", user_id, "h")
+
+
+def _legacy_session_key(redis_kv: RedisKV, user_id: int) -> str:
+    return redis_kv._key("solo", user_id)
+
+
+def _as_str(v) -> str:
+    return v.decode("utf-8") if isinstance(v, bytes) else str(v)
+
+
+def session_from_fields(
+    redis_kv: RedisKV, user_id: int, fields: Dict[str, object]
+) -> Optional[SoloSession]:
+    meta_raw = fields.get("meta")
+    if meta_raw is None:
+        return None
+    meta = redis_kv.codec.decode(meta_raw)
+    hints_raw = fields.get("hints")
+    sess = SoloSession(
+        user_id=int(meta.get("user_id", user_id)),
+        collection_id=int(meta["collection_id"]),
+        order=[int(x) for x in meta.get("order", [])],
+        index=int(fields.get("index") or 0),
+        showing_answer=_as_str(fields.get("showing_answer") or "0") == "1",
+        started_at=str(meta.get("started_at") or ""),
+        seed=int(meta.get("seed", 0)),
+        hints=redis_kv.codec.decode(hints_raw) if hints_raw else {},
+        total_sec=int(fields.get("total_sec") or 0),
+        last_ts=float(fields.get("last_ts") or 0.0),
+    )
+    for name, value in fields.items():
+        if name.startswith("stat:"):
+            sess.stats[name[5:]] = _as_str(value)
+        elif name.startswith("sec:"):
+            sess.per_item_sec[name[4:]] = int(value)
+    return sess
 
 
 async def load_solo_session(
     redis_kv: RedisKV,
     user_id: int,
+    full: bool = True,
 ) -> Optional[SoloSession]:
-    raw = await redis_kv.get_json(_session_key(redis_kv, user_id))
+    key = _session_key(redis_kv, user_id)
+    if full:
+        raw = await redis_kv.client.hgetall(key)
+        fields = {_as_str(k): v for k, v in (raw or {}).items()}
+    else:
+        values = await redis_kv.client.hmget(key, list(SOLO_HEAD_FIELDS))
+        fields = {k: v for k, v in zip(SOLO_HEAD_FIELDS, values) if v is not None}
+    if fields:
+        return session_from_fields(redis_kv, user_id, fields)
+
+    legacy_key = _legacy_session_key(redis_kv, user_id)
+    raw = await redis_kv.get_json(legacy_key)
     if not raw:
         return None
+    sess = session_from_payload(raw, user_id)
+    await save_solo_session(redis_kv, sess, ttl=redis_kv.ttl_seconds)
+    await redis_kv.delete(legacy_key)
+    return sess
+
+
+def session_from_payload(raw: dict, user_id: int) -> SoloSession:
+    if raw.get("_v") == SOLO_PAYLOAD_VERSION:
+        fields = dict(raw)
+        del fields["_v"]
+        try:
+            return SoloSession(**fields)
+        except TypeError:
+            pass
 
     order = list(map(int, raw.get("order", [])))
     stats = {str(k): str(v) for k, v in (raw.get("stats") or {}).items()}
@@ -95,27 +176,167 @@ async def save_solo_session(
     sess: SoloSession,
     ttl: int | None = None,
 ) -> None:
-    payload = {
+    key = _session_key(redis_kv, sess.user_id)
+    meta = {
         "user_id": sess.user_id,
         "collection_id": sess.collection_id,
         "order": list(sess.order),
-        "index": sess.index,
-        "showing_answer": sess.showing_answer,
         "started_at": sess.started_at,
         "seed": sess.seed,
-        "stats": dict(sess.stats),
-        "per_item_sec": dict(sess.per_item_sec),
-        "hints": {k: list(v) for k, v in sess.hints.items()},
+    }
+    mapping = {
+        "meta": redis_kv.codec.encode(meta),
+        "index": sess.index,
+        "showing_answer": int(sess.showing_answer),
         "total_sec": sess.total_sec,
         "last_ts": sess.last_ts,
+        "hints": redis_kv.codec.encode(sess.hints),
     }
-    await redis_kv.set_json(_session_key(redis_kv, sess.user_id), payload, ex=ttl)
+    mapping.update({f"stat:{k}": v for k, v in sess.stats.items()})
+    mapping.update({f"sec:{k}": v for k, v in sess.per_item_sec.items()})
+
+    pipe = redis_kv.client.pipeline(transaction=True)
+    pipe.delete(key)
+    pipe.hset(key, mapping=mapping)
+    if ttl:
+        pipe.expire(key, ttl)
+    await pipe.execute()
+
+
+async def set_solo_showing_answer(
+    redis_kv: RedisKV,
+    sess: SoloSession,
+    showing_answer: bool,
+    ttl: int | None = None,
+) -> None:
+    sess.showing_answer = showing_answer
+    key = _session_key(redis_kv, sess.user_id)
+    pipe = redis_kv.client.pipeline(transaction=True)
+    pipe.hset(key, "showing_answer", int(showing_answer))
+    if ttl:
+        pipe.expire(key, ttl)
+    await pipe.execute()
+
+
+async def mark_solo_card(
+    redis_kv: RedisKV,
+    sess: SoloSession,
+    mark: Optional[str],
+    ttl: int | None = None,
+) -> None:
+    item_id = sess.current_item_id()
+    if item_id is None:
+        return
+    item = str(item_id)
+    before = sess.total_sec
+    sess.mark_and_next(mark)
+    delta = sess.total_sec - before
+
+    key = _session_key(redis_kv, sess.user_id)
+    pipe = redis_kv.client.pipeline(transaction=True)
+    pipe.hset(
+        key,
+        mapping={
+            f"stat:{item}": sess.stats[item],
+            "index": sess.index,
+            "showing_answer": 0,
+            "last_ts": sess.last_ts,
+        },
+    )
+    pipe.hincrby(key, f"sec:{item}", delta)
+    pipe.hincrby(key, "total_sec", delta)
+    if ttl:
+        pipe.expire(key, ttl)
+    await pipe.execute()
+
+
+async def save_solo_hints(
+    redis_kv: RedisKV,
+    sess: SoloSession,
+    ttl: int | None = None,
+) -> None:
+    key = _session_key(redis_kv, sess.user_id)
+    pipe = redis_kv.client.pipeline(transaction=True)
+    pipe.hset(key, "hints", redis_kv.codec.encode(sess.hints))
+    if ttl:
+        pipe.expire(key, ttl)
+    await pipe.execute()
 
 
 async def drop_solo_session(redis_kv: RedisKV, user_id: int) -> None:
     await redis_kv.delete(_session_key(redis_kv, user_id))
 
 
+SOLO_DECK_LOCAL_SIZE = 256
+
+_solo_decks: "OrderedDict[Tuple[int, int], RoomDeck]" = OrderedDict()
+
+
+def _deck_rev_key(redis_kv: RedisKV, collection_id: int) -> str:
+    return redis_kv._key("solo", "deck_rev", collection_id)
+
+
+def _deck_key(redis_kv: RedisKV, collection_id: int, rev: int) -> str:
+    return redis_kv._key("solo", "deck", collection_id, rev)
+
+
+def _remember_solo_deck(key: Tuple[int, int], deck: RoomDeck) -> None:
+    _solo_decks[key] = deck
+    _solo_decks.move_to_end(key)
+    while len(_solo_decks) > SOLO_DECK_LOCAL_SIZE:
+        _solo_decks.popitem(last=False)
+
+
+async def _deck_rev(redis_kv: RedisKV, collection_id: int) -> int:
+    raw = await redis_kv.client.get(_deck_rev_key(redis_kv, collection_id))
+    return int(raw or 0)
+
+
+async def snapshot_solo_deck(
+    async_session_maker,
+    redis_kv: RedisKV,
+    collection_id: int,
+    rev: Optional[int] = None,
+) -> RoomDeck:
+    if rev is None:
+        rev = await _deck_rev(redis_kv, collection_id)
+    found = await SoloData(async_session_maker).get_collection_deck(collection_id)
+    title, items = found or ("Коллекция", {})
+    deck = RoomDeck(title=title, items=items)
+    await redis_kv.set_json(
+        _deck_key(redis_kv, collection_id, rev),
+        deck.to_dict(),
+        ex=redis_kv.ttl_seconds,
+    )
+    _remember_solo_deck((collection_id, rev), deck)
+    return deck
+
+
+async def get_solo_deck(
+    async_session_maker, redis_kv: RedisKV, collection_id: int
+) -> RoomDeck:
+    rev = await _deck_rev(redis_kv, collection_id)
+    key = (collection_id, rev)
+    deck = _solo_decks.get(key)
+    if deck is not None:
+        _solo_decks.move_to_end(key)
+        return deck
+
+    raw = await redis_kv.get_json(_deck_key(redis_kv, collection_id, rev))
+    if raw:
+        deck = RoomDeck.from_dict(raw)
+        _remember_solo_deck(key, deck)
+        return deck
+
+    return await snapshot_solo_deck(async_session_maker, redis_kv, collection_id, rev)
+
+
+async def invalidate_solo_deck(redis_kv: RedisKV, collection_id: int) -> None:
+    for key in [k for k in _solo_decks if k[0] == collection_id]:
+        del _solo_decks[key]
+    await redis_kv.client.incr(_deck_rev_key(redis_kv, collection_id))
+
+
 async def start_new_solo_session(
     redis_kv: RedisKV,
     user_id: int,
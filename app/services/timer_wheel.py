@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+@dataclass(slots=True)
+class _Timer:
+    key: str
+    due: float
+    tick: int
+    gen: int
+
+
+class TimerWheel:
+    def __init__(
+        self,
+        tick_sec: float = 0.1,
+        slots: int = 64,
+        levels: int = 4,
+        now: Optional[float] = None,
+    ) -> None:
+        self.tick_sec = float(tick_sec)
+        self.slots = int(slots)
+        self.levels = int(levels)
+        self._current = int((time.time() if now is None else now) / self.tick_sec)
+        self._wheels: List[List[List[_Timer]]] = [
+            [[] for _ in range(self.slots)] for _ in range(self.levels)
+        ]
+        self._overflow: List[_Timer] = []
+        self._ready: List[_Timer] = []
+        self._active: Dict[str, _Timer] = {}
+        self._gen = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._active)
+
+    def pending_by_level(self) -> Dict[str, int]:
+        counts = {f"level{i}": 0 for i in range(self.levels)}
+        counts["overflow"] = 0
+        counts["ready"] = 0
+        for level, wheel in enumerate(self._wheels):
+            counts[f"level{level}"] = sum(self._live(b) for b in wheel)
+        counts["overflow"] = self._live(self._overflow)
+        counts["ready"] = self._live(self._ready)
+        return counts
+
+    def _live(self, bucket: List[_Timer]) -> int:
+        return sum(1 for t in bucket if self._active.get(t.key) is t)
+
+    def due_of(self, key: str) -> Optional[float]:
+        t = self._active.get(key)
+        return None if t is None else t.due
+
+    def schedule(self, key: str, due: float) -> None:
+        self._gen += 1
+        t = _Timer(
+            key=key,
+            due=due,
+            tick=math.ceil(due / self.tick_sec),
+            gen=self._gen,
+        )
+        self._active[key] = t
+        self._place(t)
+
+    def cancel(self, key: str) -> bool:
+        return self._active.pop(key, None) is not None
+
+    def _place(self, t: _Timer) -> None:
+        delta = t.tick - self._current
+        if delta <= 0:
+            self._ready.append(t)
+            return
+        span = 1
+        for level in range(self.levels):
+            if delta < span * self.slots:
+                self._wheels[level][(t.tick // span) % self.slots].append(t)
+                return
+            span *= self.slots
+        self._overflow.append(t)
+
+    def _cascade(self) -> None:
+        span = 1
+        for level in range(1, self.levels):
+            span *= self.slots
+            if self._current % span:
+                return
+            slot = (self._current // span) % self.slots
+            bucket = self._wheels[level][slot]
+            self._wheels[level][slot] = []
+            for t in bucket:
+                if self._active.get(t.key) is t:
+                    self._place(t)
+        overflow, self._overflow = self._overflow, []
+        for t in overflow:
+            if self._active.get(t.key) is t:
+                self._place(t)
+
+    def _collect(self, bucket: List[_Timer], fired: List[str]) -> None:
+        for t in bucket:
+            if self._active.get(t.key) is t:
+                del self._active[t.key]
+                fired.append(t.key)
+
+    def advance(self, now: Optional[float] = None) -> List[str]:
+        target = int((time.time() if now is None else now) / self.tick_sec)
+        fired: List[str] = []
+
+        ready, self._ready = self._ready, []
+        self._collect(ready, fired)
+
+        while self._current < target:
+            self._current += 1
+            self._cascade()
+            slot = self._current % self.slots
+            bucket = self._wheels[0][slot]
+            self._wheels[0][slot] = []
+            self._collect(bucket, fired)
+            ready, self._ready = self._ready, []
+            self._collect(ready, fired)
+
+        return fired
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from datetime import datetime
 
 from app.models.user import User
 from app.repos.base import with_repos
@@ -11,6 +12,7 @@ class UserProfileData:
     user: User
     collections_count: int
     total_cards: int
+    last_updated_at: datetime | None = None
 
 
 async def ensure_user_exists(
@@ -25,20 +27,15 @@ async def load_profile(
     tg_id: int,
     username: str | None,
 ) -> UserProfileData:
-    async with with_repos(async_session_maker) as (_, users, cols, items):
+    async with with_repos(async_session_maker) as (_, users, cols, _):
         u = await users.get_or_create(tg_id, username)
-
-        all_cols = await cols.list_by_user(u.id)
-        collections_count = len(all_cols)
-
-        total_cards = 0
-        for col in all_cols:
-            total_cards += await items.count_in_collection(col.id)
+        stats = await cols.stats_by_user(u.id)
 
     return UserProfileData(
         user=u,
-        collections_count=collections_count,
-        total_cards=total_cards,
+        collections_count=stats.collections_count,
+        total_cards=stats.total_cards,
+        last_updated_at=stats.last_updated_at,
     )
 
 
@@ -48,20 +45,16 @@ async def update_name_and_get_profile(
     username: str | None,
     new_name: str,
 ) -> UserProfileData:
-    async with with_repos(async_session_maker) as (_, users, cols, items):
+    async with with_repos(async_session_maker) as (_, users, cols, _):
         u = await users.get_or_create(tg_id, username)
         u.username = new_name
         await users.session.commit()
 
-        all_cols = await cols.list_by_user(u.id)
-        collections_count = len(all_cols)
-
-        total_cards = 0
-        for col in all_cols:
-            total_cards += await items.count_in_collection(col.id)
+        stats = await cols.stats_by_user(u.id)
 
     return UserProfileData(
         user=u,
-        collections_count=collections_count,
-        total_cards=total_cards,
+        collections_count=stats.collections_count,
+        total_cards=stats.total_cards,
+        last_updated_at=stats.last_updated_at,
     )
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+import time
+from functools import partial
+from queue import Empty, Full
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.types import Update
+
+from app.config import settings
+from app.factory import close_app, create_app
+
+log = logging.getLogger(__name__)
+
+QUEUE_WAIT_SEC = 1.0
+SHUTDOWN_TIMEOUT_SEC = 30.0
+
+
+def update_user_id(data: Dict[str, Any]) -> Optional[int]:
+    for name, payload in data.items():
+        if name == "update_id" or not isinstance(payload, dict):
+            continue
+        user = payload.get("from") or payload.get("user")
+        if user and "id" in user:
+            return int(user["id"])
+        chat = payload.get("chat") or (payload.get("message") or {}).get("chat")
+        if chat and "id" in chat:
+            return int(chat["id"])
+    return None
+
+
+def shard_for(data: Dict[str, Any], shards: int) -> int:
+    uid = update_user_id(data)
+    key = uid if uid is not None else int(data.get("update_id", 0))
+    return key % shards
+
+
+class KeyedSerialRunner:
+    def __init__(self, max_concurrent: int = 100) -> None:
+        self._tails: Dict[int, asyncio.Task] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tails)
+
+    def submit(self, key: int, job: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.create_task(self._run(self._tails.get(key), job))
+        self._tails[key] = task
+        task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        return task
+
+    def _forget(self, key: int, task: asyncio.Task) -> None:
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+    async def _run(
+        self, prev: Optional[asyncio.Task], job: Callable[[], Awaitable[Any]]
+    ) -> None:
+        if prev is not None:
+            await asyncio.wait([prev])
+        async with self._semaphore:
+            try:
+                await job()
+            except Exception as e:
+                log.exception("shard: update failed: %s", e)
+
+    async def drain(self) -> None:
+        while self._tails:
+            await asyncio.gather(*self._tails.values(), return_exceptions=True)
+
+
+async def _worker(index: int, queue: multiprocessing.Queue) -> None:
+    app = await create_app(manage_webhook=False)
+    app.room_scheduler.start()
+    runner = KeyedSerialRunner(settings.SHARD_MAX_CONCURRENT)
+    in_flight = asyncio.Semaphore(settings.SHARD_MAX_IN_FLIGHT)
+    loop = asyncio.get_running_loop()
+    log.info("shard %d: started", index)
+    try:
+        while True:
+            await in_flight.acquire()
+            try:
+                data = await loop.run_in_executor(
+                    None, partial(queue.get, timeout=QUEUE_WAIT_SEC)
+                )
+            except Empty:
+                in_flight.release()
+                continue
+            if data is None:
+                break
+            update = Update.model_validate(data, context={"bot": app.bot})
+            key = update_user_id(data) or update.update_id
+            task = runner.submit(key, lambda u=update: app.dp.feed_update(app.bot, u))
+            task.add_done_callback(lambda _: in_flight.release())
+        await runner.drain()
+    finally:
+        await close_app(app)
+        log.info("shard %d: stopped", index)
+
+
+def run_worker(index: int, queue: multiprocessing.Queue) -> None:
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_worker(index, queue))
+
+
+async def ingest(queues: List[multiprocessing.Queue]) -> None:
+    bot = Bot(token=settings.BOT_TOKEN)
+    loop = asyncio.get_running_loop()
+    offset: Optional[int] = None
+    backoff = 1.0
+    try:
+        await bot.delete_webhook(drop_pending_updates=True)
+        while True:
+            try:
+                updates = await bot.get_updates(
+                    offset=offset, timeout=settings.SHARD_POLL_TIMEOUT_SEC
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("ingest: get_updates failed: %s", e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            backoff = 1.0
+            for update in updates:
+                data = update.model_dump(mode="json", by_alias=True, exclude_none=True)
+                queue = queues[shard_for(data, len(queues))]
+                while True:
+                    try:
+                        await loop.run_in_executor(
+                            None, partial(queue.put, data, timeout=QUEUE_WAIT_SEC)
+                        )
+                        break
+                    except Full:
+                        log.warning("ingest: shard queue is full, waiting")
+                offset = update.update_id + 1
+    finally:
+        await bot.session.close()
+
+
+def run_sharded(workers: int) -> None:
+    queues = [
+        multiprocessing.Queue(maxsize=settings.SHARD_QUEUE_SIZE) for _ in range(workers)
+    ]
+    procs = [
+        multiprocessing.Process(target=run_worker, args=(i, q), name=f"shard-{i}")
+        for i, q in enumerate(queues)
+    ]
+    for p in procs:
+        p.start()
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"Starting sharded polling with {workers} workers...")
+    try:
+        asyncio.run(ingest(queues))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_workers(queues, procs)
+        print("Shutdown complete.")
+
+
+def stop_workers(
+    queues: List[multiprocessing.Queue],
+    procs: List[multiprocessing.Process],
+    timeout: float = SHUTDOWN_TIMEOUT_SEC,
+) -> None:
+    deadline = time.monotonic() + timeout
+    for i, q in enumerate(queues):
+        try:
+            q.put(None, timeout=max(0.0, deadline - time.monotonic()))
+        except Full:
+            log.warning("shard %d: queue is full, worker will be terminated", i)
+    for p in procs:
+        p.join(timeout=max(0.0, deadline - time.monotonic()))
+        if p.is_alive():
+            p.terminate()
+            p.join(timeout=5)
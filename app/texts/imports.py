@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from app.services.import_jobs import ImportJob
+
+
+def fmt_import_progress(job: ImportJob) -> str:
+    size_kb = max(1, job.size // 1024)
+    if job.state == "queued":
+        return f"⏳ Файл «{job.file_name}» ({size_kb} КБ) в очереди. Перед вами: {job.ahead}."
+    if job.state == "done":
+        return (
+            f"✅ Файл «{job.file_name}» ({size_kb} КБ) прочитан за {job.elapsed:.1f} с."
+        )
+    if job.state == "failed":
+        return f"⚠️ Не удалось прочитать файл «{job.file_name}» ({size_kb} КБ)."
+    return f"⚙️ Читаю файл «{job.file_name}» ({size_kb} КБ)…"
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from app.models.solo_mode import MAX_HINTS_PER_ITEM
+
 
 def fmt_question(
     title: str, q: str, progress: str, hints: list[str] | None = None
@@ -13,7 +15,7 @@ def fmt_question(
             else "\n".join(
                 [
                     f"<b>{i+1} подсказка:</b>\n{escape(h)}\n"
-                    for i, h in enumerate(hints[:3])
+                    for i, h in enumerate(hints[:MAX_HINTS_PER_ITEM])
                 ]
             )
         )
@@ -34,7 +36,7 @@ def fmt_answer(
             else "\n".join(
                 [
                     f"<b>{i+1} подсказка:</b>\n{escape(h)}\n"
-                    for i, h in enumerate(hints[:3])
+                    for i, h in enumerate(hints[:MAX_HINTS_PER_ITEM])
                 ]
             )
         )
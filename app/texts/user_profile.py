@@ -25,9 +25,14 @@ def make_profile_text(
         if not name:
             name = f"id{tg.id}"
 
-    return (
+    text = (
         "👤 <b>Мой профиль</b>\n\n"
         f"Имя: <b>{name}</b>\n"
         f"Коллекций: <b>{profile.collections_count}</b>\n"
         f"Карточек всего: <b>{profile.total_cards}</b>"
     )
+
+    if profile.last_updated_at is not None:
+        text += f"\nПоследнее изменение: <b>{profile.last_updated_at:%d.%m.%Y}</b>"
+
+    return text
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+
+from aiogram import Bot
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from app.config import settings
+from app.factory import close_app, create_app
+
+log = logging.getLogger(__name__)
+
+
+def webhook_url() -> str:
+    return settings.WEBHOOK_BASE_URL.rstrip("/") + settings.WEBHOOK_PATH
+
+
+async def register_webhook() -> None:
+    bot = Bot(token=settings.BOT_TOKEN)
+    try:
+        await bot.set_webhook(
+            url=webhook_url(),
+            secret_token=settings.WEBHOOK_SECRET,
+            max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+        )
+        log.info("webhook: registered %s", webhook_url())
+    finally:
+        await bot.session.close()
+
+
+async def healthz(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+async def create_web_app() -> web.Application:
+    if not settings.WEBHOOK_SECRET:
+        raise RuntimeError("WEBHOOK_SECRET must be set in webhook mode")
+
+    app = await create_app()
+    web_app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=app.dp,
+        bot=app.bot,
+        secret_token=settings.WEBHOOK_SECRET,
+        handle_in_background=False,
+    ).register(web_app, path=settings.WEBHOOK_PATH)
+    web_app.router.add_get("/healthz", healthz)
+    setup_application(web_app, app.dp, bot=app.bot)
+
+    async def on_startup(_: web.Application) -> None:
+        app.room_scheduler.start()
+
+    async def on_cleanup(_: web.Application) -> None:
+        await close_app(app)
+
+    web_app.on_startup.append(on_startup)
+    web_app.on_cleanup.append(on_cleanup)
+    return web_app
+
+
+def serve(reuse_port: bool = False) -> None:
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(
+        create_web_app(),
+        host=settings.WEBHOOK_HOST,
+        port=settings.WEBHOOK_PORT,
+        reuse_port=reuse_port,
+        print=None,
+    )
+
+
+def run_webhook() -> None:
+    if settings.WEBHOOK_BASE_URL:
+        asyncio.run(register_webhook())
+
+    workers = max(1, settings.WEBHOOK_WORKERS)
+    if workers == 1:
+        serve()
+        return
+
+    procs = [
+        multiprocessing.Process(
+            target=serve, kwargs={"reuse_port": True}, name=f"webhook-{i}"
+        )
+        for i in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        for p in procs:
+            p.join(timeout=30)
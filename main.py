@@ -1,35 +1,33 @@
 import asyncio
 import logging
 
-from app.factory import create_app
+from app.config import settings
+from app.factory import close_app, create_app
 
 logging.basicConfig(level=logging.INFO)
 
 
 async def main():
     app = await create_app()
-    bot = app.bot
-    dp = app.dp
-    redis = app.redis_client
+
+    app.room_scheduler.start()
 
     print("Starting polling...")
     try:
-        await dp.start_polling(bot)
+        await app.dp.start_polling(app.bot)
     finally:
-        try:
-            await bot.session.close()
-        except Exception as e:
-            print("Bot close failed: %s", e)
-        try:
-            await app.engine.dispose()
-        except Exception as e:
-            print("Engine close failed: %s", e)
-        try:
-            await redis.aclose()
-        except Exception as e:
-            print("Redis close failed: %s", e)
+        await close_app(app)
         print("Shutdown complete.")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if settings.RUN_MODE == "webhook":
+        from app.webhook import run_webhook
+
+        run_webhook()
+    elif settings.POLLING_WORKERS > 1:
+        from app.sharding import run_sharded
+
+        run_sharded(settings.POLLING_WORKERS)
+    else:
+        asyncio.run(main())
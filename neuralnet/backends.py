@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+BACKENDS = ("auto", "cuda-fp16", "cpu-fp32", "cpu-bf16", "cpu-int8")
+
+
+@dataclass(slots=True)
+class LoadedModel:
+    backend: str
+    tokenizer: object
+    model: object
+    generation_config: object
+
+    @property
+    def device(self):
+        return self.model.device
+
+
+def resolve_backend(name: str | None) -> str:
+    name = (name or "auto").strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(
+            f"unknown INFERENCE_BACKEND {name!r}, expected one of {', '.join(BACKENDS)}"
+        )
+    if name == "auto":
+        return "cuda-fp16" if torch.cuda.is_available() else "cpu-int8"
+    return name
+
+
+def configure_threads(num_threads: int | None, interop_threads: int | None) -> None:
+    if num_threads and num_threads > 0:
+        torch.set_num_threads(num_threads)
+    if interop_threads and interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            pass
+
+
+def _quantize_dynamic(model):
+    quantization = getattr(torch.ao, "quantization", None) or torch.quantization
+    return quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_weights(model_path: str, backend: str, cache_dir: str):
+    if backend == "cuda-fp16":
+        return AutoModelForCausalLM.from_pretrained(
+            model_path,
+            cache_dir=cache_dir,
+            device_map="auto",
+            torch_dtype=torch.float16,
+        )
+
+    dtype = torch.bfloat16 if backend == "cpu-bf16" else torch.float32
+    model = AutoModelForCausalLM.from_pretrained(
+        model_path,
+        cache_dir=cache_dir,
+        torch_dtype=dtype,
+        low_cpu_mem_usage=True,
+    )
+    model.eval()
+    if backend == "cpu-int8":
+        model = _quantize_dynamic(model)
+    return model
+
+
+def _generation_config(model, tokenizer):
+    generation_config = model.generation_config
+    generation_config.temperature = float(os.getenv("GEN_TEMPERATURE", "0.3"))
+    generation_config.top_p = float(os.getenv("GEN_TOP_P", "0.67"))
+    generation_config.do_sample = True
+    generation_config.pad_token_id = tokenizer.pad_token_id
+    generation_config.max_new_tokens = int(os.getenv("GEN_MAX_NEW_TOKENS", "45"))
+    return generation_config
+
+
+def load_model(model_path: str, backend: str, cache_dir: str) -> LoadedModel:
+    backend = resolve_backend(backend)
+
+    tokenizer = AutoTokenizer.from_pretrained(
+        model_path, cache_dir=cache_dir, padding_side="left"
+    )
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+
+    model = _load_weights(model_path, backend, cache_dir)
+    return LoadedModel(
+        backend=backend,
+        tokenizer=tokenizer,
+        model=model,
+        generation_config=_generation_config(model, tokenizer),
+    )
+
+
+def generate(loaded: LoadedModel, texts: List[str]) -> Tuple[List[str], int]:
+    tokenizer = loaded.tokenizer
+    inputs = tokenizer(texts, return_tensors="pt", padding=True).to(loaded.device)
+
+    with torch.inference_mode():
+        outputs = loaded.model.generate(
+            input_ids=inputs.input_ids,
+            attention_mask=inputs.attention_mask,
+            generation_config=loaded.generation_config,
+        )
+
+    prompt_len = inputs.input_ids.shape[1]
+    completions = outputs[:, prompt_len:]
+    pad_id = tokenizer.pad_token_id
+    new_tokens = int((completions != pad_id).sum().item())
+    decoded = [tokenizer.decode(out, skip_special_tokens=True) for out in completions]
+    return decoded, new_tokens
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, List, Optional, Sequence, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass(slots=True)
+class BatchMetrics:
+    max_batch_size: int
+    batches: int = 0
+    items: int = 0
+    failed_batches: int = 0
+    queue_wait_total_sec: float = 0.0
+    queue_wait_max_sec: float = 0.0
+    run_total_sec: float = 0.0
+
+    def record(self, size: int, waits: Sequence[float], run_sec: float) -> None:
+        self.batches += 1
+        self.items += size
+        self.run_total_sec += run_sec
+        for w in waits:
+            self.queue_wait_total_sec += w
+            if w > self.queue_wait_max_sec:
+                self.queue_wait_max_sec = w
+
+    def snapshot(self) -> dict:
+        batches = self.batches or 1
+        items = self.items or 1
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "failed_batches": self.failed_batches,
+            "max_batch_size": self.max_batch_size,
+            "avg_batch_size": self.items / batches,
+            "fill_ratio": self.items / (batches * self.max_batch_size),
+            "avg_queue_wait_ms": 1000.0 * self.queue_wait_total_sec / items,
+            "max_queue_wait_ms": 1000.0 * self.queue_wait_max_sec,
+            "avg_batch_run_ms": 1000.0 * self.run_total_sec / batches,
+        }
+
+
+@dataclass(slots=True)
+class _Pending(Generic[T]):
+    payload: T
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class MicroBatcher(Generic[T, R]):
+    def __init__(
+        self,
+        run_batch: Callable[[List[T]], List[R]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        executor: Any = None,
+    ) -> None:
+        self._run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_sec = max(0.0, float(max_wait_ms)) / 1000.0
+        self._executor = executor
+        self._queue: Optional[asyncio.Queue[_Pending[T]]] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.metrics = BatchMetrics(max_batch_size=self.max_batch_size)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        if self._worker is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        while self._queue is not None and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if not item.future.done():
+                item.future.set_exception(RuntimeError("batcher stopped"))
+
+    async def submit(self, payload: T) -> R:
+        if self._worker is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        await self._queue.put(_Pending(payload, fut, time.perf_counter()))
+        return await fut
+
+    async def _collect(self) -> List[_Pending[T]]:
+        first = await self._queue.get()
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait_sec
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                while len(batch) < self.max_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            batch = [b for b in batch if not b.future.cancelled()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            waits = [started - b.enqueued_at for b in batch]
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self._run_batch, [b.payload for b in batch]
+                )
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"batch returned {len(results)} results for {len(batch)} inputs"
+                    )
+            except asyncio.CancelledError:
+                for b in batch:
+                    if not b.future.done():
+                        b.future.set_exception(RuntimeError("batcher stopped"))
+                raise
+            except Exception as e:
+                self.metrics.failed_batches += 1
+                log.exception("batch of %d failed: %s", len(batch), e)
+                for b in batch:
+                    if not b.future.done():
+                        b.future.set_exception(e)
+                continue
+
+            self.metrics.record(len(batch), waits, time.perf_counter() - started)
+            for b, res in zip(batch, results):
+                if not b.future.done():
+                    b.future.set_result(res)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import time
+from typing import List, Sequence, Tuple
+
+import torch
+
+from neuralnet.backends import BACKENDS, configure_threads, generate, load_model
+from neuralnet.prompts import render_prompt
+
+PROMPTS: List[Tuple[str, str]] = [
+    ("Столица Франции", "Париж"),
+    ("Сколько будет 7 * 8?", "56"),
+    ("Кто написал «Войну и мир»?", "Лев Толстой"),
+    ("Химическая формула воды", "H2O"),
+    ("В каком году произошло Крещение Руси?", "988"),
+    ("Самая длинная река в Европе", "Волга"),
+    ("Как по-английски «яблоко»?", "apple"),
+    ("Что измеряется в ньютонах?", "Сила"),
+]
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def run_backend(
+    backend: str,
+    model_path: str,
+    cache_dir: str,
+    batch_size: int,
+    runs: int,
+    warmup: int,
+) -> dict:
+    started = time.perf_counter()
+    loaded = load_model(model_path, backend, cache_dir)
+    load_sec = time.perf_counter() - started
+
+    batches = [
+        [render_prompt(loaded.tokenizer, q, a) for q, a in PROMPTS[i : i + batch_size]]
+        for i in range(0, len(PROMPTS), batch_size)
+    ]
+
+    for _ in range(warmup):
+        generate(loaded, batches[0])
+
+    torch.manual_seed(0)
+    latencies: List[float] = []
+    tokens = 0
+    for _ in range(runs):
+        for texts in batches:
+            t0 = time.perf_counter()
+            _, new_tokens = generate(loaded, texts)
+            latencies.append(time.perf_counter() - t0)
+            tokens += new_tokens
+
+    total = sum(latencies) or 1e-9
+    return {
+        "backend": loaded.backend,
+        "load_sec": load_sec,
+        "calls": len(latencies),
+        "tokens": tokens,
+        "tokens_per_sec": tokens / total,
+        "p50_ms": 1000.0 * percentile(latencies, 0.50),
+        "p95_ms": 1000.0 * percentile(latencies, 0.95),
+        "mean_ms": 1000.0 * statistics.fmean(latencies) if latencies else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Hint model inference benchmark")
+    parser.add_argument(
+        "--backends",
+        default="cpu-fp32,cpu-bf16,cpu-int8",
+        help=f"comma separated, any of: {', '.join(BACKENDS)}",
+    )
+    parser.add_argument(
+        "--model", default=os.getenv("MODEL_PATH", "Qwen/Qwen2-0.5B-Instruct")
+    )
+    parser.add_argument(
+        "--cache-dir", default=os.getenv("HF_HOME", "/cache/huggingface")
+    )
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--interop-threads", type=int, default=0)
+    args = parser.parse_args()
+
+    configure_threads(args.threads, args.interop_threads)
+    print(
+        f"model={args.model} threads={torch.get_num_threads()} "
+        f"batch_size={args.batch_size} prompts={len(PROMPTS)} runs={args.runs}"
+    )
+    print(
+        f"{'backend':<10} {'load,s':>7} {'calls':>6} {'tokens':>7} "
+        f"{'tok/s':>8} {'p50,ms':>9} {'p95,ms':>9} {'mean,ms':>9}"
+    )
+
+    for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        r = run_backend(
+            name,
+            args.model,
+            args.cache_dir,
+            max(1, args.batch_size),
+            max(1, args.runs),
+            max(0, args.warmup),
+        )
+        print(
+            f"{r['backend']:<10} {r['load_sec']:>7.1f} {r['calls']:>6} {r['tokens']:>7} "
+            f"{r['tokens_per_sec']:>8.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+            f"{r['mean_ms']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+
+def hint_instruction(question: str, answer: str) -> str:
+    return (
+        "ТЫ НЕ ДОЛЖЕН ИСПОЛЬЗОВАТЬ ИЕРОГЛИФЫ. "
+        "Ты — помощник, который даёт краткие и аккуратные ПОДСКАЗКИ, "
+        "а не готовые ответы. Ты не должен раскрывать решение полностью. "
+        "Используй только русский язык и не используй иероглифы.\n\n"
+        "Вот ВОПРОС пользователя:\n"
+        f"{question}\n\n"
+        "Вот ПРАВИЛЬНЫЙ ОТВЕТ (не раскрывай его полностью):\n"
+        f"{answer}\n\n"
+        "Сформулируй такую подсказку, которая мягко направит пользователя "
+        "к правильному ответу, но не подскажет его напрямую."
+    )
+
+
+def render_prompt(tokenizer, question: str, answer: str) -> str:
+    messages = [{"role": "user", "content": hint_instruction(question, answer)}]
+    return tokenizer.apply_chat_template(
+        messages, tokenize=False, add_generation_prompt=True
+    )
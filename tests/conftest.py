@@ -20,12 +20,35 @@ def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
     loop.close()
 
 
+def _to_bytes(value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self._redis = redis
+        self._calls: list = []
+
+    def __getattr__(self, name: str):
+        def queue(*args, **kwargs):
+            self._calls.append((getattr(self._redis, name), args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> list:
+        calls, self._calls = self._calls, []
+        return [await fn(*args, **kwargs) for fn, args, kwargs in calls]
+
+
 @dataclass
 class FakeRedis:
     data: Dict[str, bytes]
+    hashes: Dict[str, Dict[str, bytes]]
 
     def __init__(self) -> None:
         self.data = {}
+        self.hashes = {}
 
     async def set(self, key: str, value: bytes, ex: int | None = None) -> None:
         self.data[key] = value
@@ -33,11 +56,65 @@ class FakeRedis:
     async def get(self, key: str) -> bytes | None:
         return self.data.get(key)
 
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self.data.get(k) for k in keys]
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        value = int(self.data.get(key, b"0")) + amount
+        self.data[key] = _to_bytes(value)
+        return value
+
     async def delete(self, key: str) -> None:
         self.data.pop(key, None)
+        self.hashes.pop(key, None)
+
+    async def hset(
+        self,
+        key: str,
+        field: str | None = None,
+        value=None,
+        mapping: Dict[str, object] | None = None,
+    ) -> None:
+        h = self.hashes.setdefault(key, {})
+        if field is not None:
+            h[field] = _to_bytes(value)
+        for f, v in (mapping or {}).items():
+            h[f] = _to_bytes(v)
+
+    async def hmget(self, key: str, fields: list[str]) -> list[bytes | None]:
+        h = self.hashes.get(key, {})
+        return [h.get(f) for f in fields]
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        h = self.hashes.setdefault(key, {})
+        value = int(h.get(field, b"0")) + amount
+        h[field] = _to_bytes(value)
+        return value
+
+    async def hget(self, key: str, field: str) -> bytes | None:
+        return self.hashes.get(key, {}).get(field)
+
+    async def hgetall(self, key: str) -> Dict[bytes, bytes]:
+        return {f.encode("utf-8"): v for f, v in self.hashes.get(key, {}).items()}
+
+    async def hdel(self, key: str, field: str) -> None:
+        self.hashes.get(key, {}).pop(field, None)
+
+    async def expire(self, key: str, seconds: int) -> None:
+        return None
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    def register_script(self, source: str):
+        async def run(keys=None, args=None):
+            raise NotImplementedError("Lua scripts need fakeredis")
+
+        return run
 
-    async def aclose(self) -> None:
+    async def aclose(self, close_connection_pool: bool = True) -> None:
         self.data.clear()
+        self.hashes.clear()
 
 
 @pytest.fixture
@@ -90,19 +167,21 @@ async def db_session(
 
 @pytest.fixture
 def patch_app_infra(monkeypatch, _engine, async_session_maker, fake_redis: FakeRedis):
+    from app import factory as factory_module  # type: ignore
     from app.services import db as db_module  # type: ignore
     from app.services import redis_client as redis_module  # type: ignore
 
     def fake_make_engine_and_session(dsn: str):
         return _engine, async_session_maker
 
-    async def fake_create_redis(dsn: str):
+    def fake_create_redis(dsn: str):
         return fake_redis
 
     monkeypatch.setattr(
         db_module, "make_engine_and_session", fake_make_engine_and_session
     )
     monkeypatch.setattr(redis_module, "create_redis", fake_create_redis)
+    monkeypatch.setattr(factory_module, "create_redis", fake_create_redis)
 
 
 @pytest.fixture
@@ -13,10 +13,12 @@ async def test_create_app_smoke(patch_aiogram_network, patch_app_infra):
     assert hasattr(app, "async_session_maker")
     assert hasattr(app, "redis_client")
     assert hasattr(app, "redis_kv")
+    assert hasattr(app, "hint_client")
 
     await app.bot.session.close()
     await app.engine.dispose()
     await app.redis_client.aclose()
+    await app.hint_client.aclose()
 
 
 @pytest.mark.asyncio
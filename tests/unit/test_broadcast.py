@@ -0,0 +1,75 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from app.services.broadcast import Broadcaster, TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50.0, capacity=2)
+    started = time.monotonic()
+    for _ in range(5):
+        await bucket.acquire()
+    elapsed = time.monotonic() - started
+    assert elapsed >= 3 / 50.0 * 0.9
+
+
+@pytest.mark.asyncio
+async def test_broadcast_runs_concurrently_and_records_delivery():
+    broadcaster = Broadcaster(global_rate=1000.0, per_chat_rate=10.0)
+
+    async def send(chat_id):
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(message_id=chat_id * 10)
+
+    started = time.monotonic()
+    res = await broadcaster.broadcast({i: (lambda i=i: send(i)) for i in range(1, 21)})
+    assert time.monotonic() - started < 0.5
+
+    assert set(res) == set(range(1, 21))
+    assert all(d.ok for d in res.values())
+    assert res[3].message_id == 30
+    assert all(d.delivered_at is not None for d in res.values())
+
+
+@pytest.mark.asyncio
+async def test_broadcast_retries_after_flood_wait():
+    broadcaster = Broadcaster(
+        global_rate=1000.0, per_chat_rate=1000.0, per_chat_burst=5
+    )
+    calls = {"n": 0}
+
+    async def send():
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise TelegramRetryAfter(
+                method=SendMessage(chat_id=1, text="x"), message="flood", retry_after=0
+            )
+        return SimpleNamespace(message_id=7)
+
+    d = await broadcaster.deliver(1, send)
+    assert d.ok
+    assert d.attempts == 2
+    assert d.message_id == 7
+
+
+@pytest.mark.asyncio
+async def test_broadcast_isolates_failures():
+    broadcaster = Broadcaster(global_rate=1000.0, per_chat_rate=1000.0)
+
+    async def ok():
+        return SimpleNamespace(message_id=1)
+
+    async def boom():
+        raise RuntimeError("blocked")
+
+    res = await broadcaster.broadcast({1: ok, 2: boom})
+    assert res[1].ok
+    assert not res[2].ok
+    assert res[2].delivered_at is None
+    assert res[2].error == "blocked"
@@ -0,0 +1,62 @@
+import pytest
+
+from app.models.online_room import OnlineRoom
+from app.services.codec_benchmark import make_room, make_session
+from app.services.codecs import JsonCodec, make_codec
+from app.services.redis_kv import RedisKV
+from app.services.solo_mode import load_solo_session, session_from_payload
+
+
+def test_json_codec_roundtrip_and_unknown_codec():
+    codec = JsonCodec()
+    payload = {"a": 1, "b": "тест", "c": [1.5, None]}
+    assert codec.decode(codec.encode(payload)) == payload
+    with pytest.raises(ValueError):
+        make_codec("pickle")
+
+
+def test_msgpack_codec_reads_legacy_json():
+    pytest.importorskip("msgpack")
+    codec = make_codec("msgpack")
+    payload = make_room(5)
+    raw = codec.encode(payload)
+    assert raw[:1] == b"\x01"
+    assert codec.decode(raw) == payload
+    assert codec.decode(JsonCodec().encode(payload)) == payload
+    assert len(raw) < len(JsonCodec().encode(payload))
+
+
+def test_room_fast_decoder_matches_from_dict():
+    payload = make_room(30)
+    fast = OnlineRoom.from_payload(payload)
+    assert fast == OnlineRoom.from_dict(payload)
+
+    legacy = {k: v for k, v in payload.items() if k != "_v"}
+    legacy["index"] = str(legacy["index"])
+    assert OnlineRoom.from_payload(legacy).index == payload["index"]
+
+
+def test_session_fast_decoder_and_legacy_payload():
+    payload = make_session(40)
+    sess = session_from_payload(payload, 0)
+    assert sess.order == payload["order"]
+    assert sess.stats == payload["stats"]
+
+    legacy = {k: v for k, v in payload.items() if k != "_v"}
+    legacy["index"] = "3"
+    assert session_from_payload(legacy, 0).index == 3
+
+
+@pytest.mark.asyncio
+async def test_redis_kv_with_msgpack_codec(fake_redis):
+    pytest.importorskip("msgpack")
+    kv = RedisKV(
+        client=fake_redis, prefix="test", ttl_seconds=60, codec=make_codec("msgpack")
+    )
+    payload = make_session(10)
+    await kv.set_json(kv._key("solo", 123456789), payload)
+    sess = await load_solo_session(kv, 123456789)
+    assert sess is not None and sess.total == 10
+
+    await kv.set_state(1, "pending", {"type": "col:new"})
+    assert await kv.load_states(1) == {"pending": {"type": "col:new"}}
@@ -0,0 +1,44 @@
+import io
+
+import pytest
+
+from app.services.encoding_detect import (
+    SAMPLE_BYTES,
+    detect_encoding,
+    read_sample,
+)
+from app.services.importers import parse_items_file
+
+TEXT = "вопрос,ответ\nСтолица Франции,Париж\nКто написал Войну и мир?,Толстой\n"
+
+
+@pytest.mark.parametrize("encoding", ["cp1251", "koi8-r", "iso-8859-5"])
+def test_detects_cyrillic_codepages(encoding):
+    assert detect_encoding(TEXT.encode(encoding)) == encoding
+
+
+def test_detects_utf8_and_ascii():
+    assert detect_encoding(TEXT.encode("utf-8")) == "utf-8-sig"
+    assert detect_encoding(TEXT.encode("utf-8-sig")) == "utf-8-sig"
+    assert detect_encoding(b"question,answer\n") == "utf-8-sig"
+
+
+def test_utf8_sample_cut_mid_character_is_still_utf8():
+    data = ("a" * (SAMPLE_BYTES - 1) + "ж").encode("utf-8")[:SAMPLE_BYTES]
+    assert detect_encoding(data) == "utf-8-sig"
+    assert detect_encoding("Я".encode("cp1251")) != "utf-8-sig"
+
+
+def test_read_sample_skips_ascii_prefix():
+    data = b"q,a\n" * SAMPLE_BYTES + TEXT.encode("koi8-r")
+    sample = read_sample(io.BytesIO(data))
+    assert not sample.isascii()
+    assert detect_encoding(sample) == "koi8-r"
+
+
+def test_parse_items_file_decodes_koi8r():
+    pairs = parse_items_file("items.csv", TEXT.encode("koi8-r"))
+    assert pairs == [
+        ("Столица Франции", "Париж"),
+        ("Кто написал Войну и мир?", "Толстой"),
+    ]
@@ -66,8 +66,7 @@ async def test_start_new_sets_pending_and_prompts(redis_kv, async_session_maker)
     cb = DummyCallbackQuery(data="col:new", user_id=5, username="u5")
     await handler(cb)
 
-    key = redis_kv.pending_key(5)
-    stored = await redis_kv.get_json(key)
+    stored = await redis_kv.get_state(5, "pending")
     assert stored == {"type": "col:new"}
     assert cb.message.answers
     assert "название новой коллекции" in cb.message.answers[0]["text"].lower()
@@ -55,13 +55,12 @@ async def test_cmd_online_start_clears_pending_and_shows_root(
     router = get_online_mode_router(async_session_maker, redis_kv)
     handler = _get_message_handler(router, "cmd_online_start")
 
-    key = redis_kv.pending_key(1)
-    await redis_kv.set_json(key, {"type": "something"}, ex=redis_kv.ttl_seconds)
+    await redis_kv.set_state(1, "pending", {"type": "something"})
 
     msg = DummyMessage(text="/online", user_id=1, username="u1")
     await handler(msg)
 
-    assert await redis_kv.get_json(key) is None
+    assert await redis_kv.get_state(1, "pending") is None
     assert msg.answers
     assert "онлайн" in msg.answers[0]["text"].lower()
 
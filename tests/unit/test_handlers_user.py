@@ -105,8 +105,7 @@ async def test_cb_profile_change_name_sets_pending(redis_kv, async_session_maker
     cb = DummyCallbackQuery(data="profile:change_name", user_id=7, username="alice")
     await handler(cb)
 
-    key = redis_kv.pending_key(7)
-    stored = await redis_kv.get_json(key)
+    stored = await redis_kv.get_state(7, "pending")
     assert stored == {"type": "profile:change_name"}
     assert cb.message.answers, "user should be prompted to enter new name"
 
@@ -118,15 +117,13 @@ async def test_cb_profile_cancel_change_name_clears_pending(
     router = get_user_router(async_session_maker, redis_kv)
     handler = _get_callback_handler(router, "cb_profile_cancel_change_name")
 
-    key = redis_kv.pending_key(9)
-    await redis_kv.set_json(
-        key, {"type": "profile:change_name"}, ex=redis_kv.ttl_seconds
-    )
+    uid = 9
+    await redis_kv.set_state(uid, "pending", {"type": "profile:change_name"})
 
     cb = DummyCallbackQuery(data="profile:cancel_change_name", user_id=9, username="u9")
     await handler(cb)
 
-    assert await redis_kv.get_json(key) is None
+    assert await redis_kv.get_state(uid, "pending") is None
 
 
 @pytest.mark.asyncio
@@ -138,10 +135,8 @@ async def test_handle_profile_pending_updates_name_and_clears_state(
     router = get_user_router(async_session_maker, redis_kv)
     handler = _get_message_handler(router, "handle_profile_pending")
 
-    key = redis_kv.pending_key(11)
-    await redis_kv.set_json(
-        key, {"type": "profile:change_name"}, ex=redis_kv.ttl_seconds
-    )
+    uid = 11
+    await redis_kv.set_state(uid, "pending", {"type": "profile:change_name"})
 
     class DummyProfile:
         def __init__(self, username: str):
@@ -164,7 +159,7 @@ async def test_handle_profile_pending_updates_name_and_clears_state(
 
     assert msg.answers
     assert "PROFILE New Name" in msg.answers[0]["text"]
-    assert await redis_kv.get_json(key) is None
+    assert await redis_kv.get_state(uid, "pending") is None
 
 
 @pytest.mark.asyncio
@@ -172,11 +167,11 @@ async def test_cmd_cancel_clears_pending(async_session_maker, redis_kv):
     router = get_user_router(async_session_maker, redis_kv)
     handler = _get_message_handler(router, "cmd_cancel")
 
-    key = redis_kv.pending_key(20)
-    await redis_kv.set_json(key, {"type": "something"}, ex=redis_kv.ttl_seconds)
+    uid = 20
+    await redis_kv.set_state(uid, "pending", {"type": "something"})
 
     msg = DummyMessage(text="/cancel", user_id=20, username="u20")
     await handler(msg)
 
-    assert await redis_kv.get_json(key) is None
+    assert await redis_kv.get_state(uid, "pending") is None
     assert msg.answers
@@ -1,3 +1,4 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -49,3 +50,63 @@ async def test_generate_hint_error_returns_empty(monkeypatch):
     hint = await generate_hint_async("q", "a")
     assert hint == ""
     client.post.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_generate_hint_uses_shared_client():
+    response = MagicMock()
+    response.json.return_value = {"hint": " shared "}
+    response.raise_for_status.return_value = None
+
+    client = MagicMock()
+    client.post = AsyncMock(return_value=response)
+    client.aclose = AsyncMock()
+
+    hint_client = hints_module.HintClient(
+        client=client,
+        endpoint="http://nn/hint",
+        semaphore=asyncio.Semaphore(1),
+    )
+
+    assert await generate_hint_async("q", "a", hint_client=hint_client) == "shared"
+    assert await generate_hint_async("q", "a", hint_client=hint_client) == "shared"
+    assert client.post.await_count == 2
+    client.post.assert_awaited_with(
+        "http://nn/hint", json={"question": "q", "answer": "a", "prev_hints": []}
+    )
+
+    await hint_client.aclose()
+    client.aclose.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_hint_cache_serves_repeated_requests(monkeypatch, redis_kv):
+    request = AsyncMock(return_value="cached hint")
+    monkeypatch.setattr(hints_module, "_request_hint", request)
+    cache = hints_module.HintCache(redis_kv=redis_kv, ttl_seconds=60)
+
+    first = await generate_hint_async("q", "a", [], hint_cache=cache)
+    second = await generate_hint_async("q", "a", [], hint_cache=cache)
+    assert first == second == "cached hint"
+    request.assert_awaited_once()
+
+    other = hints_module.HintCache(redis_kv=redis_kv, ttl_seconds=60)
+    assert await other.get("q", "a", 0) == "cached hint"
+    assert await other.get("q", "a", 1) is None
+
+    await generate_hint_async("q", "a", ["cached hint"], hint_cache=cache)
+    assert request.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_hint_cache_invalidate_and_lru_eviction(redis_kv):
+    cache = hints_module.HintCache(redis_kv=redis_kv, ttl_seconds=60, local_size=1)
+
+    await cache.set("q1", "a1", 0, "h1")
+    await cache.set("q2", "a2", 0, "h2")
+    assert len(cache._local) == 1
+    assert await cache.get("q1", "a1", 0) == "h1"
+
+    await cache.invalidate("q1", "a1")
+    assert await cache.get("q1", "a1", 0) is None
+    assert await cache.get("q2", "a2", 0) == "h2"
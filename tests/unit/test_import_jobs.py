@@ -0,0 +1,121 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services.import_jobs import ImportJobs, ImportQueueFull, SpooledUpload
+
+CSV = "question,answer\nСтолица Франции,Париж\n2+2,4\n".encode("utf-8")
+
+
+@pytest.mark.asyncio
+async def test_import_runs_in_process_pool_and_reports_progress():
+    jobs = ImportJobs(max_workers=1)
+    seen = []
+
+    async def progress(job):
+        seen.append((job.state, job.file_name))
+
+    try:
+        pairs = await jobs.run("items", "cards.csv", CSV, progress=progress)
+        assert pairs == [("Столица Франции", "Париж"), ("2+2", "4")]
+        assert seen == [("running", "cards.csv"), ("done", "cards.csv")]
+
+        with pytest.raises(ValueError):
+            await jobs.run("items", "bad.csv", b"foo,bar\n1,2\n", progress=progress)
+        assert seen[-2:] == [("running", "bad.csv"), ("failed", "bad.csv")]
+    finally:
+        jobs.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_import_queue_position_and_limit(monkeypatch):
+    from app.services import import_jobs as module
+
+    gate = threading.Event()
+    started = threading.Event()
+
+    def slow_parse(file_name, source, mime_type=None, limit=None):
+        started.set()
+        gate.wait(5)
+        return [(file_name, "ok")]
+
+    monkeypatch.setitem(module.PARSERS, "items", slow_parse)
+    jobs = ImportJobs(max_workers=0, max_pending=1)
+    states = []
+
+    async def progress(job):
+        states.append((job.file_name, job.state, job.ahead))
+
+    try:
+        first = asyncio.create_task(jobs.run("items", "a", b"", progress=progress))
+        while not started.is_set():
+            await asyncio.sleep(0.001)
+        second = asyncio.create_task(jobs.run("items", "b", b"", progress=progress))
+        await asyncio.sleep(0)
+        assert jobs.waiting == 1
+
+        with pytest.raises(ImportQueueFull):
+            await jobs.run("items", "c", b"")
+
+        gate.set()
+        assert await first == [("a", "ok")]
+        assert await second == [("b", "ok")]
+        assert states == [
+            ("a", "running", 0),
+            ("b", "queued", 0),
+            ("a", "done", 0),
+            ("b", "running", 0),
+            ("b", "done", 0),
+        ]
+        assert jobs.waiting == 0 and jobs.running == 0
+    finally:
+        gate.set()
+        jobs.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_spooled_upload_rolls_to_disk_and_feeds_pool(tmp_path):
+    body = "".join(f"q{i},a{i}\n" for i in range(200)).encode("utf-8")
+    jobs = ImportJobs(max_workers=1)
+    try:
+        with SpooledUpload(suffix=".csv", max_memory=256) as upload:
+            upload.write(b"question,answer\n")
+            for i in range(0, len(body), 100):
+                upload.write(body[i : i + 100])
+            assert upload.rolled
+            path = upload.source
+            assert isinstance(path, str)
+
+            pairs = await jobs.run("items", "big.csv", path, limit=5)
+            assert pairs == [(f"q{i}", f"a{i}") for i in range(5)]
+        assert not os.path.exists(path)
+    finally:
+        jobs.shutdown()
+
+
+class _BrokenPool(ThreadPoolExecutor):
+    def submit(self, fn, *args, **kwargs):
+        future: Future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+
+@pytest.mark.asyncio
+async def test_broken_pool_is_replaced_for_next_job():
+    jobs = ImportJobs(max_workers=0)
+    broken = _BrokenPool(max_workers=1)
+    jobs._executor = broken
+    try:
+        with pytest.raises(BrokenProcessPool):
+            await jobs.run("items", "cards.csv", CSV)
+        assert jobs._executor is None
+        assert broken._shutdown
+
+        pairs = await jobs.run("items", "cards.csv", CSV)
+        assert pairs == [("Столица Франции", "Париж"), ("2+2", "4")]
+    finally:
+        jobs.shutdown()
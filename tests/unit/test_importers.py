@@ -71,3 +71,34 @@ def test_parse_collections_file_missing_columns():
     csv_bytes = "q,a\n1,2\n".encode("utf-8")
     with pytest.raises(ValueError):
         parse_collections_file("cols.csv", csv_bytes)
+
+
+def test_parse_items_file_stops_at_limit():
+    rows = "".join(f"Q{i},A{i}\n" for i in range(1000))
+    pairs = parse_items_file(
+        "items.csv", ("question,answer\n" + rows).encode(), limit=3
+    )
+    assert pairs == [("Q0", "A0"), ("Q1", "A1"), ("Q2", "A2")]
+
+
+def test_parse_items_file_limit_counts_only_new_questions():
+    data = "question,answer\nQ0,A0\nq0,dup\nQ1,A1\nQ2,A2\nQ3,A3\n".encode()
+    pairs = parse_items_file("items.csv", data, limit=2, skip={"Q0", "Q2"})
+    assert pairs == [("Q1", "A1"), ("Q3", "A3")]
+
+    assert parse_items_file("items.csv", data, limit=0) == []
+
+
+def test_parse_collections_file_caps_each_title(tmp_path):
+    path = tmp_path / "cols.csv"
+    with open(path, "w", encoding="cp1251", newline="") as f:
+        f.write("название;вопрос;ответ\n")
+        for i in range(10):
+            f.write(f"Набор;Вопрос {i};Ответ {i}\n")
+        f.write("Другой;Вопрос;Ответ\n")
+
+    grouped = parse_collections_file("cols.csv", str(path), limit=2)
+    assert grouped == {
+        "Набор": [("Вопрос 0", "Ответ 0"), ("Вопрос 1", "Ответ 1")],
+        "Другой": [("Вопрос", "Ответ")],
+    }
@@ -0,0 +1,111 @@
+import io
+import json
+import sqlite3
+import zipfile
+
+import pytest
+
+from app.services import importers
+from app.services.importers import parse_collections_file, parse_items_file
+
+
+def _make_apkg(tmp_path, notes, decks=None) -> bytes:
+    db_path = tmp_path / "collection.anki2"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE col (id INTEGER PRIMARY KEY, decks TEXT);
+        CREATE TABLE notes (id INTEGER PRIMARY KEY, flds TEXT);
+        CREATE TABLE cards (id INTEGER PRIMARY KEY, nid INTEGER, did INTEGER);
+        """)
+    decks = decks or {1: "Default"}
+    conn.execute(
+        "INSERT INTO col (id, decks) VALUES (1, ?)",
+        (json.dumps({str(k): {"name": v} for k, v in decks.items()}),),
+    )
+    for nid, (did, fields) in enumerate(notes, start=1):
+        conn.execute("INSERT INTO notes VALUES (?, ?)", (nid, "\x1f".join(fields)))
+        conn.execute("INSERT INTO cards VALUES (?, ?, ?)", (nid, nid, did))
+    conn.commit()
+    conn.close()
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.write(db_path, "collection.anki2")
+        zf.writestr("media", "{}")
+    return buf.getvalue()
+
+
+def test_parse_items_from_apkg_strips_markup(tmp_path):
+    data = _make_apkg(
+        tmp_path,
+        [
+            (1, ["<b>Столица</b> Франции", "Париж<br>[sound:paris.mp3]"]),
+            (1, ["столица  франции", "дубликат"]),
+            (1, ["{{c1::Волга}} впадает в", "Каспийское&nbsp;море"]),
+            (1, ["<img src='x.png'>", "без вопроса"]),
+        ],
+    )
+
+    pairs = parse_items_file("deck.apkg", data)
+    assert pairs == [
+        ("Столица Франции", "Париж"),
+        ("Волга впадает в", "Каспийское море"),
+    ]
+
+
+def test_parse_collections_from_apkg_groups_by_deck(tmp_path):
+    notes = [(2, [f"Q{i}", f"A{i}"]) for i in range(100)] + [(3, ["X", "Y"])]
+    data = _make_apkg(tmp_path, notes, decks={2: "Языки::Английский", 3: "Химия"})
+
+    path = tmp_path / "deck.apkg"
+    path.write_bytes(data)
+    grouped = parse_collections_file("deck.apkg", str(path), limit=3)
+    assert grouped == {
+        "Языки::Английский": [("Q0", "A0"), ("Q1", "A1"), ("Q2", "A2")],
+        "Химия": [("X", "Y")],
+    }
+
+
+def test_parse_apkg_rejects_broken_archive():
+    with pytest.raises(ValueError):
+        parse_items_file("deck.apkg", b"not a zip")
+
+
+def test_parse_apkg_rejects_oversized_database(tmp_path, monkeypatch):
+    data = _make_apkg(tmp_path, [(1, ["Q", "A"])])
+    monkeypatch.setattr(importers, "ANKI_MAX_DB_BYTES", 1024)
+    with pytest.raises(ValueError):
+        parse_items_file("deck.apkg", data)
+
+
+def test_anki_copy_stops_at_cap():
+    dst = io.BytesIO()
+    with pytest.raises(ValueError):
+        importers._copy_capped(io.BytesIO(b"x" * 100), dst, 10)
+    assert len(dst.getvalue()) <= 10
+
+    importers._copy_capped(io.BytesIO(b"x" * 10), dst, 10)
+    assert dst.getvalue() == b"x" * 10
+
+
+def test_parse_quizlet_export_text():
+    text = "кот\tcat\n\nсобака\tdog, hound\nбез разделителя\n"
+    assert parse_items_file("quizlet.txt", text.encode("utf-8")) == [
+        ("кот", "cat"),
+        ("собака", "dog, hound"),
+    ]
+
+    grouped = parse_collections_file("Животные.txt", text.encode("cp1251"))
+    assert grouped == {"Животные": [("кот", "cat"), ("собака", "dog, hound")]}
+
+
+def test_tab_separated_csv_with_headers_is_not_quizlet():
+    data = "term\tdefinition\nкот\tcat\n".encode("utf-8")
+    assert parse_items_file("cards.tsv", data) == [("кот", "cat")]
+
+
+def test_tab_separated_csv_with_unknown_headers_is_rejected():
+    data = "Термин\tОпределение\nкот\tcat\n".encode("utf-8")
+    for name in ("cards.tsv", "cards.csv"):
+        with pytest.raises(ValueError):
+            parse_items_file(name, data)
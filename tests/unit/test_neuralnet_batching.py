@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from neuralnet.batching import MicroBatcher
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_groups_concurrent_requests():
+    calls: list[list[int]] = []
+
+    def run_batch(items: list[int]) -> list[int]:
+        calls.append(list(items))
+        return [x * 10 for x in items]
+
+    batcher = MicroBatcher(run_batch, max_batch_size=4, max_wait_ms=50)
+    batcher.start()
+    try:
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(6)))
+    finally:
+        await batcher.stop()
+
+    assert results == [0, 10, 20, 30, 40, 50]
+    assert [len(c) for c in calls] == [4, 2]
+
+    snap = batcher.metrics.snapshot()
+    assert snap["batches"] == 2
+    assert snap["items"] == 6
+    assert snap["fill_ratio"] == pytest.approx(6 / 8)
+    assert snap["max_queue_wait_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_propagates_errors_to_all_waiters():
+    def run_batch(items: list[str]) -> list[str]:
+        raise ValueError("model error")
+
+    batcher = MicroBatcher(run_batch, max_batch_size=2, max_wait_ms=20)
+    batcher.start()
+    try:
+        results = await asyncio.gather(
+            batcher.submit("a"), batcher.submit("b"), return_exceptions=True
+        )
+    finally:
+        await batcher.stop()
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert batcher.metrics.failed_batches == 1
@@ -1,6 +1,7 @@
 import pytest
 
 from app.models.online_room import MAX_PLAYERS_PER_ROOM, OnlineRoom, RoomPlayer
+from app.services import online_mode
 from app.services.redis_kv import RedisKV
 
 
@@ -19,7 +20,6 @@ def _make_room() -> OnlineRoom:
         finished_at=None,
         deep_link=None,
         players=[],
-        answered_user_ids=[],
         question_deadline_ts=None,
         last_q_msg_ids={},
         owner_wait_chat_id=None,
@@ -85,7 +85,6 @@ async def test_room_to_from_dict_roundtrip(redis_kv: RedisKV):
     room.players = [
         RoomPlayer(user_id=1, username="u1", score=3, total_answer_time=1.5)
     ]
-    room.answered_user_ids = [1]
     room.question_deadline_ts = 123.45
     room.last_q_msg_ids = {1: 10}
     room.owner_wait_chat_id = 100
@@ -154,3 +153,41 @@ async def test_set_room_deep_link(redis_kv: RedisKV):
     )
     assert updated is not None
     assert updated.deep_link == "link"
+
+
+def test_delivered_at_roundtrip():
+    room = _make_room()
+    room.delivered_at = {"2": 101.5}
+    restored = OnlineRoom.from_dict(room.to_dict())
+    assert restored.delivered_at == {"2": 101.5}
+
+    room.remove_player(2)
+    assert room.delivered_at == {}
+
+
+def test_apply_scores_updates_known_players():
+    room = _make_room()
+    room.players = [RoomPlayer(user_id=2), RoomPlayer(user_id=3, score=1)]
+    room.apply_scores({2: (10, 4.5), 99: (7, 1.0)})
+    assert (room.players[0].score, room.players[0].total_answer_time) == (10, 4.5)
+    assert room.players[1].score == 1
+
+
+@pytest.mark.asyncio
+async def test_resolve_player_names_uses_cache(async_session_maker, monkeypatch):
+    players = [
+        RoomPlayer(user_id=7101, username="p1"),
+        RoomPlayer(user_id=7102, username=None),
+    ]
+    await online_mode.resolve_player_names(async_session_maker, players)
+    assert [p.name for p in players] == ["p1", "id7102"]
+
+    def _no_db(*args, **kwargs):
+        raise AssertionError("names are cached on the players")
+
+    monkeypatch.setattr(online_mode, "with_repos", _no_db)
+    await online_mode.resolve_player_names(async_session_maker, players)
+    assert online_mode.scoreboard_lines(players) == [
+        "1. p1 — 0 очков",
+        "2. id7102 — 0 очков",
+    ]
@@ -0,0 +1,93 @@
+import pytest
+
+from app.models.collection import Collection, CollectionItem
+from app.models.online_room import OnlineRoom, RoomDeck
+from app.models.user import User
+from app.services import online_mode
+from app.services.online_mode import drop_room_deck, get_room_deck, snapshot_room_deck
+from app.services.solo_mode import SoloData
+
+
+async def _make_room(
+    async_session_maker, tg_id: int = 9100, title: str = "Колода", game_id: str = "g1"
+) -> OnlineRoom:
+    async with async_session_maker() as session:
+        u = User(tg_id=tg_id, username=f"deck-owner-{tg_id}")
+        session.add(u)
+        await session.flush()
+
+        col = Collection(owner_id=u.id, title=title)
+        session.add(col)
+        await session.flush()
+
+        items = [
+            CollectionItem(
+                collection_id=col.id, question=f"Q{i}", answer=f"A{i}", position=i
+            )
+            for i in range(1, 4)
+        ]
+        session.add_all(items)
+        await session.commit()
+        item_ids = [it.id for it in items]
+        collection_id = col.id
+
+    return OnlineRoom(
+        room_id="555000",
+        owner_id=tg_id,
+        collection_id=collection_id,
+        seconds_per_question=10,
+        points_per_correct=1,
+        game_id=game_id,
+        order=item_ids[:2],
+    )
+
+
+def test_room_deck_roundtrip():
+    deck = RoomDeck(title="T", items={1: ("q", "a"), 2: ("q2", "a2")})
+    assert RoomDeck.from_dict(deck.to_dict()) == deck
+
+
+@pytest.mark.asyncio
+async def test_room_deck_snapshot_is_served_without_db(
+    async_session_maker, redis_kv, monkeypatch
+):
+    room = await _make_room(async_session_maker)
+
+    deck = await snapshot_room_deck(async_session_maker, redis_kv, room)
+    assert deck.title == "Колода"
+    assert set(deck.items) == set(room.order)
+    assert deck.items[room.order[0]] == ("Q1", "A1")
+
+    async def _no_db(*args, **kwargs):
+        raise AssertionError("deck must not hit the database")
+
+    monkeypatch.setattr(SoloData, "get_collection_deck", _no_db)
+
+    assert await get_room_deck(async_session_maker, redis_kv, room) is deck
+
+    online_mode._room_decks.clear()
+    restored = await get_room_deck(async_session_maker, redis_kv, room)
+    assert restored == deck
+
+    await drop_room_deck(redis_kv, room)
+    assert not online_mode._room_decks
+    deck_key = OnlineRoom._deck_key(redis_kv, room.room_id, room.game_id)
+    assert await redis_kv.get_json(deck_key) is None
+
+
+@pytest.mark.asyncio
+async def test_reused_room_id_does_not_serve_previous_game_deck(
+    async_session_maker, redis_kv
+):
+    room = await _make_room(async_session_maker, tg_id=9200)
+    old = await snapshot_room_deck(async_session_maker, redis_kv, room)
+
+    reused = await _make_room(
+        async_session_maker, tg_id=9201, title="Другая", game_id="g2"
+    )
+    assert reused.room_id == room.room_id
+
+    deck = await get_room_deck(async_session_maker, redis_kv, reused)
+    assert deck is not old
+    assert deck.title == "Другая"
+    assert set(deck.items) == set(reused.order)
@@ -29,14 +29,12 @@ def test_top_players_sorts_by_score_and_time():
     assert [p.user_id for p in top] == [2, 1, 3]
 
 
-def test_remove_player_cleans_answered_and_last_q_ids():
+def test_remove_player_cleans_last_q_ids():
     room = _room_with_players()
-    room.answered_user_ids = [1, 2, 3]
     room.last_q_msg_ids = {"1": 11, "2": 22, "3": 33}
     room.remove_player(2)
     ids = [p.user_id for p in room.players]
     assert ids == [1, 3]
-    assert room.answered_user_ids == [1, 3]
     assert room.last_q_msg_ids == {"1": 11, "3": 33}
 
 
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.middlewares.user_state import UserStateMiddleware
+from app.models.online_room import OnlineRoom
+from app.services.read_cache import ReadCache
+
+
+@pytest.mark.asyncio
+async def test_read_cache_coalesces_and_memoizes(redis_kv, fake_redis):
+    await redis_kv.set_json("test:a", {"v": 1})
+    await redis_kv.set_json("test:b", {"v": 2})
+
+    calls = []
+    orig = fake_redis.mget
+
+    async def counting_mget(keys):
+        calls.append(list(keys))
+        return await orig(keys)
+
+    fake_redis.mget = counting_mget
+
+    reads = ReadCache(redis_kv)
+    await reads.prefetch(["test:a", "test:b", "test:missing", "test:a"])
+    assert await reads.get_json("test:a") == {"v": 1}
+    assert await reads.get_json("test:b") == {"v": 2}
+    assert await reads.get_json("test:missing") is None
+    assert calls == [["test:a", "test:b", "test:missing"]]
+    assert reads.round_trips == 1
+
+    reads.forget("test:a")
+    assert await reads.get_json("test:a") == {"v": 1}
+    assert reads.round_trips == 2
+
+
+@pytest.mark.asyncio
+async def test_middleware_prefetches_room_for_filters(redis_kv, fake_redis):
+    room = await OnlineRoom.create(
+        redis_kv,
+        owner_id=1,
+        collection_id=10,
+        item_ids=[1, 2],
+        seconds_per_question=30,
+        points_per_correct=5,
+    )
+    await OnlineRoom.set_user_room(redis_kv, 2, room.room_id)
+    seen = {}
+
+    async def handler(event, data):
+        async def no_get(key):
+            raise AssertionError("room should come from the read cache")
+
+        fake_redis.get = no_get
+        seen["room"] = await OnlineRoom.load_by_user(
+            redis_kv, 2, data["user_state"], data["reads"]
+        )
+        seen["round_trips"] = data["reads"].round_trips
+
+    mw = UserStateMiddleware(redis_kv)
+    await mw(handler, object(), {"event_from_user": SimpleNamespace(id=2)})
+
+    assert seen["room"].room_id == room.room_id
+    assert seen["round_trips"] == 1
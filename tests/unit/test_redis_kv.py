@@ -8,7 +8,7 @@ async def test_key_building_and_pending(redis_kv: RedisKV):
     k = redis_kv._key("foo", 1, "bar")
     assert k.startswith("test:")
     assert k.endswith("foo:1:bar")
-    assert redis_kv.pending_key(42) == "test:pending:42"
+    assert redis_kv.user_state_key(42) == "test:user_state:42"
 
 
 @pytest.mark.asyncio
@@ -22,3 +22,43 @@ async def test_set_get_delete_json(redis_kv: RedisKV):
 
     await redis_kv.delete(key)
     assert await redis_kv.get_json(key) is None
+
+
+@pytest.mark.asyncio
+async def test_user_state_slots_and_expiry(redis_kv: RedisKV, monkeypatch):
+    from app.services import redis_kv as redis_kv_module
+
+    await redis_kv.set_state(5, "pending", {"type": "col:new"})
+    await redis_kv.set_state(5, "room", {"room_id": "123456"}, ex=10)
+    assert await redis_kv.get_state(5, "pending") == {"type": "col:new"}
+    assert await redis_kv.load_states(5) == {
+        "pending": {"type": "col:new"},
+        "room": {"room_id": "123456"},
+    }
+
+    now = redis_kv_module.time.time()
+    monkeypatch.setattr(redis_kv_module.time, "time", lambda: now + 60)
+    assert await redis_kv.get_state(5, "room") is None
+    assert await redis_kv.load_states(5) == {"pending": {"type": "col:new"}}
+
+    await redis_kv.clear_state(5, "pending")
+    assert await redis_kv.load_states(5) == {}
+
+
+@pytest.mark.asyncio
+async def test_user_state_middleware_loads_states_once(redis_kv: RedisKV):
+    from types import SimpleNamespace
+
+    from app.middlewares.user_state import UserStateMiddleware
+
+    await redis_kv.set_state(3, "online_join", {"kind": "online_join"})
+    seen = {}
+
+    async def handler(event, data):
+        seen.update(data)
+        return "ok"
+
+    mw = UserStateMiddleware(redis_kv)
+    res = await mw(handler, object(), {"event_from_user": SimpleNamespace(id=3)})
+    assert res == "ok"
+    assert seen["user_state"] == {"online_join": {"kind": "online_join"}}
@@ -30,8 +30,8 @@ async def test_redis_kv_with_asyncmock_roundtrip():
 
 
 @pytest.mark.asyncio
-async def test_redis_kv_pending_key_with_async_client():
+async def test_redis_kv_user_state_key_with_async_client():
     client = AsyncMock()
     kv = RedisKV(client=client, prefix="edge", ttl_seconds=1)
-    key = kv.pending_key(42)
-    assert key.endswith("pending:42")
+    key = kv.user_state_key(42)
+    assert key.endswith("user_state:42")
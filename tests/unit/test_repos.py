@@ -91,3 +91,102 @@ async def test_items_repo_crud_and_counts(db_session):
     assert isinstance(deleted_count, int)
     assert deleted_count >= 1
     assert await items.count_in_collection(col.id) == 0
+
+
+@pytest.mark.asyncio
+async def test_collections_repo_list_page_by_user(db_session):
+    users = UsersRepo(db_session)
+    cols = CollectionsRepo(db_session)
+    items = ItemsRepo(db_session)
+
+    u = await users.get_or_create(2, "user2")
+    created = [await cols.create(u.id, f"P{i}") for i in range(5)]
+    await items.add(created[0].id, "Q1", "A1")
+    await items.add(created[0].id, "Q2", "A2")
+
+    first = await cols.list_page_by_user(u.id, page=0, per_page=2)
+    assert first.total == 5
+    assert first.total_pages == 3
+    assert [c.title for c in first.items] == ["P0", "P1"]
+    assert first.items[0].items_count == 2
+    assert first.items[1].items_count == 0
+    assert not first.has_prev and first.has_next
+
+    last = await cols.list_page_by_user(u.id, page=2, per_page=2)
+    assert [c.title for c in last.items] == ["P4"]
+    assert last.has_prev and not last.has_next
+
+    clamped = await cols.list_page_by_user(u.id, page=10, per_page=2)
+    assert clamped.page == 2
+    assert [c.title for c in clamped.items] == ["P4"]
+
+    empty = await cols.list_page_by_user(9999, page=3, per_page=2)
+    assert empty.total == 0
+    assert empty.page == 0
+    assert empty.items == []
+
+
+@pytest.mark.asyncio
+async def test_items_repo_add_many_skips_duplicates_and_respects_limit(db_session):
+    users = UsersRepo(db_session)
+    cols = CollectionsRepo(db_session)
+    items = ItemsRepo(db_session)
+
+    u = await users.get_or_create(3, "user3")
+    col = await cols.create(u.id, "Bulk")
+    await items.add(col.id, "Q1", "A1")
+
+    added = await items.add_many(
+        col.id,
+        [("Q1", "dup"), ("Q2", "A2"), ("Q2", "dup"), ("Q3", "A3"), ("Q4", "A4")],
+        limit=3,
+    )
+    assert added == 2
+    assert await items.list_question_answer_pairs(col.id) == [
+        ("Q1", "A1"),
+        ("Q2", "A2"),
+        ("Q3", "A3"),
+    ]
+
+    assert await items.add_many(col.id, [("Q2", "again")]) == 0
+    assert await items.add_many(col.id, []) == 0
+
+
+@pytest.mark.asyncio
+async def test_collections_repo_clone_copies_items(db_session):
+    users = UsersRepo(db_session)
+    cols = CollectionsRepo(db_session)
+    items = ItemsRepo(db_session)
+
+    owner = await users.get_or_create(4, "owner")
+    friend = await users.get_or_create(5, "friend")
+    src = await cols.create(owner.id, "Shared")
+    await items.add_many(src.id, [("Q1", "A1"), ("Q2", "A2")])
+
+    copy = await cols.clone(src.id, friend.id)
+    assert copy is not None
+    assert copy.id != src.id
+    assert copy.owner_id == friend.id
+    assert copy.title == "Shared"
+    assert await items.list_question_answer_pairs(copy.id) == [
+        ("Q1", "A1"),
+        ("Q2", "A2"),
+    ]
+
+    assert await cols.clone(99999, friend.id) is None
+
+
+@pytest.mark.asyncio
+async def test_users_repo_get_or_create_many(db_session):
+    repo = UsersRepo(db_session)
+    await repo.get_or_create(tg_id=7001, username="known")
+
+    users = await repo.get_or_create_many({7001: "renamed", 7002: "new", 7003: None})
+    assert set(users) == {7001, 7002, 7003}
+    assert users[7001].username == "known"
+    assert users[7002].username == "new"
+    assert users[7003].username is None
+
+    found = await repo.get_many_by_tg_ids([7002, 7003, 9999])
+    assert set(found) == {7002, 7003}
+    assert await repo.get_many_by_tg_ids([]) == {}
@@ -0,0 +1,215 @@
+import asyncio
+import time
+
+import fakeredis
+import pytest
+
+from app.services import online_mode
+from app.services.redis_kv import RedisKV
+from app.services.room_scheduler import RoomScheduler
+
+
+@pytest.fixture
+def kv() -> RedisKV:
+    return RedisKV(client=fakeredis.FakeAsyncRedis(), prefix="test", ttl_seconds=60)
+
+
+async def _drain(scheduler: RoomScheduler) -> None:
+    while scheduler.in_flight:
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_due_room_is_ticked_and_rescheduled(kv: RedisKV):
+    calls = []
+
+    async def handler(room_id):
+        calls.append(room_id)
+        return 1000.0 if len(calls) == 1 else None
+
+    scheduler = RoomScheduler(kv, handler, worker_id="w1")
+    await scheduler.schedule("r1", 10.0)
+    await scheduler.schedule("r2", time.time() + 3600)
+
+    assert await scheduler.poll_once(now=20.0) == 1
+    await _drain(scheduler)
+    assert calls == ["r1"]
+    assert await kv.client.zscore(scheduler.schedule_key, "r1") == 1000.0
+    assert await kv.client.get(scheduler.lease_key("r1")) is None
+
+    assert await scheduler.poll_once(now=1000.0) == 1
+    await _drain(scheduler)
+    assert calls == ["r1", "r1"]
+    assert await kv.client.zscore(scheduler.schedule_key, "r1") is None
+
+
+@pytest.mark.asyncio
+async def test_leased_room_is_skipped_by_other_workers(kv: RedisKV):
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow(room_id):
+        started.set()
+        await release.wait()
+
+    async def never(room_id):
+        raise AssertionError("room is leased by another worker")
+
+    w1 = RoomScheduler(kv, slow, worker_id="w1")
+    w2 = RoomScheduler(kv, never, worker_id="w2")
+    await w1.schedule("r1", 1.0)
+
+    assert await w1.poll_once(now=2.0) == 1
+    await started.wait()
+    assert await w2.poll_once(now=2.0) == 0
+
+    release.set()
+    await _drain(w1)
+    assert await kv.client.zcard(w1.schedule_key) == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_tick_is_retried_later(kv: RedisKV):
+    async def boom(room_id):
+        raise RuntimeError("boom")
+
+    scheduler = RoomScheduler(kv, boom, worker_id="w1", retry_delay_sec=5.0)
+    await scheduler.schedule("r1", 1.0)
+
+    before = time.time()
+    await scheduler.poll_once(now=2.0)
+    await _drain(scheduler)
+
+    due = await kv.client.zscore(scheduler.schedule_key, "r1")
+    assert due >= before + 5.0
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_lets_another_worker_resume(kv: RedisKV):
+    seen = []
+
+    async def handler(room_id):
+        seen.append(room_id)
+
+    await kv.client.set("test:online:lease:r1", "dead-worker", px=1)
+    scheduler = RoomScheduler(kv, handler, worker_id="w2")
+    await scheduler.schedule("r1", 1.0)
+    await asyncio.sleep(0.01)
+
+    assert await scheduler.poll_once(now=2.0) == 1
+    await _drain(scheduler)
+    assert seen == ["r1"]
+
+
+@pytest.mark.asyncio
+async def test_sync_loads_upcoming_rooms_into_wheel(kv: RedisKV):
+    async def handler(room_id):
+        return None
+
+    scheduler = RoomScheduler(kv, handler, worker_id="w1", poll_interval_sec=1.0)
+    now = time.time()
+    await kv.client.zadd(scheduler.schedule_key, {"soon": now + 1.0, "later": now + 60})
+
+    assert await scheduler.sync(now) == 1
+    assert scheduler.stats()["pending_timers"] == 1
+
+    assert await scheduler.fire(now) == 0
+    assert await scheduler.fire(now + 1.1) == 1
+    await _drain(scheduler)
+    assert await kv.client.zscore(scheduler.schedule_key, "soon") is None
+
+
+@pytest.mark.asyncio
+async def test_wake_moves_room_forward_only(kv: RedisKV):
+    async def handler(room_id):
+        return None
+
+    scheduler = RoomScheduler(kv, handler, worker_id="w1")
+    later = time.time() + 30
+    await scheduler.schedule("r1", later)
+
+    await scheduler.wake("r1")
+    assert await kv.client.zscore(scheduler.schedule_key, "r1") <= time.time()
+    assert scheduler.wheel.due_of("r1") <= time.time()
+
+    await scheduler.wake("missing")
+    assert await kv.client.zscore(scheduler.schedule_key, "missing") is None
+
+    await asyncio.sleep(scheduler.tick_sec)
+    assert await scheduler.fire() == 1
+    await _drain(scheduler)
+
+
+@pytest.mark.asyncio
+async def test_wake_during_tick_is_not_overwritten_by_reschedule(kv: RedisKV):
+    async def handler(room_id):
+        await scheduler.wake(room_id)
+        return time.time() + 3600
+
+    scheduler = RoomScheduler(kv, handler, worker_id="w1")
+    await scheduler.schedule("r1", 1.0)
+    assert await scheduler.poll_once(now=2.0) == 1
+    await _drain(scheduler)
+
+    assert await kv.client.zscore(scheduler.schedule_key, "r1") <= time.time()
+    assert scheduler.wheel.due_of("r1") <= time.time()
+    assert await kv.client.get(scheduler.wake_key("r1")) is None
+
+
+@pytest.mark.asyncio
+async def test_run_room_loop_is_woken_early(monkeypatch, redis_kv):
+    ticks = []
+
+    async def fake_tick(room_id, *args, **kwargs):
+        ticks.append(time.monotonic())
+        return time.time() + 30 if len(ticks) == 1 else None
+
+    monkeypatch.setattr(online_mode, "room_tick", fake_tick)
+
+    task = asyncio.create_task(
+        online_mode.run_room_loop("r1", None, redis_kv, bot=None, broadcaster=None)
+    )
+    while not ticks:
+        await asyncio.sleep(0)
+    online_mode.wake_room("r1")
+    await asyncio.wait_for(task, 1.0)
+
+    assert len(ticks) == 2
+    assert "r1" not in online_mode._room_wakeups
+
+
+@pytest.mark.asyncio
+async def test_lease_is_renewed_while_tick_runs(kv: RedisKV):
+    async def slow(room_id):
+        await asyncio.sleep(0.5)
+
+    scheduler = RoomScheduler(kv, slow, worker_id="w1", lease_sec=0.2)
+    await scheduler.schedule("r1", 1.0)
+    assert await scheduler.poll_once(now=2.0) == 1
+
+    await asyncio.sleep(0.35)
+    assert await kv.client.get(scheduler.lease_key("r1")) == b"w1"
+    await _drain(scheduler)
+    assert await kv.client.get(scheduler.lease_key("r1")) is None
+    assert await kv.client.zscore(scheduler.schedule_key, "r1") is None
+
+
+@pytest.mark.asyncio
+async def test_tick_is_aborted_when_lease_is_lost(kv: RedisKV):
+    finished = []
+
+    async def slow(room_id):
+        await asyncio.sleep(1.0)
+        finished.append(room_id)
+        return 5000.0
+
+    scheduler = RoomScheduler(kv, slow, worker_id="w1", lease_sec=0.15)
+    await scheduler.schedule("r1", 1.0)
+    assert await scheduler.poll_once(now=2.0) == 1
+
+    await kv.client.set(scheduler.lease_key("r1"), "w2")
+    await _drain(scheduler)
+
+    assert finished == []
+    assert await kv.client.get(scheduler.lease_key("r1")) == b"w2"
+    assert await kv.client.zscore(scheduler.schedule_key, "r1") == 1.0
@@ -0,0 +1,117 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.services.redis_kv import RedisKV
+from app.services.room_state import (
+    ANSWER_ACCEPTED,
+    ANSWER_DUPLICATE,
+    ANSWER_LATE,
+    ANSWER_STALE,
+    RoomState,
+)
+
+
+@pytest.fixture
+def state() -> RoomState:
+    kv = RedisKV(client=fakeredis.FakeAsyncRedis(), prefix="test", ttl_seconds=60)
+    return RoomState(kv, "123456")
+
+
+@pytest.mark.asyncio
+async def test_record_answer_scores_and_dedups(state: RoomState):
+    await state.open_question(0, 130.0, 30, 5)
+    assert not await state.set_delivered(0, {"2": 101.0, "3": 102.0}, 132.0)
+
+    r1 = await state.record_answer(2, 0, True, 104.5)
+    assert r1.status == ANSWER_ACCEPTED
+    assert r1.answer_time == pytest.approx(3.5)
+
+    r2 = await state.record_answer(2, 0, True, 105.0)
+    assert r2.status == ANSWER_DUPLICATE
+
+    assert not r1.all_answered
+
+    r3 = await state.record_answer(3, 0, False, 110.0)
+    assert r3.accepted
+    assert r3.all_answered
+
+    assert await state.answered(0) == {2, 3}
+    scores = await state.scores()
+    assert scores[2] == (5, pytest.approx(3.5))
+    assert scores[3] == (0, pytest.approx(8.0))
+
+
+@pytest.mark.asyncio
+async def test_record_answer_rejects_late_and_stale(state: RoomState):
+    await state.open_question(1, 130.0, 30, 5)
+
+    assert (await state.record_answer(2, 0, True, 110.0)).status == ANSWER_STALE
+    assert (await state.record_answer(2, 1, True, 131.0)).status == ANSWER_LATE
+
+    await state.close_question()
+    assert (await state.record_answer(3, 1, True, 110.0)).status == ANSWER_LATE
+    assert await state.scores() == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_answers_are_not_lost(state: RoomState):
+    await state.open_question(0, 200.0, 30, 10)
+
+    results = await asyncio.gather(
+        *(state.record_answer(uid, 0, True, 175.0) for uid in range(1, 31))
+    )
+    assert all(r.accepted for r in results)
+
+    scores = await state.scores()
+    assert len(scores) == 30
+    assert all(score == 10 for score, _ in scores.values())
+
+    await state.clear(last_index=0)
+    assert await state.scores() == {}
+    assert await state.answered(0) == set()
+
+
+@pytest.mark.asyncio
+async def test_answer_script_is_registered_once(state: RoomState, monkeypatch):
+    client = state.redis_kv.client
+    calls = []
+    register = client.register_script
+
+    def counting(source):
+        calls.append(source)
+        return register(source)
+
+    monkeypatch.setattr(client, "register_script", counting)
+    await state.open_question(0, 200.0, 30, 10)
+    for uid in (1, 2, 3):
+        await RoomState(state.redis_kv, state.room_id).record_answer(
+            uid, 0, True, 175.0
+        )
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_only_delivered_answerers_close_the_question(state: RoomState):
+    await state.open_question(0, 200.0, 30, 5)
+
+    early = await state.record_answer(9, 0, True, 171.0)
+    assert early.accepted and not early.all_answered
+
+    assert not await state.set_delivered(0, {"2": 170.0, "3": 170.5}, 200.5)
+
+    r = await state.record_answer(2, 0, True, 175.0)
+    assert r.accepted and not r.all_answered
+
+    r = await state.record_answer(3, 0, True, 176.0)
+    assert r.all_answered
+
+
+@pytest.mark.asyncio
+async def test_set_delivered_counts_answers_recorded_before_it(state: RoomState):
+    await state.open_question(0, 200.0, 30, 5)
+    await state.record_answer(2, 0, True, 171.0)
+    await state.record_answer(5, 0, True, 171.5)
+
+    assert await state.set_delivered(0, {"2": 170.0}, 200.0)
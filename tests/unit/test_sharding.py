@@ -0,0 +1,102 @@
+import asyncio
+import multiprocessing
+import time
+
+import pytest
+
+from app.sharding import KeyedSerialRunner, shard_for, stop_workers, update_user_id
+
+
+def _callback(update_id: int, user_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": user_id, "is_bot": False, "first_name": "u"},
+            "chat_instance": "x",
+            "data": "solo:show",
+        },
+    }
+
+
+def test_updates_of_one_user_land_on_one_shard():
+    assert update_user_id(_callback(1, 42)) == 42
+    assert update_user_id({"update_id": 3, "poll": {"id": "p"}}) is None
+    assert (
+        update_user_id(
+            {"update_id": 4, "my_chat_member": {"chat": {"id": -100}, "date": 0}}
+        )
+        == -100
+    )
+
+    shards = {shard_for(_callback(i, 42), 4) for i in range(20)}
+    assert len(shards) == 1
+    assert {shard_for(_callback(1, uid), 4) for uid in range(8)} == {0, 1, 2, 3}
+
+
+@pytest.mark.asyncio
+async def test_keyed_runner_keeps_per_key_order_and_overlaps_keys():
+    runner = KeyedSerialRunner(max_concurrent=10)
+    log = []
+
+    def job(key, n, delay):
+        async def run():
+            log.append(("start", key, n))
+            await asyncio.sleep(delay)
+            log.append(("end", key, n))
+
+        return run
+
+    runner.submit(1, job(1, 0, 0.02))
+    runner.submit(1, job(1, 1, 0.0))
+    runner.submit(2, job(2, 0, 0.0))
+    await runner.drain()
+
+    ones = [e for e in log if e[1] == 1]
+    assert ones == [("start", 1, 0), ("end", 1, 0), ("start", 1, 1), ("end", 1, 1)]
+    assert log.index(("end", 2, 0)) < log.index(("end", 1, 0))
+    assert runner.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_keyed_runner_survives_failing_job():
+    runner = KeyedSerialRunner()
+    done = []
+
+    async def boom():
+        raise ValueError("boom")
+
+    async def ok():
+        done.append(True)
+
+    runner.submit(7, boom)
+    runner.submit(7, ok)
+    await runner.drain()
+    assert done == [True]
+
+
+class _StuckProcess:
+    def __init__(self) -> None:
+        self.alive = True
+
+    def join(self, timeout=None) -> None:
+        if timeout:
+            time.sleep(min(timeout, 0.01))
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def terminate(self) -> None:
+        self.alive = False
+
+
+def test_stop_workers_does_not_hang_on_full_queue():
+    q = multiprocessing.Queue(maxsize=1)
+    q.put({"update_id": 1})
+    proc = _StuckProcess()
+
+    started = time.monotonic()
+    stop_workers([q], [proc], timeout=0.2)
+
+    assert time.monotonic() - started < 2.0
+    assert not proc.alive
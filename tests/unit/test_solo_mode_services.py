@@ -8,7 +8,10 @@ from app.services.solo_mode import (
     SoloData,
     drop_solo_session,
     load_solo_session,
+    mark_solo_card,
+    save_solo_hints,
     save_solo_session,
+    set_solo_showing_answer,
     start_new_solo_session,
 )
 
@@ -113,3 +116,88 @@ async def test_start_new_solo_session_avoids_same_order(redis_kv: RedisKV):
     assert sorted(sess.order) == sorted(item_ids)
     if len(item_ids) > 1:
         assert sess.order != avoid_order
+
+
+@pytest.mark.asyncio
+async def test_solo_clicks_update_hash_fields_in_place(redis_kv: RedisKV, fake_redis):
+    sess = await start_new_solo_session(
+        redis_kv, user_id=3, collection_id=10, item_ids=[1, 2], ttl=30
+    )
+    first, second = sess.order
+
+    executed = []
+    orig_pipeline = fake_redis.pipeline
+
+    def counting_pipeline(transaction=True):
+        executed.append(1)
+        return orig_pipeline(transaction)
+
+    fake_redis.pipeline = counting_pipeline
+
+    head = await load_solo_session(redis_kv, 3, full=False)
+    assert head.order == sess.order and head.stats == {}
+
+    await set_solo_showing_answer(redis_kv, head, True, ttl=30)
+    head.last_ts -= 4
+    await mark_solo_card(redis_kv, head, "unknown", ttl=30)
+    await mark_solo_card(redis_kv, head, None, ttl=30)
+    assert len(executed) == 3
+
+    full = await load_solo_session(redis_kv, 3)
+    assert full.done
+    assert full.showing_answer is False
+    assert full.stats == {str(first): "unknown", str(second): "neutral"}
+    assert full.per_item_sec[str(first)] >= 4
+    assert full.total_sec == sum(full.per_item_sec.values())
+    assert full.wrong_ids() == [first]
+
+    head.hints[str(second)] = ["h1"]
+    await save_solo_hints(redis_kv, head)
+    assert (await load_solo_session(redis_kv, 3, full=False)).hints == {
+        str(second): ["h1"]
+    }
+
+
+@pytest.mark.asyncio
+async def test_solo_deck_is_cached_until_invalidated(
+    async_session_maker, redis_kv: RedisKV, monkeypatch
+):
+    from app.services import solo_mode
+
+    async with async_session_maker() as session:
+        col = Collection(owner_id=1, title="Deck")
+        session.add(col)
+        await session.flush()
+        item = CollectionItem(
+            collection_id=col.id, question="Q", answer="A", position=1
+        )
+        session.add(item)
+        await session.commit()
+        collection_id, item_id = col.id, item.id
+
+    deck = await solo_mode.get_solo_deck(async_session_maker, redis_kv, collection_id)
+    assert deck.title == "Deck" and deck.items == {item_id: ("Q", "A")}
+
+    async def no_db(self, collection_id):
+        raise AssertionError("deck should be served from the snapshot")
+
+    monkeypatch.setattr(SoloData, "get_collection_deck", no_db)
+    assert (
+        await solo_mode.get_solo_deck(async_session_maker, redis_kv, collection_id)
+        == deck
+    )
+    solo_mode._solo_decks.clear()
+    assert (
+        await solo_mode.get_solo_deck(async_session_maker, redis_kv, collection_id)
+        == deck
+    )
+
+    monkeypatch.undo()
+    async with async_session_maker() as session:
+        row = await session.get(CollectionItem, item_id)
+        row.answer = "A2"
+        await session.commit()
+    await solo_mode.invalidate_solo_deck(redis_kv, collection_id)
+
+    fresh = await solo_mode.get_solo_deck(async_session_maker, redis_kv, collection_id)
+    assert fresh.items == {item_id: ("Q", "A2")}
@@ -25,38 +25,32 @@ def test_solo_session_mark_and_next_when_done_does_not_move():
 
 
 @pytest.mark.asyncio
-async def test_load_solo_session_missing_raw_returns_none(monkeypatch):
-    class DummyKV:
-        async def get_json(self, key):
-            return None
-
-    sess = await load_solo_session(DummyKV(), user_id=1)
+async def test_load_solo_session_missing_raw_returns_none(redis_kv):
+    sess = await load_solo_session(redis_kv, user_id=1)
     assert sess is None
 
 
 @pytest.mark.asyncio
-async def test_load_solo_session_restores_basic_fields(monkeypatch):
-    class DummyKV:
-        def __init__(self):
-            self.payload = {
-                "user_id": 2,
-                "collection_id": 10,
-                "order": ["1", "2"],
-                "index": 1,
-                "showing_answer": True,
-                "started_at": "2024-01-01T00:00:00Z",
-                "seed": 123,
-                "stats": {"1": "known"},
-                "per_item_sec": {"1": 5},
-                "hints": {"1": ["h1"]},
-                "total_sec": 5,
-                "last_ts": 10.0,
-            }
-
-        async def get_json(self, key):
-            return self.payload
+async def test_load_solo_session_migrates_legacy_blob(redis_kv):
+    await redis_kv.set_json(
+        redis_kv._key("solo", 1),
+        {
+            "user_id": 2,
+            "collection_id": 10,
+            "order": ["1", "2"],
+            "index": 1,
+            "showing_answer": True,
+            "started_at": "2024-01-01T00:00:00Z",
+            "seed": 123,
+            "stats": {"1": "known"},
+            "per_item_sec": {"1": 5},
+            "hints": {"1": ["h1"]},
+            "total_sec": 5,
+            "last_ts": 10.0,
+        },
+    )
 
-    sess = await load_solo_session(DummyKV(), user_id=1)
+    sess = await load_solo_session(redis_kv, user_id=1)
     assert sess is not None
     assert sess.user_id == 2
     assert sess.collection_id == 10
@@ -66,3 +60,5 @@ async def test_load_solo_session_restores_basic_fields(monkeypatch):
     assert sess.stats == {"1": "known"}
     assert sess.per_item_sec == {"1": 5}
     assert sess.hints == {"1": ["h1"]}
+    assert await redis_kv.get_json(redis_kv._key("solo", 1)) is None
+    assert await load_solo_session(redis_kv, user_id=2) == sess
@@ -0,0 +1,60 @@
+import random
+
+from app.services.timer_wheel import TimerWheel
+
+
+def test_fires_in_due_order_across_levels():
+    wheel = TimerWheel(tick_sec=1.0, slots=4, levels=2, now=0.0)
+    wheel.schedule("a", 2.0)
+    wheel.schedule("b", 9.0)
+    wheel.schedule("c", 40.0)
+    assert wheel.pending == 3
+
+    assert wheel.advance(1.0) == []
+    assert wheel.advance(2.0) == ["a"]
+    assert wheel.advance(8.5) == []
+    assert wheel.advance(9.0) == ["b"]
+    assert wheel.pending_by_level()["overflow"] == 1
+    assert wheel.advance(39.0) == []
+    assert wheel.advance(40.0) == ["c"]
+    assert wheel.pending == 0
+
+
+def test_reschedule_and_cancel():
+    wheel = TimerWheel(tick_sec=0.5, slots=8, levels=3, now=100.0)
+    wheel.schedule("room", 105.0)
+    wheel.schedule("room", 101.0)
+    wheel.schedule("gone", 102.0)
+    assert wheel.due_of("room") == 101.0
+    assert wheel.cancel("gone")
+    assert not wheel.cancel("gone")
+
+    assert wheel.advance(101.0) == ["room"]
+    assert wheel.advance(200.0) == []
+    assert wheel.pending == 0
+
+
+def test_past_due_fires_on_next_advance():
+    wheel = TimerWheel(tick_sec=0.1, now=50.0)
+    wheel.schedule("late", 10.0)
+    assert wheel.advance(50.0) == ["late"]
+
+
+def test_never_fires_early_for_random_timers():
+    rnd = random.Random(7)
+    wheel = TimerWheel(tick_sec=0.1, slots=16, levels=3, now=0.0)
+    due = {f"t{i}": rnd.uniform(0.0, 600.0) for i in range(500)}
+    for key, ts in due.items():
+        wheel.schedule(key, ts)
+
+    fired = {}
+    now = 0.0
+    while now < 700.0:
+        now += rnd.uniform(0.05, 3.0)
+        for key in wheel.advance(now):
+            fired[key] = now
+
+    assert set(fired) == set(due)
+    for key, at in fired.items():
+        assert due[key] <= at + 1e-9
+    assert wheel.pending == 0
@@ -53,6 +53,15 @@ async def test_load_profile_counts(async_session_maker):
     assert prof.user.tg_id == 200
     assert prof.collections_count == 2
     assert prof.total_cards == 3
+    assert prof.last_updated_at is not None
+
+
+@pytest.mark.asyncio
+async def test_load_profile_without_collections(async_session_maker):
+    prof = await load_profile(async_session_maker, tg_id=250, username="empty")
+    assert prof.collections_count == 0
+    assert prof.total_cards == 0
+    assert prof.last_updated_at is None
 
 
 @pytest.mark.asyncio
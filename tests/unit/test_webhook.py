@@ -0,0 +1,178 @@
+import asyncio
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from app.config import settings
+from app.middlewares.user_lock import UserLockMiddleware, UserLockTimeout
+from app.services.redis_kv import RedisKV
+
+
+@pytest.mark.asyncio
+async def test_webhook_rejects_wrong_secret(
+    monkeypatch, patch_aiogram_network, patch_app_infra
+):
+    from aiohttp.test_utils import TestClient, TestServer
+
+    from app.webhook import create_web_app
+
+    monkeypatch.setattr(settings, "WEBHOOK_SECRET", "s3cret")
+
+    update = {
+        "update_id": 1,
+        "message": {
+            "message_id": 1,
+            "date": 0,
+            "chat": {"id": 5, "type": "private"},
+            "from": {"id": 5, "is_bot": False, "first_name": "u"},
+            "text": "/help",
+        },
+    }
+    web_app = await create_web_app()
+    client = TestClient(TestServer(web_app))
+    await client.start_server()
+    try:
+        resp = await client.post(
+            settings.WEBHOOK_PATH,
+            json=update,
+            headers={"X-Telegram-Bot-Api-Secret-Token": "nope"},
+        )
+        assert resp.status == 401
+
+        resp = await client.post(
+            settings.WEBHOOK_PATH,
+            json=update,
+            headers={"X-Telegram-Bot-Api-Secret-Token": "s3cret"},
+        )
+        assert resp.status == 200
+
+        resp = await client.get("/healthz")
+        assert await resp.text() == "ok"
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_webhook_requires_secret(monkeypatch):
+    from app.webhook import create_web_app
+
+    monkeypatch.setattr(settings, "WEBHOOK_SECRET", "")
+    with pytest.raises(RuntimeError):
+        await create_web_app()
+
+
+@pytest.mark.asyncio
+async def test_user_lock_runs_updates_for_one_user_in_update_id_order():
+    kv = RedisKV(client=fakeredis.FakeAsyncRedis(), prefix="test", ttl_seconds=60)
+    mw = UserLockMiddleware(kv, lease_sec=5, wait_sec=2, poll_sec=0.001)
+    user = SimpleNamespace(id=1)
+    started = asyncio.Event()
+    release = asyncio.Event()
+    events = []
+
+    async def handler(event, data):
+        events.append(("start", event.update_id))
+        if event.update_id == 10:
+            started.set()
+            await release.wait()
+        await asyncio.sleep(0.01)
+        events.append(("end", event.update_id))
+
+    first = asyncio.create_task(
+        mw(handler, SimpleNamespace(update_id=10), {"event_from_user": user})
+    )
+    await started.wait()
+    later = asyncio.create_task(
+        mw(handler, SimpleNamespace(update_id=12), {"event_from_user": user})
+    )
+    await asyncio.sleep(0.02)
+    earlier = asyncio.create_task(
+        mw(handler, SimpleNamespace(update_id=11), {"event_from_user": user})
+    )
+    await asyncio.sleep(0.02)
+    release.set()
+    await asyncio.gather(first, later, earlier)
+
+    assert events == [
+        ("start", 10),
+        ("end", 10),
+        ("start", 11),
+        ("end", 11),
+        ("start", 12),
+        ("end", 12),
+    ]
+    assert await kv.client.get(mw.lock_key(1)) is None
+    assert await kv.client.zcard(mw.queue_keys(1)[0]) == 0
+
+
+@pytest.mark.asyncio
+async def test_user_lock_timeout_fails_update_without_running_handler():
+    kv = RedisKV(client=fakeredis.FakeAsyncRedis(), prefix="test", ttl_seconds=60)
+    mw = UserLockMiddleware(kv, lease_sec=5, wait_sec=0.05, poll_sec=0.001)
+    await kv.client.set(mw.lock_key(1), "other-worker", px=5000)
+
+    async def handler(event, data):
+        raise AssertionError("handler must not run without the lock")
+
+    with pytest.raises(UserLockTimeout):
+        await mw(
+            handler,
+            SimpleNamespace(update_id=7),
+            {"event_from_user": SimpleNamespace(id=1)},
+        )
+    assert await kv.client.zcard(mw.queue_keys(1)[0]) == 0
+
+
+@pytest.mark.asyncio
+async def test_user_lock_skips_dead_waiters():
+    kv = RedisKV(client=fakeredis.FakeAsyncRedis(), prefix="test", ttl_seconds=60)
+    mw = UserLockMiddleware(kv, lease_sec=5, wait_sec=1, poll_sec=0.001)
+    queue, seen = mw.queue_keys(1)
+    await kv.client.zadd(queue, {"3": 3})
+    await kv.client.hset(seen, "3", 0)
+    seen_updates = []
+
+    async def handler(event, data):
+        seen_updates.append(event.update_id)
+
+    await mw(
+        handler,
+        SimpleNamespace(update_id=4),
+        {"event_from_user": SimpleNamespace(id=1)},
+    )
+    assert seen_updates == [4]
+    assert await kv.client.zcard(queue) == 0
+
+
+@pytest.mark.asyncio
+async def test_user_lock_lease_is_renewed_while_handler_runs():
+    kv = RedisKV(client=fakeredis.FakeAsyncRedis(), prefix="test", ttl_seconds=60)
+    mw = UserLockMiddleware(kv, lease_sec=0.2, wait_sec=1, poll_sec=0.001)
+    held = []
+
+    async def handler(event, data):
+        await asyncio.sleep(0.35)
+        held.append(await kv.client.get(mw.lock_key(1)))
+
+    await mw(
+        handler,
+        SimpleNamespace(update_id=1),
+        {"event_from_user": SimpleNamespace(id=1)},
+    )
+    assert held[0] is not None
+    assert await kv.client.get(mw.lock_key(1)) is None
+
+
+@pytest.mark.asyncio
+async def test_user_lock_swallows_handler_errors():
+    kv = RedisKV(client=fakeredis.FakeAsyncRedis(), prefix="test", ttl_seconds=60)
+    mw = UserLockMiddleware(kv, lease_sec=5, wait_sec=1, poll_sec=0.001)
+
+    async def handler(event, data):
+        raise RuntimeError("message is not modified")
+
+    event = SimpleNamespace(update_id=1)
+    assert await mw(handler, event, {"event_from_user": SimpleNamespace(id=1)}) is None
+    assert await mw(handler, event, {}) is None
+    assert await kv.client.get(mw.lock_key(1)) is None